@@ -0,0 +1,130 @@
+"""Compares the memory and lookup cost of the old blacklist caches against :class:`DuckBlacklistManager`.
+
+Run from the repository root with ``python -m benchmarks.blacklist``.
+"""
+
+from __future__ import annotations
+
+import random
+import timeit
+import tracemalloc
+from collections import defaultdict
+from types import SimpleNamespace
+from typing import Any, Callable, DefaultDict, List, Set, Tuple
+
+from utils.bases.blacklist import DuckBlacklistManager
+
+NUMBER = 200_000
+GUILDS = 5_000
+# Discord snowflakes are around 2**60.
+BASE = 700_000_000_000_000_000
+
+
+def snowflake(rng: random.Random) -> int:
+    return BASE + rng.getrandbits(52)
+
+
+GUILD_IDS = [snowflake(random.Random(i)) for i in range(GUILDS)]
+
+
+def entries(amount: int) -> List[Tuple[str, int, int]]:
+    rng = random.Random(amount)
+    rows: List[Tuple[str, int, int]] = []
+    for _ in range(amount):
+        kind = rng.choice(('user', 'user', 'user', 'channel', 'guild'))
+        guild_id = rng.choice(GUILD_IDS) if kind != 'guild' and rng.random() < 0.5 else 0
+        if kind == 'channel' and not guild_id:
+            guild_id = rng.choice(GUILD_IDS)
+        rows.append((kind, snowflake(rng), guild_id))
+    return rows
+
+
+class LegacyBlacklist:
+    # What DuckBlacklistManager used to keep, and how check_context used to look things up.
+    def __init__(self, rows: List[Tuple[str, int, int]]) -> None:
+        self.guilds: Set[int] = set()
+        self.global_users: Set[int] = set()
+        self.guild_users: DefaultDict[int, Set[int]] = defaultdict(set)
+        self.channels: DefaultDict[int, Set[int]] = defaultdict(set)
+        for kind, entity_id, guild_id in rows:
+            if kind == 'guild':
+                self.guilds.add(entity_id)
+            elif kind == 'user':
+                if not guild_id:
+                    self.global_users.add(entity_id)
+                else:
+                    self.guild_users[guild_id].add(entity_id)
+            else:
+                self.channels[guild_id].add(entity_id)
+
+    def is_blocked(self, user_id: int, guild_id: int, channel_id: int) -> bool:
+        return (
+            user_id in self.global_users
+            or user_id in self.guild_users[guild_id]
+            or channel_id in self.channels[guild_id]
+            or guild_id in self.guilds
+        )
+
+
+class FakeConnection:
+    def __init__(self, rows: List[Tuple[str, int, int]]) -> None:
+        self.rows = rows
+
+    async def fetch(self, query: str) -> List[Tuple[str, int, int]]:
+        return self.rows
+
+
+def current(rows: List[Tuple[str, int, int]]) -> DuckBlacklistManager:
+    manager = DuckBlacklistManager.__new__(DuckBlacklistManager)
+    manager.bot = SimpleNamespace(  # type: ignore
+        remove_listener=lambda *args: None,
+        checks=SimpleNamespace(remove=lambda *args: None),
+        invalidation=SimpleNamespace(unsubscribe=lambda *args: None),
+    )
+    coro = manager.build_cache(FakeConnection(rows))  # type: ignore
+    try:
+        coro.send(None)
+    except StopIteration:
+        pass
+    return manager
+
+
+def measure(build: Callable[[], Any]) -> Tuple[Any, int]:
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def main() -> None:
+    # Mostly misses, like real traffic, over many guilds.
+    rng = random.Random(0)
+    lookups = [(snowflake(rng), rng.choice(GUILD_IDS), snowflake(rng)) for _ in range(5000)]
+
+    def run(check: Callable[[int, int, int], Any]) -> None:
+        for user_id, guild_id, channel_id in lookups:
+            check(user_id, guild_id, channel_id)
+
+    for amount in (1_000, 10_000, 100_000):
+        rows = entries(amount)
+        legacy, legacy_size = measure(lambda: LegacyBlacklist(rows))
+        manager, current_size = measure(lambda: current(rows))
+
+        # The legacy lookups create an empty set for every guild they see, so memory is measured again after them.
+        _, legacy_growth = measure(lambda: run(legacy.is_blocked))
+        _, current_growth = measure(lambda: run(manager.is_blocked))
+
+        number = NUMBER // len(lookups)
+        old = timeit.timeit(lambda: run(legacy.is_blocked), number=number) / NUMBER
+        new = timeit.timeit(lambda: run(manager.is_blocked), number=number) / NUMBER
+
+        print(
+            f'{amount:>7} entries: legacy {legacy_size / 1024:8.1f} KiB, {(legacy_size + legacy_growth) / 1024:8.1f} KiB '
+            f'after lookups | current {current_size / 1024:8.1f} KiB, {(current_size + current_growth) / 1024:8.1f} KiB '
+            f'after lookups | lookup legacy {old * 1e9:6.1f}ns, current {new * 1e9:6.1f}ns'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Compares the lookup cost of the old scanning ``ExpiringCache`` against the heap based one.
+
+Run from the repository root with ``python -m benchmarks.expiring_cache``.
+"""
+
+from __future__ import annotations
+
+import time
+import timeit
+from typing import Any
+
+from utils.cache import ExpiringCache
+
+NUMBER = 2_000
+
+
+class LegacyExpiringCache(dict):
+    # What both cache modules used to do: scan every entry on each read.
+    def __init__(self, seconds: float) -> None:
+        self.__ttl = seconds
+        super().__init__()
+
+    def __verify_cache_integrity(self) -> None:
+        current_time = time.monotonic()
+        to_remove = [k for (k, (_, t)) in self.items() if current_time > (t + self.__ttl)]
+        for k in to_remove:
+            del self[k]
+
+    def __contains__(self, key: Any) -> bool:
+        self.__verify_cache_integrity()
+        return super().__contains__(key)
+
+    def __getitem__(self, key: Any) -> Any:
+        self.__verify_cache_integrity()
+        return super().__getitem__(key)
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        super().__setitem__(key, (value, time.monotonic()))
+
+
+def lookups(cache: Any, size: int) -> None:
+    for i in range(0, size, max(size // 100, 1)):
+        cache[i]
+
+
+def main() -> None:
+    for size in (100, 1_000, 10_000, 100_000):
+        legacy = LegacyExpiringCache(3600)
+        heap = ExpiringCache(3600)
+        bounded = ExpiringCache(3600, maxsize=size, lru=True)
+        for i in range(size):
+            legacy[i] = heap[i] = bounded[i] = i
+
+        # The legacy cache gets fewer rounds at large sizes, it would take minutes otherwise.
+        number = max(NUMBER * 100 // size, 1)
+        per_lookup = min(size, 100) * number
+        old = timeit.timeit(lambda: lookups(legacy, size), number=number) / per_lookup
+        new = timeit.timeit(lambda: lookups(heap, size), number=NUMBER) / (min(size, 100) * NUMBER)
+        lru = timeit.timeit(lambda: lookups(bounded, size), number=NUMBER) / (min(size, 100) * NUMBER)
+        print(
+            f'{size:>7} entries: legacy {old * 1e6:9.3f}us, heap {new * 1e6:6.3f}us, '
+            f'heap+lru {lru * 1e6:6.3f}us per lookup ({old / new:7.1f}x)'
+        )
+
+
+if __name__ == '__main__':
+    main()
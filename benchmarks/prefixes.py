@@ -0,0 +1,50 @@
+"""Compares the old ``when_mentioned_or`` prefix resolution against :class:`PrefixMatcher`.
+
+Run from the repository root with ``python -m benchmarks.prefixes``.
+"""
+
+from __future__ import annotations
+
+import timeit
+from types import SimpleNamespace
+
+import discord
+from discord.ext import commands
+from discord.ext.commands.view import StringView
+
+from utils import PrefixMatcher
+
+BOT = SimpleNamespace(user=SimpleNamespace(id=788278464474120202))
+MENTIONS = (f'<@{BOT.user.id}> ', f'<@!{BOT.user.id}> ')
+NUMBER = 200_000
+
+
+def legacy(prefixes: set[str], content: str) -> None:
+    # What DuckBot.get_prefix and Bot.get_context used to do per message.
+    prefix = commands.when_mentioned_or(*set(prefixes))(BOT, None)  # type: ignore
+    if content.startswith(tuple(prefix)):
+        discord.utils.find(StringView(content).skip_string, prefix)
+
+
+def matcher(prefixes: PrefixMatcher, content: str) -> None:
+    prefix = prefixes.match(content)
+    if prefix is not None:
+        StringView(content).skip_string(prefix)
+
+
+def main() -> None:
+    for amount in (1, 12):
+        prefixes = {f'p{i}!' for i in range(amount - 1)} | {'db.'}
+        compiled = PrefixMatcher(prefixes, mentions=MENTIONS)
+
+        for label, content in (('command', 'db.help ping'), ('chatter', 'hello there, how is it going?')):
+            old = timeit.timeit(lambda: legacy(prefixes, content), number=NUMBER)
+            new = timeit.timeit(lambda: matcher(compiled, content), number=NUMBER)
+            print(
+                f'{amount:>2} prefixes, {label:<7}: legacy {old / NUMBER * 1e6:6.3f}us, '
+                f'matcher {new / NUMBER * 1e6:6.3f}us ({old / new:4.1f}x)'
+            )
+
+
+if __name__ == '__main__':
+    main()
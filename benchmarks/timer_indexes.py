@@ -0,0 +1,160 @@
+"""Compares the plans of the timer lookups that filter on ``extra`` against the typed, indexed owner columns.
+
+Fills a temporary table shaped like ``timers`` and runs every lookup both ways with ``EXPLAIN ANALYZE``.
+Nothing is written to the real tables. Needs the ``POSTGRES`` URI from ``utils/.env``, like the bot.
+
+Run from the repository root with ``python -m benchmarks.timer_indexes [rows]``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sys
+from typing import Any, List, Tuple
+
+import asyncpg
+from dotenv import load_dotenv
+
+ROWS = 1_000_000
+
+SETUP = """
+CREATE TEMPORARY TABLE bench_timers (
+    id BIGSERIAL PRIMARY KEY,
+    precise BOOLEAN DEFAULT TRUE,
+    event TEXT,
+    extra JSONB,
+    created TIMESTAMP,
+    expires TIMESTAMP,
+    user_id BIGINT,
+    guild_id BIGINT,
+    entity_id BIGINT
+);
+
+-- 50k users, 2k guilds and 20k channels, with ids shaped like snowflakes.
+INSERT INTO bench_timers (event, extra, created, expires, user_id, guild_id, entity_id)
+SELECT event, extra, NOW(), NOW() + (n % 100000) * INTERVAL '1 minute',
+       CASE event WHEN 'blacklist' THEN NULL ELSE u END,
+       CASE event WHEN 'reminder' THEN NULL ELSE g END,
+       CASE WHEN event IN ('reminder', 'tempblock') THEN c WHEN event = 'blacklist' THEN u END
+FROM (
+    SELECT n, u, g, c, event,
+           CASE event
+               WHEN 'reminder' THEN jsonb_build_object('args', jsonb_build_array(u, c, 'something'), 'kwargs', '{}'::JSONB)
+               WHEN 'tempblock' THEN jsonb_build_object('args', jsonb_build_array(g, c, u, 1), 'kwargs', '{}'::JSONB)
+               WHEN 'blacklist' THEN jsonb_build_object(
+                   'args', '[]'::JSONB,
+                   'kwargs', jsonb_build_object('blacklist_type', 'user', 'entity_id', u, 'guild_id', g)
+               )
+               ELSE jsonb_build_object('args', jsonb_build_array(u, g), 'kwargs', '{}'::JSONB)
+           END AS extra
+    FROM (
+        SELECT n,
+               700000000000000000 + (n * 7919) % 50000 AS u,
+               800000000000000000 + (n * 104729) % 2000 AS g,
+               900000000000000000 + (n * 15485863) % 20000 AS c,
+               (ARRAY['reminder', 'reminder', 'mute', 'ban', 'tempblock', 'blacklist'])[1 + n % 6] AS event
+        FROM generate_series(1, $1::BIGINT) AS n
+    ) AS ids
+) AS rows;
+
+CREATE INDEX ON bench_timers (expires);
+CREATE INDEX ON bench_timers (event, user_id);
+CREATE INDEX ON bench_timers (event, guild_id);
+CREATE INDEX ON bench_timers (event, entity_id);
+ANALYZE bench_timers;
+"""
+
+USER = 700000000000000000 + 42
+GUILD = 800000000000000000 + 42
+CHANNEL = 900000000000000000 + 42
+
+# (name, legacy query, typed query, arguments)
+QUERIES: List[Tuple[str, str, str, Tuple[Any, ...]]] = [
+    (
+        'reminder list',
+        "SELECT id FROM bench_timers WHERE event = 'reminder' AND (extra->'args'->0)::bigint = $1 ORDER BY expires",
+        "SELECT id FROM bench_timers WHERE event = 'reminder' AND user_id = $1 ORDER BY expires",
+        (USER,),
+    ),
+    (
+        'unmute',
+        "SELECT id FROM bench_timers WHERE event = 'mute' "
+        "AND (extra->'args'->0)::bigint = $1 AND (extra->'args'->1)::bigint = $2",
+        "SELECT id FROM bench_timers WHERE event = 'mute' AND user_id = $1 AND guild_id = $2",
+        (USER, GUILD),
+    ),
+    (
+        'muterole unbind',
+        "SELECT id FROM bench_timers WHERE event = 'mute' AND (extra->'args'->1)::bigint = $1",
+        "SELECT id FROM bench_timers WHERE event = 'mute' AND guild_id = $1",
+        (GUILD,),
+    ),
+    (
+        'unblock',
+        "SELECT id FROM bench_timers WHERE event = 'tempblock' AND (extra->'args'->0)::bigint = $1 "
+        "AND (extra->'args'->1)::bigint = $2 AND (extra->'args'->2)::bigint = $3",
+        "SELECT id FROM bench_timers WHERE event = 'tempblock' AND guild_id = $1 AND entity_id = $2 AND user_id = $3",
+        (GUILD, CHANNEL, USER),
+    ),
+    (
+        'blacklist user',
+        "SELECT id FROM bench_timers WHERE event = 'blacklist' AND (extra->'kwargs'->>'blacklist_type') = 'user' "
+        "AND (extra->'kwargs'->'entity_id')::BIGINT = $1 AND (extra->'kwargs'->'guild_id')::BIGINT = $2",
+        "SELECT id FROM bench_timers WHERE event = 'blacklist' AND entity_id = $1 AND guild_id = $2 "
+        "AND extra->'kwargs'->>'blacklist_type' = 'user'",
+        (USER, GUILD),
+    ),
+]
+
+
+def summarize(plan: Any) -> Tuple[str, float]:
+    """Returns the scans used by a plan and its execution time, in milliseconds."""
+    scans: List[str] = []
+
+    def walk(node: Any) -> None:
+        if 'Scan' in node['Node Type']:
+            scans.append(node['Node Type'])
+        for child in node.get('Plans', ()):
+            walk(child)
+
+    walk(plan['Plan'])
+    return ', '.join(dict.fromkeys(scans)), plan['Execution Time']
+
+
+async def explain(conn: asyncpg.Connection, query: str, args: Tuple[Any, ...]) -> Tuple[str, float]:
+    # Once to warm the cache, then the measured run.
+    await conn.fetch(query, *args)
+    result = await conn.fetchval(f'EXPLAIN (ANALYZE, FORMAT JSON) {query}', *args)
+    if result is None:
+        raise RuntimeError(f'EXPLAIN returned no plan for {query!r}')
+    # asyncpg returns json columns as text.
+    return summarize(json.loads(result)[0])
+
+
+async def main(rows: int) -> None:
+    load_dotenv('utils/.env')
+    uri = os.environ.get('POSTGRES')
+    if not uri:
+        raise RuntimeError("'POSTGRES' not set in .env file. Set it.")
+
+    conn = await asyncpg.connect(uri)
+    try:
+        print(f'Filling bench_timers with {rows} rows...')
+        # SETUP is several statements, and a prepared statement can only hold one.
+        await conn.execute(SETUP.replace('$1::BIGINT', str(int(rows))))
+
+        for name, legacy, typed, args in QUERIES:
+            legacy_scans, legacy_ms = await explain(conn, legacy, args)
+            typed_scans, typed_ms = await explain(conn, typed, args)
+            print(
+                f'{name:>16}: extra {legacy_ms:9.3f}ms ({legacy_scans}) | '
+                f'columns {typed_ms:7.3f}ms ({typed_scans}) | {legacy_ms / typed_ms:7.1f}x'
+            )
+    finally:
+        await conn.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else ROWS))
@@ -4,21 +4,25 @@ import asyncio
 import concurrent.futures
 import contextlib
 import functools
+import hashlib
+import json
 import logging
 import random
 import re
 import sys
 import time
-from collections import defaultdict
 from typing import (
     TYPE_CHECKING,
     Any,
     Awaitable,
     Callable,
+    ClassVar,
     Coroutine,
-    DefaultDict,
+    Dict,
+    FrozenSet,
     Generator,
     Generic,
+    Iterable,
     List,
     NamedTuple,
     Optional,
@@ -31,22 +35,38 @@ from typing import (
 )
 
 import asyncpg
-import cachetools
 import discord
 from discord import app_commands
 from discord.backoff import ExponentialBackoff
 from discord.ext import commands
 
 from utils import (
+    AbuseDetector,
+    CheckPipeline,
+    CheckResult,
+    CommandUsageRecorder,
     DuckBlacklistManager,
     DuckContext,
     DuckCog,
     DuckExceptionManager,
+    InstrumentedConnection,
+    InstrumentedPool,
+    ExtensionLoader,
+    CacheInvalidation,
+    GuildConfigStore,
+    InvalidationBus,
     TimerManager,
     col,
     human_timedelta,
     IPCBase,
+    LoopMonitor,
+    PoolStats,
+    PrefixMatcher,
+    QueryRegistry,
+    QueryTracker,
+    ResponseRegistry,
 )
+from utils.bases.database import queries, query_stats
 from utils.types import constants
 from utils.bases.errors import *
 
@@ -69,27 +89,43 @@ DCT = TypeVar("DCT", bound="DuckContext")
 T = TypeVar("T")
 P = ParamSpec("P")
 
-initial_extensions: Tuple[str, ...] = (
+# Maps every extension to the extensions that have to be loaded before it.
+# Extensions that don't depend on each other are loaded concurrently.
+initial_extensions: Dict[str, Tuple[str, ...]] = {
     # Helpers
-    "utils.jishaku",
-    "utils.bases.context",
-    "utils.command_errors",
-    "utils.interactions.command_errors",
-    "utils.bases.help",
-    "utils.bases.ipc",
+    "utils.jishaku": (),
+    "utils.bases.context": (),
+    "utils.command_errors": (),
+    "utils.interactions.command_errors": (),
+    "utils.bases.help": (),
+    "utils.bases.ipc": (),
     # Cogs
-    "cogs.guild_config",
-    "cogs.meta",
-    "cogs.moderation",
-    "cogs.owner",
-    "cogs.information",
-    "cogs.tags",
-)
+    "cogs.guild_config": ("utils.bases.context",),
+    "cogs.meta": ("utils.bases.context",),
+    "cogs.moderation": ("utils.bases.context",),
+    "cogs.owner": ("utils.bases.context",),
+    "cogs.information": ("utils.bases.context",),
+    "cogs.tags": ("utils.bases.context",),
+}
 
 
 class SyncResult(NamedTuple):
     synced: bool
     commands: List[app_commands.AppCommand]
+    added: Tuple[str, ...] = ()
+    removed: Tuple[str, ...] = ()
+    changed: Tuple[str, ...] = ()
+
+
+def _command_key(payload: Dict[str, Any]) -> str:
+    # Names are only unique per command type (chat input, user, message)
+    return f"{payload.get('type', 1)}:{payload['name']}"
+
+
+def _payload_digest(payload: Any) -> str:
+    # sort_keys makes the digest independent of dict ordering, which is not stable between versions.
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
 
 
 def _wrap_extension(func: Callable[P, Awaitable[T]]) -> Callable[P, Coroutine[Any, Any, Optional[T]]]:
@@ -165,16 +201,25 @@ class DbContextManager(Generic[DBT]):
         The bot instance.
     timeout: :class:`float`
         The timeout for acquiring a connection.
+    transaction: :class:`bool`
+        Whether to wrap the connection's statements in a transaction.
+        If ``False``, every statement is committed on its own.
+    readonly: :class:`bool`
+        Whether the transaction is read-only. It is also ``REPEATABLE READ``, so all of
+        its statements see the same snapshot. Has no effect without a transaction.
     """
 
-    __slots__: Tuple[str, ...] = ("bot", "timeout", "_pool", "_conn", "_tr")
+    __slots__: Tuple[str, ...] = ("bot", "timeout", "transaction", "readonly", "_pool", "_conn", "_tr", "_acquired_at")
 
-    def __init__(self, bot: DBT, *, timeout: float = 10.0) -> None:
+    def __init__(self, bot: DBT, *, timeout: float = 10.0, transaction: bool = True, readonly: bool = False) -> None:
         self.bot: DBT = bot
         self.timeout: float = timeout
+        self.transaction: bool = transaction
+        self.readonly: bool = readonly
         self._pool: asyncpg.Pool[asyncpg.Record] = bot.pool
         self._conn: Optional[Connection] = None
         self._tr: Optional[Transaction] = None
+        self._acquired_at: float = 0.0
 
     async def acquire(self) -> Connection:
         return await self.__aenter__()
@@ -183,20 +228,44 @@ class DbContextManager(Generic[DBT]):
         return await self.__aexit__(None, None, None)
 
     async def __aenter__(self) -> Connection[asyncpg.Record]:
+        stats = self.bot.pool_stats
+        start = time.perf_counter()
         self._conn = conn = await self._pool.acquire(timeout=self.timeout)  # type: ignore
-        self._tr = conn.transaction()
-        await self._tr.start()
+        self._acquired_at = time.perf_counter()
+        stats.acquire.record(self._acquired_at - start)
+
+        if not self.transaction:
+            stats.autocommit += 1
+            return conn  # type: ignore
+
+        try:
+            if self.readonly:
+                self._tr = conn.transaction(isolation='repeatable_read', readonly=True)
+            else:
+                self._tr = conn.transaction()
+            await self._tr.start()
+        except:
+            await self._pool.release(conn)
+            self._conn = None
+            raise
+
+        stats.transactions += 1
+        if self.readonly:
+            stats.readonly += 1
         return conn  # type: ignore
 
     async def __aexit__(self, exc_type, exc, tb):
-        if exc and self._tr:
-            await self._tr.rollback()
-
-        elif not exc and self._tr:
-            await self._tr.commit()
+        try:
+            if exc and self._tr:
+                self.bot.pool_stats.rollbacks += 1
+                await self._tr.rollback()
 
-        if self._conn is not None:
-            await self._pool.release(self._conn)  # type: ignore
+            elif not exc and self._tr:
+                await self._tr.commit()
+        finally:
+            if self._conn is not None:
+                await self._pool.release(self._conn)  # type: ignore
+                self.bot.pool_stats.held.record(time.perf_counter() - self._acquired_at)
 
 
 class DuckHelper(TimerManager):
@@ -233,6 +302,12 @@ class DuckBot(commands.AutoShardedBot, DuckHelper):
         command_prefix: Set[str]
         cogs: Mapping[str, DuckCog]
 
+    # Class level, so the hot queries can be prepared by the pool's init hook before the bot exists.
+    queries: ClassVar[QueryRegistry] = queries
+    query_stats: ClassVar[QueryTracker] = query_stats
+    # How often, in seconds, the owners of the application are resolved again.
+    owner_refresh_interval: ClassVar[float] = 3600.0
+
     def __init__(self, *, session: ClientSession, pool: Pool, **kwargs) -> None:
         intents = discord.Intents.all()
         intents.typing = False
@@ -252,42 +327,50 @@ class DuckBot(commands.AutoShardedBot, DuckHelper):
         self.pool: Pool[asyncpg.Record] = pool
         self.session: ClientSession = session
         self._context_cls: Type[commands.Context] = commands.Context
-        self.prefix_cache: DefaultDict[int, Set[str]] = defaultdict(set)
-        self.messages: cachetools.TTLCache[str, discord.Message] = cachetools.TTLCache(
-            maxsize=1000, ttl=300.0
-        )  # {repr(ctx): message(from ctx.send) }
+        self.prefix_cache: Dict[int, PrefixMatcher] = {}
+        self.messages: ResponseRegistry = ResponseRegistry(maxsize=1000, ttl=300.0)
         self.error_webhook_url: Optional[str] = kwargs.get("error_wh")
         self._start_time: Optional[datetime.datetime] = None
         self.listener_connection: Optional[asyncpg.Connection] = None
         self.allowed_locales: Set[str] = {"en_us", "es_es", "it"}
+        self.owner_ids: FrozenSet[int] = frozenset()
+        self._owners_stale: bool = False
+        self._owner_refresh_task: Optional[asyncio.Task[None]] = None
 
+        self.invalidation: InvalidationBus = InvalidationBus(self)
+        self.checks: CheckPipeline = CheckPipeline()
+        self.checks.add("owner", self._owner_check)
         self.blacklist: DuckBlacklistManager = DuckBlacklistManager(self)
+        self.abuse: AbuseDetector = AbuseDetector(self)
+        self.guild_configs: GuildConfigStore = GuildConfigStore()
+        for table in ('guilds', 'plonks', 'command_config'):
+            self.invalidation.subscribe(table, self._on_guild_config_invalidation)
+        self.pool_stats: PoolStats = PoolStats()
+        self.loop_monitor: LoopMonitor = LoopMonitor(self)
         self.exceptions: DuckExceptionManager = DuckExceptionManager(self)
+        self.command_usage: CommandUsageRecorder = CommandUsageRecorder(self)
         self.thread_pool: concurrent.futures.ThreadPoolExecutor = concurrent.futures.ThreadPoolExecutor(max_workers=20)
 
         self.constants = constants
         self.tree.error(self.on_tree_error)
 
         self.views: Set[discord.ui.View] = set()
-        self._auto_spam_count: DefaultDict[int, int] = defaultdict(int)
-        self.global_mapping = commands.CooldownMapping.from_cooldown(10, 12, commands.BucketType.user)
         self.ipc: Optional[IPCBase] = None
+        self._synced_tree_digests: Dict[int, str] = {}
+        self.extension_loader: ExtensionLoader = ExtensionLoader(self, initial_extensions)
 
     async def setup_hook(self) -> None:
-        failed = False
-        for extension in initial_extensions:
-            try:
-                result = await self.load_extension(extension)
-            except Exception as e:
-                failed = True
-                await self.exceptions.add_error(error=e)
-            else:
-                failed = failed or not result
+        await self.refresh_owners()
+        self._owner_refresh_task = self.create_task(self._refresh_owners_periodically(), name="owner-refresh")
+
+        failed = not await self.extension_loader.load_all()
 
         self.tree.copy_global_to(guild=discord.Object(id=774561547930304536))
 
         await self.populate_cache()
         await self.create_db_listeners()
+        self.command_usage.start()
+        self.loop_monitor.start()
 
         super(DuckHelper, self).__init__(bot=self)
 
@@ -306,10 +389,13 @@ class DuckBot(commands.AutoShardedBot, DuckHelper):
             else:
                 if result.synced is True:
                     self.logger.info(
-                        "%sSuccessfully synced %s commands to guild %s",
+                        "%sSuccessfully synced %s commands to guild %s (added: %s, removed: %s, changed: %s)",
                         col(6),
                         len(result.commands),
                         guild.id,
+                        ", ".join(result.added) or "none",
+                        ", ".join(result.removed) or "none",
+                        ", ".join(result.changed) or "none",
                     )
                 else:
                     self.logger.info("%sCommands for guild %s were already synced", col(6), guild.id)
@@ -363,8 +449,10 @@ class DuckBot(commands.AutoShardedBot, DuckHelper):
             )
             if old_init is not None:
                 await old_init(con)
+            await cls.queries.prepare_all(con)
 
-        pool = await asyncpg.create_pool(uri, init=init, **kwargs)
+        kwargs.setdefault("connection_class", InstrumentedConnection)
+        pool = await InstrumentedPool.create(uri, init=init, **kwargs)
         cls.get_logger().info(f"{col(2)}Successfully created connection pool.")
         assert pool is not None, "Pool is None"
         return pool
@@ -372,18 +460,73 @@ class DuckBot(commands.AutoShardedBot, DuckHelper):
     async def populate_cache(self) -> None:
         """Populates all cache that comes from the database. Please note if commands are
         processed before this data is complete, some guilds may not have custom prefixes.
+
+        Every part is loaded concurrently on its own pool connection, so this
+        takes about as long as the slowest query rather than all of them combined.
         """
-        async with self.safe_connection() as conn:
-            data = await conn.fetch("SELECT guild_id, prefixes FROM guilds")
-            for guild_id, prefixes in data:
-                self.prefix_cache[guild_id] = set(prefixes)
-            await self.blacklist.build_cache(conn)
 
-    async def create_db_listeners(self) -> None:
-        """Registers listeners for database events."""
+        async def timed(name: str, coro: Awaitable[Any]) -> Any:
+            start = time.perf_counter()
+            result = await coro
+            rows = len(result) if isinstance(result, list) else result
+            self.logger.info("%sLoaded %s %s in %.2fms", col(2), rows, name, (time.perf_counter() - start) * 1000)
+            return result
+
+        start = time.perf_counter()
+        guilds, plonks, command_config, _ = await asyncio.gather(
+            timed(
+                "guild settings",
+                self.pool.fetch(
+                    "SELECT guild_id, prefixes, muted_role_id, muted_role_mode, min_join_age, mutes FROM guilds"
+                ),
+            ),
+            timed("plonks", self.pool.fetch(GuildConfigStore.PLONKS_QUERY)),
+            timed("command config overrides", self.pool.fetch(GuildConfigStore.COMMAND_CONFIG_QUERY)),
+            timed("blacklist entries", self.blacklist.build_cache(self.pool)),
+        )
+
+        self.prefix_cache.clear()
+        for record in guilds:
+            self.update_prefix_cache(record["guild_id"], record["prefixes"])
+
+        self.guild_configs.clear()
+        self.guild_configs.load_guilds(guilds)
+        self.guild_configs.load_plonks(plonks)
+        self.guild_configs.load_command_config(command_config)
+        self.guild_configs.ready = True
+
+        self.logger.info(
+            "%sWarmed up the caches for %s guilds in %.2fms",
+            col(2),
+            len(self.guild_configs),
+            (time.perf_counter() - start) * 1000,
+        )
+
+    async def _on_guild_config_invalidation(self, event: CacheInvalidation) -> None:
+        if event.guild_id is None:
+            if event.op != 'RESYNC':
+                # Truncated. Guilds are fetched one by one until everything is loaded again.
+                # Resyncs reload the store themselves.
+                self.guild_configs.clear()
+                await self.populate_cache()
+        elif event.table == 'guilds':
+            # Hot listeners read these, so keep serving them while reloading.
+            await self.guild_configs.refresh(event.guild_id, connection=self.pool)
+        else:
+            self.guild_configs.invalidate(event.guild_id)
+
+    async def create_db_listeners(self, *, resync: bool = False) -> None:
+        """Registers listeners for database events.
+
+        Parameters
+        ----------
+        resync: :class:`bool`
+            Whether to reload every cache once listening, because
+            notifications may have been missed while disconnected.
+        """
 
         def reregister(con):
-            self.loop.create_task(self.create_db_listeners())
+            self.loop.create_task(self.create_db_listeners(resync=True))
 
         backoff = ExponentialBackoff()
         while not self.pool.is_closing():
@@ -395,14 +538,16 @@ class DuckBot(commands.AutoShardedBot, DuckHelper):
                 async def _delete_prefixes_event(conn, pid, channel, payload):
                     payload = discord.utils._from_json(payload)
                     with contextlib.suppress(Exception):
-                        del self.prefix_cache[payload["guild_id"]]
+                        self.update_prefix_cache(payload["guild_id"], ())
 
                 async def _create_or_update_event(conn, pid, channel, payload):
                     payload = discord.utils._from_json(payload)
-                    self.prefix_cache[payload["guild_id"]] = set(payload["prefixes"])
+                    self.update_prefix_cache(payload["guild_id"], payload["prefixes"])
 
                 await conn.add_listener("delete_prefixes", _delete_prefixes_event)
                 await conn.add_listener("update_prefixes", _create_or_update_event)
+                await self.invalidation.attach(conn)
+                await self.attach_timer_notifications(conn)
                 break
 
             except Exception as e:
@@ -410,6 +555,15 @@ class DuckBot(commands.AutoShardedBot, DuckHelper):
                 self.logger.error(f"Failed to set up listener connection, retrying in {delay:.2f}s", exc_info=e)
                 await asyncio.sleep(delay)
 
+        if resync and not self.pool.is_closing():
+            # Another process may have written while we weren't listening.
+            self.logger.info("Listener connection re-established, resyncing caches.")
+            try:
+                await self.populate_cache()
+            except Exception as e:
+                self.logger.error("Failed to resync caches", exc_info=e)
+            self.invalidation.resync()
+
     @property
     def start_time(self) -> datetime.datetime:
         """:class:`datetime.datetime`: The time the bot was started."""
@@ -430,6 +584,17 @@ class DuckBot(commands.AutoShardedBot, DuckHelper):
         """
         return re.compile(rf"<@!?{self.user.id}>")
 
+    @discord.utils.cached_property
+    def default_prefixes(self) -> PrefixMatcher:
+        """:class:`PrefixMatcher`: The matcher used when a guild has no custom prefixes.
+
+        Raises
+        ------
+        AttributeError
+            The bot has not logged in yet.
+        """
+        return self._build_prefix_matcher(self.command_prefix)
+
     @discord.utils.cached_property
     def invite_url(self) -> str:
         """:class:`str`: The invite URL for the bot.
@@ -515,7 +680,9 @@ class DuckBot(commands.AutoShardedBot, DuckHelper):
         except:
             raise
 
-    def safe_connection(self, *, timeout: float = 10.0) -> DbContextManager:
+    def safe_connection(
+        self, *, timeout: float = 10.0, transaction: bool = True, readonly: bool = False
+    ) -> DbContextManager:
         """A context manager that will acquire a connection from the bot's pool.
 
         This will neatly manage the connection and release it back to the pool when the context is exited.
@@ -524,13 +691,57 @@ class DuckBot(commands.AutoShardedBot, DuckHelper):
 
             async with bot.safe_connection(timeout=10) as conn:
                 await conn.execute('SELECT * FROM table')
+
+        Parameters
+        ----------
+        timeout: :class:`float`
+            The timeout for acquiring a connection.
+        transaction: :class:`bool`
+            Whether to open a transaction. Single statements don't need one, and
+            skipping it saves the ``BEGIN`` and ``COMMIT`` round trips. Defaults to ``True``.
+        readonly: :class:`bool`
+            Whether the transaction is read-only, for reads of several statements that
+            must all see the same snapshot of the database. Defaults to ``False``.
+        """
+        return DbContextManager(self, timeout=timeout, transaction=transaction, readonly=readonly)
+
+    def _build_prefix_matcher(self, prefixes: Iterable[str]) -> PrefixMatcher:
+        return PrefixMatcher(prefixes, mentions=(f'<@{self.user.id}> ', f'<@!{self.user.id}> '))
+
+    def update_prefix_cache(self, guild_id: int, prefixes: Iterable[str]) -> None:
+        """Rebuilds the prefix matcher for a guild. This is called by the
+        prefix listeners, so it should not be necessary to call it manually.
+
+        Parameters
+        ----------
+        guild_id: :class:`int`
+            The guild to update the prefixes for.
+        prefixes: Iterable[:class:`str`]
+            The new prefixes. If empty, the guild falls back to the default prefixes.
         """
-        return DbContextManager(self, timeout=timeout)
+        matcher = self._build_prefix_matcher(prefixes)
+        if matcher.prefixes:
+            self.prefix_cache[guild_id] = matcher
+        else:
+            self.prefix_cache.pop(guild_id, None)
 
-    async def get_prefix(self, message: discord.Message, raw: bool = False) -> List[str]:
+    def get_prefix_matcher(self, guild: Optional[discord.abc.Snowflake]) -> PrefixMatcher:
+        """Returns the prefixes of a guild, or the default ones in DMs and guilds without custom prefixes.
+
+        Parameters
+        ----------
+        guild: Optional[:class:`~discord.abc.Snowflake`]
+            The guild to get the prefixes of.
+        """
+        return self.prefix_cache.get(guild.id if guild else 0) or self.default_prefixes
+
+    async def get_prefix(self, message: discord.Message, raw: bool = False) -> Union[str, List[str], Tuple[str, ...]]:
         """Returns the prefixes for the given message.
         if raw is True, returns the prefixes without the bots mention.
 
+        When not raw, this returns the matched prefix directly, so that the
+        library does not have to scan every prefix again.
+
         Parameters
         ----------
         message: :class:`~discord.Message`
@@ -538,24 +749,14 @@ class DuckBot(commands.AutoShardedBot, DuckHelper):
         raw: :class:`bool`
             Whether to return the raw prefixes or not.
         """
-        meth = commands.when_mentioned_or if raw is False else lambda *pres: lambda _, __: list(pres)
+        matcher = self.get_prefix_matcher(message.guild)
 
-        cached_prefixes = self.prefix_cache.get((message.guild and message.guild.id or 0), None)
-        if cached_prefixes is not None:
-            base = set(cached_prefixes)
-        else:
-            base = self.command_prefix
-
-        if not base and raw:
-            base = {
-                'dbb.',
-            }
+        if raw:
+            return list(matcher.prefixes)
 
-        # Note you have a type error here because of `self.command_prefix`.
-        # This is because command_prefix is type hinted internally as both an iterable
-        # of strings and a coroutine. The coroutine aspect is affecting L-430. I can fix it,
-        # but it's not the neatest thing, it's up to you :P
-        return meth(*base)(self, message)
+        # If nothing matches, hand back every candidate so the library's own
+        # startswith check fails the same way it would with a list.
+        return matcher.match(message.content) or matcher.candidates
 
     async def get_context(
         self, message: discord.Message | discord.Interaction[DuckBot], *, cls: Type[DCT] | None = None
@@ -644,25 +845,19 @@ class DuckBot(commands.AutoShardedBot, DuckHelper):
             await self.process_commands(after)
 
     async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent) -> None:
-        """Called every time a message is deleted.
+        """Called every time a message is deleted. Deletes
+        the responses to it, if it was a command.
 
         Parameters
         ----------
-        message: :class:`~discord.Message`
-            The message that was deleted.
+        payload: :class:`~discord.RawMessageDeleteEvent`
+            The payload of the deleted message.
         """
-        _repr_regex = f'<utils\\.DuckContext bound to message \\({payload.channel_id}-{payload.message_id}-[0-9]+\\)>'
-        pattern = re.compile(_repr_regex)
-        messages = {r: m for r, m in self.messages.items() if pattern.fullmatch(r)}
-        for _repr, message in messages.items():
+        for message in self.messages.pop(payload.channel_id, payload.message_id):
             try:
                 await message.delete()
             except discord.HTTPException:
                 pass
-            try:
-                del self.messages[_repr]
-            except KeyError:
-                pass
 
     async def on_error(self, event: str, *args: Any, **kwargs: Any) -> None:
         """Called when an error is raised, and it's not from a command.
@@ -737,8 +932,53 @@ class DuckBot(commands.AutoShardedBot, DuckHelper):
     # a Member into is_owner  ## Nah chai it's your shitty type checker smh!
     @discord.utils.copy_doc(commands.Bot.is_owner)
     async def is_owner(self, user: Union[discord.User, discord.Member]) -> bool:
+        if self.owner_ids:
+            return user.id in self.owner_ids
         return await super().is_owner(user)
 
+    async def refresh_owners(self) -> FrozenSet[int]:
+        """Resolves the owner of the application, or the admins and developers of the team
+        that owns it, into :attr:`owner_ids`.
+
+        The set is frozen and replaced as a whole, so checks can look ids up in it
+        without awaiting anything. If the application info can't be fetched, the
+        previous owners are kept, and the periodic refresh retries within a minute.
+
+        Returns
+        -------
+        FrozenSet[:class:`int`]
+            The ids of the owners.
+        """
+        try:
+            app = await self.application_info()
+        except discord.HTTPException as e:
+            self.logger.error("Failed to fetch the application info, keeping the previous owners", exc_info=e)
+            self._owners_stale = True
+            return self.owner_ids
+
+        if app.team:
+            roles = (discord.TeamMemberRole.admin, discord.TeamMemberRole.developer)
+            owner_ids = frozenset(m.id for m in app.team.members if m.role in roles)
+        else:
+            owner_ids = frozenset((app.owner.id,))
+
+        self.owner_id = None
+        self.owner_ids = owner_ids
+        self._owners_stale = False
+        return owner_ids
+
+    async def _refresh_owners_periodically(self) -> None:
+        backoff = ExponentialBackoff()
+        while True:
+            if self._owners_stale:
+                # The last fetch failed, possibly leaving no owners at all, so don't wait the full interval.
+                delay = min(backoff.delay(), 60.0)
+            else:
+                backoff = ExponentialBackoff()
+                delay = self.owner_refresh_interval
+            await asyncio.sleep(delay)
+            await self.refresh_owners()
+
     async def start(self, token: str, *, reconnect: bool = True, verbose: bool = True) -> None:
         """Starts the bot.
 
@@ -786,9 +1026,29 @@ class DuckBot(commands.AutoShardedBot, DuckHelper):
                     await self.listener_connection.close()
             except Exception as e:
                 self.logger.error(f"Failed to close listener connection", exc_info=e)
+            try:
+                await self.command_usage.close()
+            except Exception as e:
+                self.logger.error("Failed to flush command usage", exc_info=e)
+            self.loop_monitor.stop()
+            if self._owner_refresh_task is not None:
+                self._owner_refresh_task.cancel()
         finally:
             await super().close()
 
+    async def _run_event(
+        self,
+        coro: Callable[..., Coroutine[Any, Any, Any]],
+        event_name: str,
+        *args: Any,
+        **kwargs: Any,
+    ) -> None:
+        start = time.perf_counter()
+        try:
+            await super()._run_event(coro, event_name, *args, **kwargs)
+        finally:
+            self.loop_monitor.record_event(event_name, time.perf_counter() - start)
+
     async def cleanup_views(self, *, timeout: float = 5.0) -> None:
         """Cleans up the views of the bot."""
         future = await asyncio.gather(*[v.on_timeout() for v in self.views], return_exceptions=True)
@@ -838,114 +1098,50 @@ class DuckBot(commands.AutoShardedBot, DuckHelper):
         except discord.HTTPException:
             return None
 
-    async def on_command(self, ctx: DuckContext):
-        """Called when a command is invoked.
-        Handles automatic blacklisting of users that are abusing the bot.
+    async def can_run(self, ctx: DuckContext, /, *, call_once: bool = False) -> bool:
+        """Runs the checks added with :meth:`add_check`, then the stages of :attr:`checks`.
 
         Parameters
         ----------
         ctx: DuckContext
             The context of the command.
+        call_once: bool
+            Whether to run the checks that run once per invocation.
         """
-        assert ctx.command is not None
+        if not await super().can_run(ctx, call_once=call_once):
+            return False
+        return await self.checks.run(ctx, call_once=call_once)
 
-        try:
-            bucket = self.global_mapping.get_bucket(ctx.message)
-            current = ctx.message.created_at.timestamp()
-            if bucket:
-                retry_after = bucket.update_rate_limit(current)
-            else:
-                retry_after = 0
-            author_id = ctx.author.id
-            if retry_after and not await self.is_owner(ctx.author):
-                self._auto_spam_count[author_id] += 1
-                if self._auto_spam_count[author_id] >= 5:
-                    await self._auto_blacklist_add(ctx.author)
-                    del self._auto_spam_count[author_id]
-                    await self._log_rl_excess(ctx, ctx.message, retry_after, auto_block=True)
-                else:
-                    await self._log_rl_excess(ctx, ctx.message, retry_after)
-                return
-            else:
-                self._auto_spam_count.pop(author_id, None)
-        finally:
-            await self.pool.execute(
-                "INSERT INTO commands (guild_id, user_id, command, timestamp) VALUES ($1, $2, $3, $4)",
-                (ctx.guild and ctx.guild.id),
-                ctx.author.id,
-                ctx.command.qualified_name,
-                ctx.message.created_at,
-            )
+    @staticmethod
+    def _owner_check(ctx: DuckContext) -> CheckResult:
+        # Owners skip every other global check.
+        return CheckResult.bypass if ctx.is_owner else CheckResult.allow
 
-    async def _log_rl_excess(self, ctx, message, retry_after, *, auto_block=False):
-        """Logs a rate limit excess
+    async def on_command(self, ctx: DuckContext):
+        """Called when a command is invoked.
+        Records the usage of the command.
 
         Parameters
         ----------
         ctx: DuckContext
             The context of the command.
-        message: discord.Message
-            The message that triggered the rate limit.
-        retry_after: float
-            The amount of time the user had to wait.
-        auto_block: bool
-            Whether the user was automatically blocked.
         """
-        guild_name = getattr(ctx.guild, "name", "No Guild (DMs)")
-        guild_id = getattr(ctx.guild, "id", None)
-        fmt = "User %s (ID %s) in guild %r (ID %s) spamming, retry_after: %.2fs"
-        logging.warning(fmt, message.author, message.author.id, guild_name, guild_id, retry_after)
-        if not auto_block:
-            return
+        assert ctx.command is not None
 
-        await self.bot.wait_until_ready()
-        embed = discord.Embed(title="Auto-blocked Member", colour=0xDDA453)
-        embed.add_field(
-            name="Member",
-            value=f"{message.author} (ID: {message.author.id})",
-            inline=False,
-        )
-        embed.add_field(name="Guild Info", value=f"{guild_name} (ID: {guild_id})", inline=False)
-        embed.add_field(
-            name="Channel Info",
-            value=f"{message.channel} (ID: {message.channel.id}",
-            inline=False,
+        self.command_usage.record(
+            (ctx.guild and ctx.guild.id),
+            ctx.author.id,
+            ctx.command.qualified_name,
+            ctx.message.created_at,
         )
-        embed.timestamp = discord.utils.utcnow()
-        channel: discord.TextChannel = self.bot.get_channel(904797860841812050)  # type: ignore
-
-        try:
-            await channel.send(embed=embed)
-        except discord.HTTPException:
-            pass
-        except AttributeError as e:
-            await self.exceptions.add_error(error=e)
-
-    async def _auto_blacklist_add(self, user: Union[discord.User, discord.Member]):
-        """Adds a user to the auto-blacklist.
-
-        Parameters
-        ----------
-        user: :class:`discord.User`
-            The user to add to the blacklist.
-        """
-
-        query = """
-            INSERT INTO commands (user_id, command) VALUES ($1, $2)
-            RETURNING (SELECT COUNT(*) FROM commands WHERE user_id = $1 AND command = $2)
-        """
-        amount = await self.pool.fetchval(query, user.id, f"AUTO-BOT-BAN")
-        if amount >= 5:
-            await self.blacklist.add_user(
-                user,
-                end_time=discord.utils.utcnow() + datetime.timedelta(minutes=1 * amount),
-            )
-        else:
-            await self.blacklist.add_user(user)
 
     async def try_syncing(self, *, guild: discord.abc.Snowflake | None = None) -> SyncResult:
         """Tries to sync the command tree.
 
+        Each command is stored with a digest of its payload, so only the commands
+        that were added, removed or changed are written. The digest of the whole
+        tree is also kept in memory, so an unchanged tree skips the database entirely.
+
         Parameters
         ----------
         guild: discord.abc.Snowflake | None
@@ -955,22 +1151,50 @@ class DuckBot(commands.AutoShardedBot, DuckHelper):
         await self.wait_until_ready()
 
         guild_id = guild.id if guild else 0
-        all_cmds = self.bot.tree._get_all_commands(guild=guild)
-        payloads = [(guild_id, cmd.to_dict(self.tree)) for cmd in all_cmds]
+        current: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        for cmd in self.tree._get_all_commands(guild=guild):
+            payload = cmd.to_dict(self.tree)
+            current[_command_key(payload)] = (_payload_digest(payload), payload)
 
-        databased = await self.pool.fetch("SELECT payload FROM auto_sync WHERE guild_id = $1", guild_id)
-        saved_payloads = [d["payload"] for d in databased]
-
-        not_synced = [p for _, p in payloads if p not in saved_payloads] + [
-            p for p in saved_payloads if p not in [p for _, p in payloads]
-        ]
+        tree_digest = _payload_digest(sorted((key, digest) for key, (digest, _) in current.items()))
+        if self._synced_tree_digests.get(guild_id) == tree_digest:
+            return SyncResult(commands=[], synced=False)
 
-        if not_synced:
-            await self.pool.execute("DELETE FROM auto_sync WHERE guild_id = $1", guild_id)
-            await self.pool.executemany("INSERT INTO auto_sync (guild_id, payload) VALUES ($1, $2)", payloads)
+        records = await self.pool.fetch("SELECT command_key, digest FROM auto_sync WHERE guild_id = $1", guild_id)
+        saved: Dict[str, str] = {r["command_key"]: r["digest"] for r in records}
 
-            synced = await self.bot.tree.sync(guild=guild)
-            return SyncResult(commands=synced, synced=True)
+        added = current.keys() - saved.keys()
+        removed = saved.keys() - current.keys()
+        changed = {key for key in current.keys() & saved.keys() if current[key][0] != saved[key]}
 
-        else:
+        if not (added or removed or changed):
+            self._synced_tree_digests[guild_id] = tree_digest
             return SyncResult(commands=[], synced=False)
+
+        synced = await self.tree.sync(guild=guild)
+
+        # Only written once discord accepted the new tree, so a failed sync is retried next time.
+        async with self.safe_connection() as conn:
+            if removed:
+                await conn.execute(
+                    "DELETE FROM auto_sync WHERE guild_id = $1 AND command_key = ANY($2::TEXT[])", guild_id, list(removed)
+                )
+
+            upserts = [(guild_id, key, *current[key]) for key in added | changed]
+            if upserts:
+                await conn.executemany(
+                    """
+                    INSERT INTO auto_sync (guild_id, command_key, digest, payload) VALUES ($1, $2, $3, $4)
+                    ON CONFLICT (guild_id, command_key) DO UPDATE SET digest = excluded.digest, payload = excluded.payload
+                    """,
+                    upserts,
+                )
+
+        self._synced_tree_digests[guild_id] = tree_digest
+        return SyncResult(
+            commands=synced,
+            synced=True,
+            added=tuple(sorted(added)),
+            removed=tuple(sorted(removed)),
+            changed=tuple(sorted(changed)),
+        )
@@ -8,137 +8,145 @@
 from __future__ import annotations
 
 import asyncio
-import enum
-import time
 
 from functools import wraps
-from typing import Any, Callable, Coroutine, MutableMapping, TypeVar, Protocol
+from typing import Any, Callable, Coroutine, Hashable, MutableMapping, Optional, Sequence, TypeVar, Protocol
 
 from lru import LRU
 
+from utils.cache import CacheKeys, CacheStats, ExpiringCache, Strategy
+
 R = TypeVar('R')
 
 
 # Can't use ParamSpec due to https://github.com/python/typing/discussions/946
 class CacheProtocol(Protocol[R]):
-    cache: MutableMapping[str, asyncio.Task[R]]
+    cache: MutableMapping[Hashable, asyncio.Task[R]]
 
     def __call__(self, *args: Any, **kwds: Any) -> asyncio.Task[R]: ...
 
-    def get_key(self, *args: Any, **kwargs: Any) -> str: ...
+    def get_key(self, *args: Any, **kwargs: Any) -> Hashable: ...
 
     def invalidate(self, *args: Any, **kwargs: Any) -> bool: ...
 
-    def invalidate_containing(self, key: str) -> None: ...
-
-    def get_stats(self) -> tuple[int, int]: ...
-
-
-class ExpiringCache(dict):
-    def __init__(self, seconds: float):
-        self.__ttl: float = seconds
-        super().__init__()
-
-    def __verify_cache_integrity(self):
-        # Have to do this in two steps...
-        current_time = time.monotonic()
-        to_remove = [k for (k, (_, t)) in self.items() if current_time > (t + self.__ttl)]
-        for k in to_remove:
-            del self[k]
+    def invalidate_where(self, **values: Any) -> int: ...
 
-    def __contains__(self, key: str):
-        self.__verify_cache_integrity()
-        return super().__contains__(key)
+    def invalidate_containing(self, value: Any) -> None: ...
 
-    def __getitem__(self, key: str):
-        self.__verify_cache_integrity()
-        return super().__getitem__(key)
+    def clear(self) -> None: ...
 
-    def __setitem__(self, key: str, value: Any):
-        super().__setitem__(key, (value, time.monotonic()))
-
-
-class Strategy(enum.Enum):
-    lru = 1
-    raw = 2
-    timed = 3
+    def get_stats(self) -> CacheStats: ...
 
 
 def cache(
     maxsize: int = 128,
     strategy: Strategy = Strategy.lru,
     ignore_kwargs: bool = False,
+    *,
+    ttl: Optional[float] = None,
+    key_args: Optional[Sequence[str]] = None,
+    index: Sequence[str] = (),
+    negative_ttl: Optional[float] = None,
 ) -> Callable[[Callable[..., Coroutine[Any, Any, R]]], CacheProtocol[R]]:
+    """Caches the tasks running a coroutine function.
+
+    Concurrent calls with the same key share a single task, so the function runs once
+    per key no matter how many callers miss at the same time. A task that raises or is
+    cancelled is dropped from the cache as soon as it finishes, so the next call retries.
+    With ``negative_ttl``, a task that raised is kept for that many seconds instead, so
+    repeated calls fail fast rather than hammering whatever made it fail.
+    """
+
     def decorator(func: Callable[..., Coroutine[Any, Any, R]]) -> CacheProtocol[R]:
+        keys = CacheKeys(func, key_args, index, ignore_kwargs)
+        stats = CacheStats()
+
         if strategy is Strategy.lru:
             _internal_cache = LRU(maxsize)
-            _stats = _internal_cache.get_stats
         elif strategy is Strategy.raw:
             _internal_cache = {}
-            _stats = lambda: (0, 0)
-        elif strategy is Strategy.timed:
-            _internal_cache = ExpiringCache(maxsize)
-            _stats = lambda: (0, 0)
-
-        def _make_key(args: tuple[Any, ...], kwargs: dict[str, Any]) -> str:
-            # this is a bit of a cluster fuck
-            # we do care what 'self' parameter is when we __repr__ it
-            def _true_repr(o):
-                if o.__class__.__repr__ is object.__repr__:
-                    return f'<{o.__class__.__module__}.{o.__class__.__name__}>'
-                return repr(o)
-
-            key = [f'{func.__module__}.{func.__name__}']
-            key.extend(_true_repr(o) for o in args)
-            if not ignore_kwargs:
-                for k, v in kwargs.items():
-                    # note: this only really works for this use case in particular
-                    # I want to pass asyncpg.Connection objects to the parameters
-                    # however, they use default __repr__ and I do not care what
-                    # connection is passed in, so I needed a bypass.
-                    if k == 'connection' or k == 'pool':
-                        continue
-
-                    key.append(_true_repr(k))
-                    key.append(_true_repr(v))
-
-            return ':'.join(key)
+        elif strategy is Strategy.timed or strategy is Strategy.timed_lru:
+            if ttl is not None:
+                _internal_cache = ExpiringCache(ttl, maxsize=maxsize, lru=strategy is Strategy.timed_lru)
+            elif strategy is Strategy.timed:
+                # maxsize used to be the time to live, keep it that way for existing callers.
+                _internal_cache = ExpiringCache(maxsize)
+            else:
+                raise ValueError('Strategy.timed_lru requires a ttl')
+        else:
+            raise ValueError('Unknown strategy')
+
+        if index and isinstance(_internal_cache, (ExpiringCache, LRU)):
+            _internal_cache.set_callback(lambda key, _: keys.discard(key))
+
+        def _evict_task(key: Hashable, task: asyncio.Task[R]) -> None:
+            # Only if it wasn't replaced in the meantime, e.g. by an invalidation and a new call.
+            try:
+                if _internal_cache[key] is task:
+                    _remove(key)
+            except KeyError:
+                pass
+
+        def _on_done(key: Hashable, task: asyncio.Task[R]) -> None:
+            if task.cancelled():
+                stats.failures += 1
+                _evict_task(key, task)
+            elif task.exception() is not None:
+                stats.failures += 1
+                if negative_ttl is None:
+                    _evict_task(key, task)
+                else:
+                    asyncio.get_running_loop().call_later(negative_ttl, _evict_task, key, task)
 
         @wraps(func)
         def wrapper(*args: Any, **kwargs: Any):
-            key = _make_key(args, kwargs)
+            key = keys.make(args, kwargs)
             try:
                 task = _internal_cache[key]
             except KeyError:
+                stats.misses += 1
                 _internal_cache[key] = task = asyncio.create_task(func(*args, **kwargs))
+                keys.add(key)
+                task.add_done_callback(lambda t: _on_done(key, t))
                 return task
             else:
+                if task.done():
+                    stats.hits += 1
+                else:
+                    stats.coalesced += 1
                 return task
 
-        def _invalidate(*args: Any, **kwargs: Any) -> bool:
+        def _remove(key: Hashable) -> bool:
             try:
-                del _internal_cache[_make_key(args, kwargs)]
+                del _internal_cache[key]
             except KeyError:
                 return False
             else:
+                keys.discard(key)
                 return True
 
-        def _invalidate_containing(key: str) -> None:
-            to_remove = []
-            for k in _internal_cache.keys():
-                if key in k:
-                    to_remove.append(k)
-            for k in to_remove:
-                try:
-                    del _internal_cache[k]
-                except KeyError:
-                    continue
+        def _invalidate(*args: Any, **kwargs: Any) -> bool:
+            return _remove(keys.make(args, kwargs))
+
+        def _invalidate_where(**values: Any) -> int:
+            return sum(_remove(key) for key in keys.find(**values))
+
+        def _invalidate_containing(value: Any) -> None:
+            # Kept for older callers, this looks at every key. Prefer invalidate_where.
+            for key in [k for k in _internal_cache.keys() if value in k]:
+                _remove(key)
+
+        def _clear() -> None:
+            _internal_cache.clear()
+            keys.clear()
 
         wrapper.cache = _internal_cache  # type: ignore
-        wrapper.get_key = lambda *args, **kwargs: _make_key(args, kwargs)  # type: ignore
+        wrapper.get_key = lambda *args, **kwargs: keys.make(args, kwargs)  # type: ignore
         wrapper.invalidate = _invalidate  # type: ignore
-        wrapper.get_stats = _stats  # type: ignore
+        wrapper.invalidate_where = _invalidate_where  # type: ignore
+        wrapper.get_stats = lambda: stats  # type: ignore
         wrapper.invalidate_containing = _invalidate_containing  # type: ignore
+        wrapper.clear = _clear  # type: ignore
         return wrapper  # type: ignore
 
     return decorator
@@ -23,6 +23,7 @@ if TYPE_CHECKING:
     from typing_extensions import TypeAlias
     from bot import DuckBot, DuckContext
     from asyncpg import Record, Connection, Pool
+    from utils import CacheInvalidation
 
 
 async def plonk_iterator(bot: DuckBot, guild: discord.Guild, records: list[Record]) -> AsyncIterator[str]:
@@ -91,7 +92,7 @@ class ResolvedCommandPermissions:
             self.allow: set[str] = set()
             self.deny: set[str] = set()
 
-    def __init__(self, guild_id: int, records: list[tuple[str, int, bool]]):
+    def __init__(self, guild_id: int, records: list[tuple[str, Optional[int], bool]]):
         self.guild_id: int = guild_id
 
         self._lookup: defaultdict[Optional[int], ResolvedCommandPermissions._Entry] = defaultdict(self._Entry)
@@ -187,7 +188,31 @@ class CommandConfig(DuckCog):
     def display_emoji(self) -> discord.PartialEmoji:
         return discord.PartialEmoji(name='\N{GEAR}\ufe0f')
 
-    @cache.cache(strategy=cache.Strategy.lru, maxsize=1024, ignore_kwargs=True)
+    async def cog_load(self) -> None:
+        # Writes from other processes only reach us through the bus.
+        self.bot.invalidation.subscribe('plonks', self._on_invalidation)
+        self.bot.invalidation.subscribe('command_config', self._on_invalidation)
+        self.bot.checks.add('plonk', self.check_plonks, call_once=True)
+        self.bot.checks.add('command_config', self.check_command_config, call_once=False)
+        await super().cog_load()
+
+    async def cog_unload(self) -> None:
+        self.bot.invalidation.unsubscribe('plonks', self._on_invalidation)
+        self.bot.invalidation.unsubscribe('command_config', self._on_invalidation)
+        self.bot.checks.remove('plonk')
+        self.bot.checks.remove('command_config')
+        await super().cog_unload()
+
+    def _on_invalidation(self, event: CacheInvalidation) -> None:
+        if event.everything:
+            self.is_plonked.clear()
+            self.get_command_permissions.clear()
+        elif event.table == 'plonks':
+            self.is_plonked.invalidate_where(guild_id=event.guild_id)
+        else:
+            self.get_command_permissions.invalidate(self, event.guild_id)
+
+    @cache.cache(maxsize=1024, key_args=('guild_id', 'member_id', 'channel', 'check_bypass'), index=('guild_id',))
     async def is_plonked(
         self,
         guild_id: int,
@@ -204,27 +229,20 @@ class CommandConfig(DuckCog):
                 if member is not None and member.guild_permissions.manage_guild:
                     return False
 
-        connection = connection or self.bot.pool
+        config = await self.bot.guild_configs.fetch(guild_id, connection=connection or self.bot.pool)
+        plonks = config.plonks
 
+        if member_id in plonks:
+            return True
         if channel is None:
-            query = "SELECT 1 FROM plonks WHERE guild_id=$1 AND entity_id=$2;"
-            row = await connection.fetchrow(query, guild_id, member_id)
-        else:
-            if isinstance(channel, discord.Thread):
-                query = "SELECT 1 FROM plonks WHERE guild_id=$1 AND entity_id IN ($2, $3, $4);"
-                row = await connection.fetchrow(query, guild_id, member_id, channel.id, channel.parent_id)
-            else:
-                query = "SELECT 1 FROM plonks WHERE guild_id=$1 AND entity_id IN ($2, $3);"
-                row = await connection.fetchrow(query, guild_id, member_id, channel.id)
-
-        return row is not None
-
-    async def bot_check_once(self, ctx: DuckContext) -> bool:
-        if ctx.guild is None:
+            return False
+        if isinstance(channel, discord.Thread) and channel.parent_id in plonks:
             return True
+        return channel.id in plonks
 
-        is_owner = await ctx.bot.is_owner(ctx.author)
-        if is_owner:
+    async def check_plonks(self, ctx: DuckContext) -> bool:
+        """The ``plonk`` stage of :attr:`DuckBot.checks`."""
+        if ctx.guild is None:
             return True
 
         # see if they can bypass:
@@ -240,24 +258,18 @@ class CommandConfig(DuckCog):
             return True
         raise SilentCommandError
 
-    @cache.cache()
+    @cache.cache(key_args=('guild_id',))
     async def get_command_permissions(
         self, guild_id: int, *, connection: Optional[Connection | Pool] = None
     ) -> ResolvedCommandPermissions:
-        connection = connection or self.bot.pool
-        query = "SELECT name, channel_id, whitelist FROM command_config WHERE guild_id=$1;"
-
-        records = await connection.fetch(query, guild_id)
-        return ResolvedCommandPermissions(guild_id, records)
+        config = await self.bot.guild_configs.fetch(guild_id, connection=connection or self.bot.pool)
+        return ResolvedCommandPermissions(guild_id, config.command_config)
 
-    async def bot_check(self, ctx: DuckContext) -> bool:
+    async def check_command_config(self, ctx: DuckContext) -> bool:
+        """The ``command_config`` stage of :attr:`DuckBot.checks`."""
         if ctx.guild is None:
             return True
 
-        is_owner = await ctx.bot.is_owner(ctx.author)
-        if is_owner:
-            return True
-
         resolved = await self.get_command_permissions(ctx.guild.id)
         if not resolved.is_blocked(ctx):
             return True
@@ -277,8 +289,9 @@ class CommandConfig(DuckCog):
                 # do a bulk COPY
                 await con.copy_records_to_table('plonks', columns=('guild_id', 'entity_id'), records=to_insert)
 
-                # invalidate the cache for this guild
-                self.is_plonked.invalidate_containing(f'{ctx.guild.id!r}:')
+        # invalidate the cache for this guild, now that the transaction is committed
+        self.bot.guild_configs.invalidate(ctx.guild.id)
+        self.is_plonked.invalidate_where(guild_id=ctx.guild.id)
 
     async def cog_command_error(self, ctx: DuckContext, error: commands.CommandError):
         if isinstance(error, commands.BadArgument):
@@ -309,7 +322,8 @@ class CommandConfig(DuckCog):
             await self.bot.pool.execute(query, ctx.guild.id, ctx.channel.id)
 
             # invalidate the cache for this guild
-            self.is_plonked.invalidate_containing(f'{ctx.guild.id!r}:')
+            self.bot.guild_configs.invalidate(ctx.guild.id)
+            self.is_plonked.invalidate_where(guild_id=ctx.guild.id)
         else:
             await self._bulk_ignore_entries(ctx, entities)
 
@@ -360,7 +374,8 @@ class CommandConfig(DuckCog):
 
         query = "DELETE FROM plonks WHERE guild_id=$1;"
         await self.bot.pool.execute(query, ctx.guild.id)
-        self.is_plonked.invalidate_containing(f'{ctx.guild.id!r}:')
+        self.bot.guild_configs.invalidate(ctx.guild.id)
+        self.is_plonked.invalidate_where(guild_id=ctx.guild.id)
         await ctx.send('Successfully cleared all ignores.')
 
     @config.group(pass_context=True, invoke_without_command=True, aliases=['unplonk'])
@@ -381,7 +396,8 @@ class CommandConfig(DuckCog):
             entity_ids = [c.id for c in entities]
             await self.bot.pool.execute(query, ctx.guild.id, entity_ids)
 
-        self.is_plonked.invalidate_containing(f'{ctx.guild.id!r}:')
+        self.bot.guild_configs.invalidate(ctx.guild.id)
+        self.is_plonked.invalidate_where(guild_id=ctx.guild.id)
         await ctx.send(ctx.tick(True))
 
     @unignore.command(name='all')
@@ -411,9 +427,6 @@ class CommandConfig(DuckCog):
         *,
         whitelist: bool = True,
     ) -> None:
-        # clear the cache
-        self.get_command_permissions.invalidate(self, guild_id)
-
         if channel_id is None:
             subcheck = 'channel_id IS NULL'
             args = (guild_id, name)
@@ -441,6 +454,10 @@ class CommandConfig(DuckCog):
                     )
                     raise RuntimeError(msg)
 
+        # clear the cache once the new overrides are committed, so they can't be re-cached stale
+        self.bot.guild_configs.invalidate(guild_id)
+        self.get_command_permissions.invalidate(self, guild_id)
+
     @channel.command(name='disable')
     async def channel_disable(self, ctx: DuckContext, *, command: CommandName):
         """Disables a command for this channel."""
@@ -4,7 +4,7 @@ import discord
 from discord import app_commands
 
 from bot import DuckBot
-from utils import DuckCog, UserFriendlyTime, TimerNotFound, shorten, human_timedelta
+from utils import DuckCog, UserFriendlyTime, TimerNotFound, TimerOwner, shorten, human_timedelta
 
 
 class ApplicationReminders(DuckCog):
@@ -45,6 +45,7 @@ class ApplicationReminders(DuckCog):
             what,
             message_id=original.id,
             precise=False,
+            owner=TimerOwner(user_id=interaction.user.id, entity_id=interaction.channel_id),
         )
         await interaction.followup.send(f"Alright, {discord.utils.format_dt(when.dt, 'R')}: {what}")
 
@@ -75,7 +76,7 @@ class ApplicationReminders(DuckCog):
             timers = await self.bot.pool.fetch(
                 """
                 SELECT id, expires, (extra->'args'->2) AS reason FROM timers
-                WHERE event = 'reminder' AND (extra->'args'->0)::bigint = $1
+                WHERE event = 'reminder' AND user_id = $1
                 ORDER BY similarity(id::TEXT, $2) DESC, expires LIMIT 25
             """,
                 interaction.user.id,
@@ -85,7 +86,7 @@ class ApplicationReminders(DuckCog):
             timers = await self.bot.pool.fetch(
                 """
                 SELECT id, expires, (extra->'args'->2) AS reason FROM timers
-                WHERE event = 'reminder' AND (extra->'args'->0)::bigint = $1
+                WHERE event = 'reminder' AND user_id = $1
                 ORDER BY similarity(reason, $2) DESC, expires LIMIT 25
             """,
                 interaction.user.id,
@@ -96,7 +97,7 @@ class ApplicationReminders(DuckCog):
             timers = await self.bot.pool.fetch(
                 """
                 SELECT id, expires, (extra->'args'->2) AS reason FROM timers
-                WHERE event = 'reminder' AND (extra->'args'->0)::bigint = $1
+                WHERE event = 'reminder' AND user_id = $1
                 ORDER BY expires LIMIT 25
             """,
                 interaction.user.id,
@@ -120,7 +121,7 @@ class ApplicationReminders(DuckCog):
         timers = await bot.pool.fetch(
             """
             SELECT id, expires, (extra->'args'->2) AS reason FROM timers
-            WHERE event = 'reminder' AND (extra->'args'->0)::bigint = $1
+            WHERE event = 'reminder' AND user_id = $1
             ORDER BY expires
         """,
             interaction.user.id,
@@ -7,7 +7,7 @@ from typing import Optional, Union
 import discord
 from discord.ext import commands
 
-from utils import DuckCog, group, DuckContext, UserFriendlyTime, TimerNotFound, Timer, shorten
+from utils import DuckCog, group, DuckContext, UserFriendlyTime, TimerNotFound, Timer, TimerOwner, shorten
 
 log = logging.getLogger('DuckBot.cogs.meta.reminders')
 
@@ -38,7 +38,14 @@ class Reminders(DuckCog):
             Times are in UTC.
         """
         await self.bot.create_timer(
-            when.dt, 'reminder', ctx.author.id, ctx.channel.id, when.arg, message_id=ctx.message.id, precise=False
+            when.dt,
+            'reminder',
+            ctx.author.id,
+            ctx.channel.id,
+            when.arg,
+            message_id=ctx.message.id,
+            precise=False,
+            owner=TimerOwner(user_id=ctx.author.id, entity_id=ctx.channel.id),
         )
         await ctx.send(f"Alright {ctx.author.mention}, {discord.utils.format_dt(when.dt, 'R')}: {when.arg}")
 
@@ -71,7 +78,7 @@ class Reminders(DuckCog):
         timers = await self.bot.pool.fetch(
             """
             SELECT id, expires, (extra->'args'->2) AS reason FROM timers
-            WHERE event = 'reminder' AND (extra->'args'->0)::bigint = $1
+            WHERE event = 'reminder' AND user_id = $1
             ORDER BY expires
         """,
             ctx.author.id,
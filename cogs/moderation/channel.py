@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import asyncio
-import contextlib
 import logging
 import math
 from typing import Optional, TypeAlias
@@ -31,7 +30,7 @@ from utils.interactions import (
     bot_has_permissions,
 )
 
-from utils import TimerNotFound, Timer
+from utils import Timer, TimerOwner
 from bot import DuckBot
 
 log = logging.getLogger('DuckBot.moderation.channel')
@@ -98,7 +97,7 @@ class ChannelModeration(DuckCog):
                 else:
                     query = "DELETE FROM blocks WHERE guild_id = $1 AND channel_id = $2 AND user_id = $3"
 
-                async with self.bot.safe_connection() as conn:
+                async with self.bot.safe_connection(transaction=False) as conn:
                     await conn.execute(query, _channel.guild.id, _channel.id, member.id)
 
     async def format_block(self, guild: discord.Guild, user_id: int, channel_id: Optional[int] = None):
@@ -169,7 +168,14 @@ class ChannelModeration(DuckCog):
         reason = f'Tempblock by {ctx.author} (ID: {ctx.author.id}) until {time.dt}'
 
         await self.bot.create_timer(
-            time.dt, 'tempblock', ctx.guild.id, ctx.channel.id, member.id, ctx.author.id, precise=False
+            time.dt,
+            'tempblock',
+            ctx.guild.id,
+            ctx.channel.id,
+            member.id,
+            ctx.author.id,
+            precise=False,
+            owner=TimerOwner(user_id=member.id, guild_id=ctx.guild.id, entity_id=ctx.channel.id),
         )
 
         async with HandleHTTPException(ctx):
@@ -198,12 +204,10 @@ class ChannelModeration(DuckCog):
         db_timers = await self.bot.pool.fetch(
             """
             SELECT id FROM timers WHERE event = 'tempblock'
-            AND (extra->'args'->0)::bigint = $1
-                -- First arg is the guild ID
-            AND (extra->'args'->1)::bigint = $2
-                -- Second arg is the channel ID
-            AND (extra->'args'->2)::bigint = $3
-                -- Third arg is the user ID
+            AND guild_id = $1
+            AND entity_id = $2
+                -- The entity is the channel
+            AND user_id = $3
             ORDER BY expires
         """,
             guild.id,
@@ -211,9 +215,7 @@ class ChannelModeration(DuckCog):
             member.id,
         )
 
-        with contextlib.suppress(TimerNotFound):
-            for timer in db_timers:
-                await self.bot.delete_timer(timer['id'])
+        await self.bot.delete_timers(timer['id'] for timer in db_timers)
 
         # then the actual unblock
         reason = f'Unblock by {ctx.author} (ID: {ctx.author.id})'
@@ -405,12 +407,10 @@ class ChannelModeration(DuckCog):
         await bot.pool.execute(
             """
             DELETE FROM timers WHERE event = 'tempblock'
-            AND (extra->'args'->0)::bigint = $1
-                -- First arg is the guild ID
-            AND (extra->'args'->1)::bigint = $2
-                -- Second arg is the channel ID
-            AND (extra->'args'->2)::bigint = $3
-                -- Third arg is the user ID
+            AND guild_id = $1
+            AND entity_id = $2
+                -- The entity is the channel
+            AND user_id = $3
         """,
             interaction.guild.id,
             interaction.channel.id,
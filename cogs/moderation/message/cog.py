@@ -144,7 +144,8 @@ class MessagePurge(DuckCog):
             search = min(search, 25)
         else:
             search = min(search, 1000)
-        prefixes = tuple(await ctx.bot.get_prefix(ctx.message))
+        # Every prefix and mention form; get_prefix only returns the one the message matched.
+        prefixes = ctx.bot.get_prefix_matcher(ctx.guild).candidates
         check = lambda m: (m.author == ctx.me or m.content.startswith(prefixes)) and not m.mentions
         message = await self.purge(ctx, search, check)
         await ctx.send(message, delete_after=10)
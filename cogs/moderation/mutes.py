@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import asyncio
 import logging
 import datetime
 import itertools
@@ -17,6 +16,7 @@ from utils import (
     MemberNotMuted,
     NoMutedRole,
     Timer,
+    TimerOwner,
     DuckCog,
     DuckContext,
     UserFriendlyTime,
@@ -307,17 +307,11 @@ class TempMute(DuckCog):
             Raised if there's no muted role in the guild.
         """
 
-        async def actual_func(pg_conn: Connection):
-            role_id: int | None = await pg_conn.fetchval('SELECT muted_role_id FROM guilds WHERE guild_id = $1', guild.id)
-            role = guild.get_role(role_id or -1)
-            if not role and fail_if_no_role:
-                raise NoMutedRole()
-            return role
-
-        if not conn:
-            async with self.bot.safe_connection() as conn:
-                return await actual_func(conn)
-        return await actual_func(conn)
+        config = await self.bot.guild_configs.fetch(guild.id, connection=conn or self.bot.pool)
+        role = guild.get_role(config.muted_role_id or -1)
+        if not role and fail_if_no_role:
+            raise NoMutedRole()
+        return role
 
     def _get_missing_permissions_for(self, muted_role: discord.Role, channel: discord.abc.GuildChannel, role_mode: RoleMode):
         """Gets the missing mute role permissions for a channel.
@@ -373,6 +367,7 @@ class TempMute(DuckCog):
 
         if conn:
             await conn.execute('UPDATE guilds SET muted_role_mode = $1 WHERE guild_id = $2', view.value.value, ctx.guild.id)
+            self.bot.guild_configs.invalidate(ctx.guild.id)
 
         return view.value
 
@@ -399,6 +394,7 @@ class TempMute(DuckCog):
                     guild.id,
                     roles=roles_to_restore,
                     done_message=f"Expiring mute set by {ctx.author} (ID: {ctx.author.id}) on {time.dt.strftime('%A, %B %#d %Y at %I:%M %p %Z')}",
+                    owner=TimerOwner(user_id=member.id, guild_id=guild.id),
                 )
 
                 query: str = """
@@ -409,6 +405,9 @@ class TempMute(DuckCog):
 
                 await connection.execute(query, member.id, guild.id)
 
+        # Only once committed, so cache_validation never sees a mute that may still be rolled back.
+        self.bot.guild_configs.add_mute(guild.id, member.id)
+
     @command(name='selfmute', invoke_without_command=True)
     @commands.guild_only()
     @commands.has_guild_permissions(moderate_members=True)
@@ -486,43 +485,47 @@ class TempMute(DuckCog):
         # Fuck me. This whole command. So bad.
         guild = ctx.guild
 
-        async with self.bot.safe_connection() as conn:
-            await conn.execute('UPDATE guilds SET mutes = ARRAY_REMOVE(mutes, $1) WHERE guild_id = $2', member.id, guild.id)
-            # Let's find the timer(s)
-
-            record = await conn.fetchrow(
-                """
-                DELETE FROM timers WHERE event = 'mute'
-                
-                    AND (extra->'args'->0)::bigint = $1 
-                        -- arg at position 0 is the member id
-                        
-                    AND (extra->'args'->1)::bigint = $2
-                        -- arg at position 1 is the guild id
-
-                RETURNING *;
-                """,
-                member.id,
-                guild.id,
-            )
+        try:
+            async with self.bot.safe_connection() as conn:
+                await conn.execute(
+                    'UPDATE guilds SET mutes = ARRAY_REMOVE(mutes, $1) WHERE guild_id = $2', member.id, guild.id
+                )
+                # Right away, so removing the role below isn't mistaken for a manual unmute.
+                self.bot.guild_configs.remove_mute(guild.id, member.id)
+                # Let's find the timer(s)
+
+                record = await conn.fetchrow(
+                    """
+                    DELETE FROM timers WHERE event = 'mute'
+                        AND user_id = $1
+                        AND guild_id = $2
+                    RETURNING *;
+                    """,
+                    member.id,
+                    guild.id,
+                )
 
-            if not record:
-                raise MemberNotMuted(member)
+                if not record:
+                    raise MemberNotMuted(member)
 
-            timer = Timer(record=record)
+                timer = Timer(record=record)
 
-            async def message_sender(message: str, *fmt_args: str):
-                await ctx.send(message % fmt_args)
+                async def message_sender(message: str, *fmt_args: str):
+                    await ctx.send(message % fmt_args)
 
-            await self.expire_mute(
-                *timer.args,
-                **timer.kwargs,
-                info_message_hook=message_sender,
-                user_facing_message=True,
-                conn=conn,
-            )
+                await self.expire_mute(
+                    *timer.args,
+                    **timer.kwargs,
+                    info_message_hook=message_sender,
+                    user_facing_message=True,
+                    conn=conn,
+                )
 
-            return await ctx.send(f"{mdr(member, escape=True)} has been unmuted.")
+                return await ctx.send(f"{mdr(member, escape=True)} has been unmuted.")
+        except BaseException:
+            # The transaction was rolled back, so the mute removed from memory above is back in the database.
+            self.bot.guild_configs.invalidate(guild.id)
+            raise
 
     @command(name='unmute')
     @commands.bot_has_guild_permissions(manage_roles=True)
@@ -551,37 +554,32 @@ class TempMute(DuckCog):
         after: discord.Member
             The member after the update.
         """
-        await asyncio.sleep(1)
         guild = before.guild
-        data = await self.bot.pool.fetchrow("SELECT muted_role_id, mutes FROM guilds WHERE guild_id = $1;", guild.id)
+        # Served from memory, this runs for every nickname, avatar and role change.
+        config = await self.bot.guild_configs.fetch(guild.id, connection=self.bot.pool)
 
-        if not data:
-            return
-
-        role_id: int = data['muted_role_id']
-        mutes: list[int] = data['mutes']
-
-        if after.id not in mutes:
-            # The user was not muted through DuckBot.
+        role_id = config.muted_role_id
+        if role_id is None:
             return
 
         if not before.get_role(role_id) or after.get_role(role_id):
             # The muted role was not removed from the user.
             return
 
+        if after.id not in config.mutes:
+            # The user was not muted through DuckBot.
+            return
+
         query = """
             DELETE FROM timers WHERE event = 'mute'
-            
-                AND (extra->'args'->0)::bigint = $1 
-                    -- arg at position 0 is the member id
-                    
-                AND (extra->'args'->1)::bigint = $2;
-                    -- arg at position 1 is the guild id
+                AND user_id = $1
+                AND guild_id = $2;
         """
         await self.bot.pool.execute(query, after.id, guild.id)
         await self.bot.pool.execute(
             'UPDATE guilds SET mutes = array_remove(mutes, $1) WHERE guild_id = $2;', after.id, guild.id
         )
+        self.bot.guild_configs.remove_mute(guild.id, after.id)
         # TODO: Maybe hook into a potential mod-log in the future to inform about this.
 
     @commands.Cog.listener('on_mute_timer_complete')
@@ -631,6 +629,8 @@ class TempMute(DuckCog):
             member_id,
             guild_id,
         )
+        # Right away, so restoring the roles below isn't mistaken for a manual unmute.
+        self.bot.guild_configs.remove_mute(guild_id, member_id)
 
         if not mute_role_id:
             if user_facing_message:
@@ -789,6 +789,7 @@ class TempMute(DuckCog):
                 SET muted_role_id = $2, muted_role_mode = $3
             """
             await self.bot.pool.execute(query, ctx.guild.id, role.id, role_mode.value)
+            self.bot.guild_configs.invalidate(ctx.guild.id)
 
             total = success + partial + skipped + failed
             message = (
@@ -852,38 +853,32 @@ class TempMute(DuckCog):
         """Unbinds the muted role and cancels all mute timers."""
         await self._get_muted_role(ctx.guild)  # Raises NoMutedRole if not found.
 
-        async with self.bot.safe_connection() as conn:
-            timers = await conn.fetch(
-                """
-                SELECT * FROM timers WHERE event = 'mute'
-                                
-                    AND (extra->'args'->1)::bigint = $1;
-                        -- arg at position 1 is the guild id
-                """,
-                ctx.guild.id,
-            )
+        timers = await self.bot.pool.fetch(
+            """
+            SELECT id FROM timers WHERE event = 'mute'
+                AND guild_id = $1;
+            """,
+            ctx.guild.id,
+        )
 
-            spec = plural(len(timers))
-            if not await ctx.confirm(
-                "**Are you sure you want to unbind the muted role?**"
-                "\nThis will cancel all timers for currently-muted members, but it will **not** remove the muted role from them. "
-                "\nIt will not delete the role either, or change its permissions in the channels."
-                f"\n:warning: this cannot be undone! (There {spec:is|are} {len(timers)} active {spec:timer})",
-                timeout=60,
-                silent_on_timeout=True,
-            ):
-                return await ctx.send('Cancelled.')
+        # No connection is held while waiting for the confirmation. Mute timers created
+        # meanwhile are left alone, they are ignored once the guild has no muted role.
+        spec = plural(len(timers))
+        if not await ctx.confirm(
+            "**Are you sure you want to unbind the muted role?**"
+            "\nThis will cancel all timers for currently-muted members, but it will **not** remove the muted role from them. "
+            "\nIt will not delete the role either, or change its permissions in the channels."
+            f"\n:warning: this cannot be undone! (There {spec:is|are} {len(timers)} active {spec:timer})",
+            timeout=60,
+            silent_on_timeout=True,
+        ):
+            return await ctx.send('Cancelled.')
 
+        async with self.bot.safe_connection() as conn:
+            await self.bot.delete_timers((timer['id'] for timer in timers), connection=conn)
             await conn.execute(
-                """
-                DELETE FROM timers WHERE event = 'mute'
-
-                AND (extra->'args'->1)::bigint = $1;
-                    -- arg at position 1 is the guild id
-                
-                UPDATE guilds SET muted_role_id = NULL, muted = '{}'::BIGINT[] WHERE guild_id = $1;
-                """,
-                ctx.guild.id,
+                "UPDATE guilds SET muted_role_id = NULL, mutes = '{}'::BIGINT[] WHERE guild_id = $1", ctx.guild.id
             )
 
-            await ctx.send('Ok, this server no longer has a muted role.')
+        self.bot.guild_configs.unbind_muted_role(ctx.guild.id)
+        await ctx.send('Ok, this server no longer has a muted role.')
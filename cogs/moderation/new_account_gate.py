@@ -28,6 +28,7 @@ class NewAccountGate(DuckCog):
         """
         if not time:
             await self.bot.pool.execute('UPDATE GUILDS SET min_join_age = NULL WHERE guild_id = $1', ctx.guild.id)
+            self.bot.guild_configs.invalidate(ctx.guild.id)
             await ctx.send('Unset minimum account age')
         else:
             seconds = (time.dt - ctx.message.created_at).total_seconds()
@@ -37,6 +38,7 @@ class NewAccountGate(DuckCog):
                 ctx.guild.id,
                 seconds,
             )
+            self.bot.guild_configs.invalidate(ctx.guild.id)
             await ctx.send(f'I will now kick joining accounts that are less than **{human_timedelta(time.dt)}** old.')
 
     @commands.Cog.listener('on_member_join')
@@ -48,9 +50,8 @@ class NewAccountGate(DuckCog):
         if not member.guild.me.guild_permissions.kick_members:
             return
 
-        threshold_seconds: int | None = await self.bot.pool.fetchval(
-            'SELECT min_join_age FROM guilds WHERE guild_id = $1', member.guild.id
-        )
+        config = await self.bot.guild_configs.fetch(member.guild.id, connection=self.bot.pool)
+        threshold_seconds = config.min_join_age
         if not threshold_seconds:
             return
         account_age_seconds = (discord.utils.utcnow() - member.created_at).total_seconds()
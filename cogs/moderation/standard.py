@@ -19,6 +19,7 @@ from utils import (
     UserFriendlyTime,
     human_timedelta,
     Timer,
+    TimerOwner,
     format_date,
 )
 from utils.checks import hybrid_permissions_check
@@ -206,14 +207,22 @@ class StandardModeration(DuckCog):
             """
             DELETE FROM timers
             WHERE event = 'ban'
-            AND (extra->'args'->0) = $1
-            AND (extra->'args'->1) = $2
+            AND user_id = $1
+            AND guild_id = $2
         """,
             member.id,
             ctx.guild.id,
         )
 
-        await self.bot.create_timer(when.dt, 'ban', member.id, ctx.guild.id, ctx.author.id, precise=False)
+        await self.bot.create_timer(
+            when.dt,
+            'ban',
+            member.id,
+            ctx.guild.id,
+            ctx.author.id,
+            precise=False,
+            owner=TimerOwner(user_id=member.id, guild_id=ctx.guild.id),
+        )
 
         await ctx.send(f"Banned **{mdr(member)}** for {human_timedelta(when.dt)}.")
 
@@ -9,6 +9,7 @@ from .eval import Eval
 from .sql import SQLCommands
 from .update import ExtensionsManager
 from .news import NewsManagement
+from .diagnostics import Diagnostics
 
 
 class Owner(
@@ -19,6 +20,7 @@ class Owner(
     SQLCommands,
     ExtensionsManager,
     NewsManagement,
+    Diagnostics,
     command_attrs=dict(hidden=True),
     emoji="<:blushycat:913554213555028069>",
     brief="Restricted! hah.",
@@ -40,7 +42,7 @@ class Owner(
 
     async def cog_check(self, ctx: DuckContext) -> bool:
         """Check if the user is a bot owner."""
-        if await ctx.bot.is_owner(ctx.author):
+        if ctx.is_owner:
             return True
         raise NotOwner
 
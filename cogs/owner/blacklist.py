@@ -180,3 +180,12 @@ class BlackListManagement(DuckCog):
             f"📋 **|** Blacklisted entities - Showing `{len(result)}/{count}` entries - Page `{page}/{pages}`:\n{formatted}"
         )
         await ctx.send(message)
+
+    @blacklist.command(name='memory', aliases=['mem'])
+    async def blacklist_memory(self, ctx: DuckContext) -> None:
+        """Shows how much memory the blacklist caches use."""
+        usage = self.bot.blacklist.memory_usage()
+        rows = [f'{name:<13} {entries:>8} entries {size / 1024:>9.1f} KiB' for name, (entries, size) in usage.items()]
+        total = sum(size for _, size in usage.values())
+        rows.append(f'{"total":<13} {sum(entries for entries, _ in usage.values()):>8} entries {total / 1024:>9.1f} KiB')
+        await ctx.send('```\n' + '\n'.join(rows) + '\n```')
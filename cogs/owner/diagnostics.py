@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import io
+from typing import Literal
+
+import discord
+from discord import File
+from tabulate import tabulate
+
+from utils import DuckCog, DuckContext, group
+
+
+def _ms(seconds: float) -> str:
+    return f'{seconds * 1000:.2f}'
+
+
+class Diagnostics(DuckCog):
+    async def _send_table(self, ctx: DuckContext, table: str, footer: str) -> None:
+        fmt = f'```\n{table}\n```{footer}'
+        if len(fmt) > 2000:
+            fp = io.BytesIO(table.encode('utf-8'))
+            await ctx.send(footer, file=File(fp, 'output.txt'))
+        else:
+            await ctx.send(fmt)
+
+    @group()
+    async def queries(
+        self, ctx: DuckContext, sort: Literal['total', 'mean', 'max', 'count', 'p95'] = 'total', amount: int = 15
+    ):
+        """Shows the slowest queries since startup.
+
+        Parameters
+        ----------
+        sort: str
+            What to sort the queries by. One of total, mean, max, count or p95.
+        amount: int
+            How many queries to show.
+        """
+        tracker = ctx.bot.query_stats
+        keys = {
+            'total': lambda h: h.total,
+            'mean': lambda h: h.mean,
+            'max': lambda h: h.max,
+            'count': lambda h: h.count,
+            'p95': lambda h: h.percentile(95),
+        }
+        key = keys[sort]
+        ranked = sorted(tracker.queries.items(), key=lambda item: key(item[1]), reverse=True)[:amount]
+        if not ranked:
+            return await ctx.send('No queries recorded yet.')
+
+        rows = [(query[:60], h.count, _ms(h.total), _ms(h.mean), _ms(h.percentile(95)), _ms(h.max)) for query, h in ranked]
+        table = tabulate(rows, headers=('query', 'calls', 'total ms', 'mean ms', 'p95 ms', 'max ms'), tablefmt='orgtbl')
+
+        acquire = tracker.acquire
+        footer = (
+            f'*Pool acquire: {acquire.count} waits, mean {_ms(acquire.mean)}ms, '
+            f'p95 {_ms(acquire.percentile(95))}ms, max {_ms(acquire.max)}ms*'
+        )
+        await self._send_table(ctx, table, footer)
+
+    @queries.command(name='slow')
+    async def queries_slow(self, ctx: DuckContext):
+        """Shows the most recent slow queries and where they were run from."""
+        tracker = ctx.bot.query_stats
+        if not tracker.slow_queries:
+            return await ctx.send(f'No queries took longer than {_ms(tracker.slow_threshold)}ms.')
+
+        rows = [
+            (slow.when.strftime('%H:%M:%S'), _ms(slow.duration), slow.call_site, slow.query[:60])
+            for slow in reversed(tracker.slow_queries)
+        ]
+        table = tabulate(rows, headers=('when', 'ms', 'call site', 'query'), tablefmt='orgtbl')
+        await self._send_table(ctx, table, f'*Threshold: {_ms(tracker.slow_threshold)}ms*')
+
+    @queries.command(name='threshold')
+    async def queries_threshold(self, ctx: DuckContext, milliseconds: float):
+        """Sets the duration after which a query is logged as slow.
+
+        Parameters
+        ----------
+        milliseconds: float
+            The new threshold, in milliseconds.
+        """
+        ctx.bot.query_stats.slow_threshold = milliseconds / 1000
+        await ctx.send(f'Queries slower than {milliseconds:.2f}ms will now be logged.')
+
+    @queries.command(name='prepared')
+    async def queries_prepared(self, ctx: DuckContext):
+        """Shows the statistics of the prepared statements."""
+        rows = [
+            (name, stats.count, _ms(stats.total), _ms(stats.mean), _ms(stats.max))
+            for name, stats in sorted(ctx.bot.queries.stats.items(), key=lambda item: item[1].total, reverse=True)
+        ]
+        table = tabulate(rows, headers=('statement', 'calls', 'total ms', 'mean ms', 'max ms'), tablefmt='orgtbl')
+
+        pool = ctx.bot.pool_stats
+        footer = (
+            f'*safe_connection: {pool.transactions} transactions ({pool.transactions_per_second:.2f}/s, '
+            f'{pool.readonly} read-only), '
+            f'{pool.autocommit} without one, held for {_ms(pool.held.mean)}ms on average*'
+        )
+        await self._send_table(ctx, table, footer)
+
+    @queries.command(name='reset')
+    async def queries_reset(self, ctx: DuckContext):
+        """Resets all the recorded query statistics."""
+        ctx.bot.query_stats.reset()
+        ctx.bot.pool_stats.reset()
+        for stats in ctx.bot.queries.stats.values():
+            stats.reset()
+        await ctx.send(ctx.tick(True))
+
+    @group(name='checks')
+    async def global_checks(self, ctx: DuckContext):
+        """Shows how long each stage of the global checks takes and how often it rejects a command."""
+        stages = list(ctx.bot.checks)
+        rows = [
+            (
+                stage.name,
+                {True: 'once', False: 'every', None: 'both'}[stage.call_once],
+                stage.timings.count,
+                stage.rejections,
+                stage.bypasses,
+                _ms(stage.timings.total),
+                _ms(stage.timings.mean),
+                _ms(stage.timings.percentile(95)),
+                _ms(stage.timings.max),
+            )
+            for stage in stages
+        ]
+        table = tabulate(
+            rows,
+            headers=('stage', 'when', 'calls', 'rejected', 'bypassed', 'total ms', 'mean ms', 'p95 ms', 'max ms'),
+            tablefmt='orgtbl',
+        )
+        total = sum(stage.timings.total for stage in stages)
+        abuse = ctx.bot.abuse
+        footer = (
+            f'*Stages run in this order. {_ms(total)}ms spent in checks in total.*\n'
+            f'*Rate limit: {abuse.allowed} allowed, {abuse.limited} over the limit, {abuse.blocked} users auto-blocked.*'
+        )
+        await self._send_table(ctx, table, footer)
+
+    @global_checks.command(name='reset')
+    async def checks_reset(self, ctx: DuckContext):
+        """Resets the recorded timings and counters of the global checks."""
+        ctx.bot.checks.reset()
+        await ctx.send(ctx.tick(True))
+
+    @group(name='timers')
+    async def timers(self, ctx: DuckContext):
+        """Shows how fast expired timers are claimed and dispatched."""
+        stats = ctx.bot.timer_stats
+        rows = [
+            ('claim', stats.claim.count, _ms(stats.claim.total), _ms(stats.claim.mean), '-', _ms(stats.claim.max)),
+            *(
+                (name, h.count, _ms(h.total), _ms(h.mean), _ms(h.percentile(95)), _ms(h.max))
+                for name, h in (('dispatch', stats.dispatch), ('lag', stats.lag))
+            ),
+        ]
+        table = tabulate(rows, headers=('', 'count', 'total ms', 'mean ms', 'p95 ms', 'max ms'), tablefmt='orgtbl')
+        footer = (
+            f'*{stats.claimed} timers claimed ({stats.claimed_per_second:.2f}/s) in {stats.claims} statements, '
+            f'{stats.dispatched} dispatched ({stats.dispatched_per_second:.2f}/s), {len(ctx.bot._timer_heap)} in memory, '
+            f'{stats.notified} queued from notifications, {stats.expired_leases} outlived their lease.*'
+        )
+        await self._send_table(ctx, table, footer)
+
+    @timers.command(name='reset')
+    async def timers_reset(self, ctx: DuckContext):
+        """Resets the recorded timer statistics."""
+        ctx.bot.timer_stats.reset()
+        await ctx.send(ctx.tick(True))
+
+    @group(name='loop')
+    async def event_loop(self, ctx: DuckContext, amount: int = 15):
+        """Shows the event loop's lag, the slowest event handlers and the shard latencies.
+
+        Parameters
+        ----------
+        amount: int
+            How many events to show.
+        """
+        monitor = ctx.bot.loop_monitor
+        ranked = sorted(monitor.events.items(), key=lambda item: item[1].total, reverse=True)[:amount]
+        rows = [(name, h.count, _ms(h.total), _ms(h.mean), _ms(h.percentile(95)), _ms(h.max)) for name, h in ranked]
+        table = tabulate(rows, headers=('event', 'calls', 'total ms', 'mean ms', 'p95 ms', 'max ms'), tablefmt='orgtbl')
+
+        lag = monitor.lag
+        shards = ', '.join(
+            f'#{shard_id}: {_ms(latency)}ms' if latency == latency else f'#{shard_id}: N/A'
+            for shard_id, latency in ctx.bot.latencies
+        )
+        footer = (
+            f'*Loop lag: mean {_ms(lag.mean)}ms, p99 {_ms(lag.percentile(99))}ms, max {_ms(lag.max)}ms. '
+            f'{len(monitor.stalls)} stall(s) recorded.*\n*Shards: {shards}*'
+        )
+        await self._send_table(ctx, table, footer)
+
+    @event_loop.command(name='stalls')
+    async def loop_stalls(self, ctx: DuckContext):
+        """Shows the stack of the most recent event loop stall."""
+        stalls = ctx.bot.loop_monitor.stalls
+        if not stalls:
+            return await ctx.send('The event loop has not stalled.')
+
+        stall = stalls[-1]
+        footer = (
+            f'*Blocked for {stall.duration:.2f}s at {discord.utils.format_dt(stall.when, "T")} ({len(stalls)} recorded)*'
+        )
+        await self._send_table(ctx, stall.stack, footer)
+
+    @event_loop.command(name='reset')
+    async def loop_reset(self, ctx: DuckContext):
+        """Resets the recorded loop lag, event timings and stalls."""
+        ctx.bot.loop_monitor.reset()
+        await ctx.send(ctx.tick(True))
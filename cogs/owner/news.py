@@ -17,7 +17,7 @@ class NewsManagement(DuckCog):
         content: :class:`str`
             The content of the news item (up to 1024 characters)
         """
-        async with ctx.bot.safe_connection() as conn:
+        async with ctx.bot.safe_connection(transaction=False) as conn:
             await conn.execute(
                 "INSERT INTO news (news_id, title, content, author_id) VALUES ($1, $2, $3, $4)",
                 ctx.message.id,
@@ -38,7 +38,7 @@ class NewsManagement(DuckCog):
         news_id: :class:`int`
             The snowflake ID of the news item to remove
         """
-        async with ctx.bot.safe_connection() as conn:
+        async with ctx.bot.safe_connection(transaction=False) as conn:
             query = """
             WITH deleted AS (
                 DELETE FROM news WHERE news_id = $1 RETURNING *
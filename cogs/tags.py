@@ -339,36 +339,8 @@ class Tags(DuckCog, emoji='🏷️', brief='Tags: A way to store information for
             The tag.
         """
         connection = connection or self.bot.pool
-        if find_global is not True:
-            query = """
-                SELECT id, name, content, embed, owner_id, guild_id FROM tags 
-                WHERE (LOWER(name) = LOWER($1::TEXT) and (guild_id = $2) and (content is not null)) 
-                OR (id = (
-                    SELECT points_to FROM tags 
-                        WHERE LOWER(name) = LOWER($1::TEXT) 
-                        AND guild_id = $2 
-                        AND points_to IS NOT NULL
-                    ))
-                LIMIT 1 -- just in case
-            """
-        else:
-            query = """
-                SELECT id, name, content, embed, owner_id, guild_id FROM tags 
-                WHERE (LOWER(name) = LOWER($1::TEXT) and (guild_id IS NULL or guild_id = $2) and (content is not null))
-                OR (id = (
-                    SELECT points_to FROM tags 
-                        WHERE LOWER(name) = LOWER($1::TEXT)
-                        AND (guild_id IS NULL OR guild_id = $2) 
-                        AND points_to IS NOT NULL
-                    ))
-                ORDER BY guild_id
-                    -- if global, we want local tags to 
-                    -- take priority.
-                LIMIT 1
-                    -- when there are global and local
-            """
-
-        fetched_tag = await connection.fetchrow(query, tag, guild_id)
+        name = 'tags.get_global' if find_global is True else 'tags.get'
+        fetched_tag = await self.bot.queries.fetchrow(name, connection, tag, guild_id)
         if fetched_tag is None:
             if find_global:
                 query = """
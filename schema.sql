@@ -27,6 +27,50 @@ CREATE TABLE IF NOT EXISTS timers (
     expires TIMESTAMP
 );
 
+-- Who or what a timer is about, see utils.bases.timer.TimerOwner.
+ALTER TABLE timers ADD COLUMN IF NOT EXISTS user_id BIGINT;
+ALTER TABLE timers ADD COLUMN IF NOT EXISTS guild_id BIGINT;
+ALTER TABLE timers ADD COLUMN IF NOT EXISTS entity_id BIGINT;
+
+-- Older timers only have their owners in extra.
+UPDATE timers SET user_id = (extra->'args'->>0)::BIGINT, entity_id = (extra->'args'->>1)::BIGINT
+    WHERE event = 'reminder' AND user_id IS NULL;
+UPDATE timers SET user_id = (extra->'args'->>0)::BIGINT, guild_id = (extra->'args'->>1)::BIGINT
+    WHERE event IN ('mute', 'ban') AND user_id IS NULL;
+UPDATE timers SET guild_id = (extra->'args'->>0)::BIGINT, entity_id = (extra->'args'->>1)::BIGINT,
+                  user_id = (extra->'args'->>2)::BIGINT
+    WHERE event = 'tempblock' AND user_id IS NULL;
+UPDATE timers SET entity_id = (extra->'kwargs'->>'entity_id')::BIGINT, guild_id = (extra->'kwargs'->>'guild_id')::BIGINT
+    WHERE event = 'blacklist' AND entity_id IS NULL;
+
+CREATE INDEX IF NOT EXISTS timers_expires_idx ON timers (expires);
+CREATE INDEX IF NOT EXISTS timers_event_user_id_idx ON timers (event, user_id);
+CREATE INDEX IF NOT EXISTS timers_event_guild_id_idx ON timers (event, guild_id);
+CREATE INDEX IF NOT EXISTS timers_event_entity_id_idx ON timers (event, entity_id);
+
+-- The process running a timer, and until when it has to, see utils.bases.timer.TimerManager.
+ALTER TABLE timers ADD COLUMN IF NOT EXISTS claimed_by TEXT;
+ALTER TABLE timers ADD COLUMN IF NOT EXISTS lease_until TIMESTAMP;
+CREATE INDEX IF NOT EXISTS timers_lease_until_idx ON timers (lease_until) WHERE lease_until IS NOT NULL;
+
+-- Wakes up the timer dispatch of every process when a timer is created.
+-- expires is sent as seconds since the epoch, timers are stored in UTC.
+CREATE OR REPLACE FUNCTION notify_timer_created()
+  RETURNS TRIGGER AS $$
+  BEGIN
+    PERFORM pg_notify('timer_created',
+      JSON_BUILD_OBJECT('id', NEW.id, 'expires', EXTRACT(EPOCH FROM NEW.expires))::TEXT);
+    RETURN NULL;
+  END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS timers_created_trigger ON timers;
+CREATE TRIGGER timers_created_trigger
+  AFTER INSERT
+  ON timers
+  FOR EACH ROW
+  EXECUTE PROCEDURE notify_timer_created();
+
 CREATE TABLE IF NOT EXISTS blocks (
     guild_id BIGINT,
     channel_id BIGINT,
@@ -68,7 +112,11 @@ CREATE OR REPLACE FUNCTION update_prefixes_cache()
   RETURNS TRIGGER AS $$
   BEGIN
     IF TG_OP = 'DELETE' THEN
-      PERFORM pg_notify('delete_prefixes', NEW.guild_id::TEXT);
+      PERFORM pg_notify('delete_prefixes',
+        JSON_BUILD_OBJECT(
+              'guild_id', OLD.guild_id
+            )::TEXT
+          );
     ELSIF TG_OP = 'UPDATE' AND OLD.prefixes <> NEW.prefixes THEN
       PERFORM pg_notify('update_prefixes',
         JSON_BUILD_OBJECT(
@@ -94,6 +142,81 @@ CREATE TRIGGER update_prefixes_cache_trigger
   FOR EACH ROW
   EXECUTE PROCEDURE update_prefixes_cache();
 
+-- Generic cache invalidation, routed by DuckBot's InvalidationBus.
+-- The payload is {"table", "op", "guild_id", "key"}, where key is the
+-- column named by the trigger's argument. Updates that move a row to
+-- another guild or key notify for both the old and the new row.
+CREATE OR REPLACE FUNCTION notify_cache_invalidation()
+  RETURNS TRIGGER AS $$
+  DECLARE
+    old_row JSONB;
+    new_row JSONB;
+  BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+      PERFORM pg_notify('cache_invalidation',
+        JSON_BUILD_OBJECT('table', TG_TABLE_NAME, 'op', TG_OP, 'guild_id', NULL, 'key', NULL)::TEXT);
+      RETURN NULL;
+    END IF;
+
+    IF TG_OP <> 'INSERT' THEN
+      old_row := TO_JSONB(OLD);
+      PERFORM pg_notify('cache_invalidation',
+        JSON_BUILD_OBJECT(
+              'table', TG_TABLE_NAME,
+              'op', TG_OP,
+              'guild_id', old_row->'guild_id',
+              'key', old_row->TG_ARGV[0]
+            )::TEXT
+          );
+    END IF;
+
+    IF TG_OP <> 'DELETE' THEN
+      new_row := TO_JSONB(NEW);
+      IF old_row IS NULL
+         OR old_row->'guild_id' IS DISTINCT FROM new_row->'guild_id'
+         OR old_row->TG_ARGV[0] IS DISTINCT FROM new_row->TG_ARGV[0] THEN
+        PERFORM pg_notify('cache_invalidation',
+          JSON_BUILD_OBJECT(
+                'table', TG_TABLE_NAME,
+                'op', TG_OP,
+                'guild_id', new_row->'guild_id',
+                'key', new_row->TG_ARGV[0]
+              )::TEXT
+            );
+      END IF;
+    END IF;
+    RETURN NULL;
+  END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS guilds_cache_invalidation_trigger ON guilds;
+CREATE TRIGGER guilds_cache_invalidation_trigger
+  AFTER INSERT OR UPDATE OR DELETE
+  ON guilds
+  FOR EACH ROW
+  EXECUTE PROCEDURE notify_cache_invalidation('guild_id');
+
+DROP TRIGGER IF EXISTS guilds_cache_truncate_trigger ON guilds;
+CREATE TRIGGER guilds_cache_truncate_trigger
+  AFTER TRUNCATE
+  ON guilds
+  FOR EACH STATEMENT
+  EXECUTE PROCEDURE notify_cache_invalidation();
+
+DROP TRIGGER IF EXISTS blacklist_cache_invalidation_trigger ON blacklist;
+CREATE TRIGGER blacklist_cache_invalidation_trigger
+  AFTER INSERT OR UPDATE OR DELETE
+  ON blacklist
+  FOR EACH ROW
+  EXECUTE PROCEDURE notify_cache_invalidation('entity_id');
+
+DROP TRIGGER IF EXISTS blacklist_cache_truncate_trigger ON blacklist;
+CREATE TRIGGER blacklist_cache_truncate_trigger
+  AFTER TRUNCATE
+  ON blacklist
+  FOR EACH STATEMENT
+  EXECUTE PROCEDURE notify_cache_invalidation();
+
 -- For tags.
 CREATE TABLE IF NOT EXISTS tags (
     id BIGSERIAL,
@@ -131,11 +254,34 @@ CREATE TABLE commands (
         NOT NULL DEFAULT NOW()
 );
 
-CREATE TABLE auto_sync (
-    guild_id BIGINT,
+-- How many times each user was auto-blacklisted for spamming commands.
+CREATE TABLE IF NOT EXISTS abuse_strikes (
+    user_id BIGINT PRIMARY KEY,
+    strikes INTEGER NOT NULL DEFAULT 1,
+    last_strike TIMESTAMP WITH TIME ZONE
+        NOT NULL DEFAULT NOW()
+);
+
+-- Older versions stored every strike as an AUTO-BOT-BAN row of the commands table.
+INSERT INTO abuse_strikes (user_id, strikes, last_strike)
+    SELECT user_id, COUNT(*), MAX(timestamp) FROM commands WHERE command = 'AUTO-BOT-BAN' GROUP BY user_id
+ON CONFLICT (user_id) DO NOTHING;
+DELETE FROM commands WHERE command = 'AUTO-BOT-BAN';
+
+CREATE TABLE IF NOT EXISTS auto_sync (
+    guild_id BIGINT NOT NULL,
+    command_key TEXT NOT NULL,
+    digest TEXT NOT NULL,
     payload JSONB
 );
 
+-- Older versions only stored the payload. Those rows
+-- can't be diffed, so they're dropped and re-synced once.
+ALTER TABLE auto_sync ADD COLUMN IF NOT EXISTS command_key TEXT;
+ALTER TABLE auto_sync ADD COLUMN IF NOT EXISTS digest TEXT;
+DELETE FROM auto_sync WHERE command_key IS NULL OR digest IS NULL;
+CREATE UNIQUE INDEX IF NOT EXISTS auto_sync_guild_key_idx ON auto_sync (guild_id, command_key);
+
 
 CREATE TABLE user_settings (
     user_id BIGINT PRIMARY KEY,
@@ -159,6 +305,20 @@ CREATE TABLE IF NOT EXISTS plonks (
 CREATE INDEX IF NOT EXISTS plonks_guild_id_idx ON plonks (guild_id);
 CREATE INDEX IF NOT EXISTS plonks_entity_id_idx ON plonks (entity_id);
 
+DROP TRIGGER IF EXISTS plonks_cache_invalidation_trigger ON plonks;
+CREATE TRIGGER plonks_cache_invalidation_trigger
+  AFTER INSERT OR UPDATE OR DELETE
+  ON plonks
+  FOR EACH ROW
+  EXECUTE PROCEDURE notify_cache_invalidation('entity_id');
+
+DROP TRIGGER IF EXISTS plonks_cache_truncate_trigger ON plonks;
+CREATE TRIGGER plonks_cache_truncate_trigger
+  AFTER TRUNCATE
+  ON plonks
+  FOR EACH STATEMENT
+  EXECUTE PROCEDURE notify_cache_invalidation();
+
 CREATE TABLE IF NOT EXISTS command_config (
     id SERIAL PRIMARY KEY,
     guild_id BIGINT,
@@ -168,4 +328,18 @@ CREATE TABLE IF NOT EXISTS command_config (
 );
 
 CREATE INDEX IF NOT EXISTS command_config_guild_id_idx ON command_config (guild_id);
+
+DROP TRIGGER IF EXISTS command_config_cache_invalidation_trigger ON command_config;
+CREATE TRIGGER command_config_cache_invalidation_trigger
+  AFTER INSERT OR UPDATE OR DELETE
+  ON command_config
+  FOR EACH ROW
+  EXECUTE PROCEDURE notify_cache_invalidation('name');
+
+DROP TRIGGER IF EXISTS command_config_cache_truncate_trigger ON command_config;
+CREATE TRIGGER command_config_cache_truncate_trigger
+  AFTER TRUNCATE
+  ON command_config
+  FOR EACH STATEMENT
+  EXECUTE PROCEDURE notify_cache_invalidation();
 -- End
\ No newline at end of file
@@ -1,10 +1,20 @@
+from utils.bases.abuse import *
 from utils.bases.base_cog import *
 from utils.bases.blacklist import *
+from utils.bases.check_pipeline import *
 from utils.bases.command import *
 from utils.bases.context import *
+from utils.bases.database import *
 from utils.bases.errors import *
+from utils.bases.extensions import *
+from utils.bases.guild_config import *
+from utils.bases.invalidation import *
 from utils.bases.ipc_base import *
+from utils.bases.metrics import *
+from utils.bases.monitor import *
+from utils.bases.prefixes import *
 from utils.bases.timer import *
+from utils.bases.usage import *
 from .types import constants as constants
 
 from . import interactions as interactions
@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import datetime
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Dict, Tuple, Union
+
+import discord
+from lru import LRU
+
+if TYPE_CHECKING:
+    from bot import DuckBot
+
+    from .context import DuckContext
+
+log = logging.getLogger('DuckBot.utils.abuse')
+
+__all__: Tuple[str, ...] = ('TokenBucket', 'AbuseDetector')
+
+
+class TokenBucket:
+    """The recent command usage of a single user.
+
+    The bucket holds up to ``rate`` tokens and refills continuously at ``rate``
+    tokens every ``per`` seconds. Each command takes one token, so a user can
+    burst up to ``rate`` commands and then sustain ``rate`` every ``per`` seconds.
+
+    Attributes
+    ----------
+    tokens: :class:`float`
+        The tokens left.
+    updated: :class:`float`
+        When the tokens were last refilled, as a :func:`time.monotonic` timestamp.
+    excess: :class:`int`
+        How many commands in a row were over the limit.
+    """
+
+    __slots__: Tuple[str, ...] = ('tokens', 'updated', 'excess')
+
+    def __init__(self, tokens: float, now: float) -> None:
+        self.tokens: float = tokens
+        self.updated: float = now
+        self.excess: int = 0
+
+    def __repr__(self) -> str:
+        return f'<TokenBucket tokens={self.tokens:.2f} excess={self.excess}>'
+
+    def take(self, rate: int, per: float, now: float) -> float:
+        """Takes a token from the bucket.
+
+        Returns
+        -------
+        :class:`float`
+            ``0.0`` if there was a token to take, otherwise how long until there is one.
+        """
+        tokens = min(rate, self.tokens + (now - self.updated) * rate / per)
+        self.updated = now
+        if tokens >= 1:
+            self.tokens = tokens - 1
+            return 0.0
+        self.tokens = tokens
+        return (1 - tokens) * per / rate
+
+
+class AbuseDetector:
+    """Detects users who spam commands, and blacklists them automatically.
+
+    Every user gets a :class:`TokenBucket`. Buckets are kept in an LRU, so memory
+    is bounded by ``maxsize`` no matter how many users invoke commands. Evicting
+    the bucket of a user who hasn't used a command in a while forgets nothing of
+    value, as it would have been full again anyway.
+
+    A user that goes over the limit ``strikes`` times in a row is blacklisted. How
+    many times a user was auto-blacklisted is kept in the ``abuse_strikes`` table,
+    and decides how the next one is handled.
+
+    This is the ``cooldown`` stage of :attr:`DuckBot.checks`. Commands over the
+    limit are logged, but still allowed to run.
+
+    Parameters
+    ----------
+    bot: :class:`DuckBot`
+        The bot instance.
+    rate: :class:`int`
+        How many commands a user can use every ``per`` seconds.
+    per: :class:`float`
+        The period of ``rate``, in seconds.
+    strikes: :class:`int`
+        How many commands in a row over the limit get a user blacklisted.
+    maxsize: :class:`int`
+        How many users to keep a bucket for.
+    add_check: :class:`bool`
+        Whether to add the ``cooldown`` stage to :attr:`DuckBot.checks`.
+
+    Attributes
+    ----------
+    allowed: :class:`int`
+        How many commands were within the limit.
+    limited: :class:`int`
+        How many commands were over the limit.
+    blocked: :class:`int`
+        How many users were auto-blacklisted.
+    """
+
+    __slots__: Tuple[str, ...] = (
+        'bot',
+        'rate',
+        'per',
+        'strikes',
+        'allowed',
+        'limited',
+        'blocked',
+        '_buckets',
+    )
+
+    def __init__(
+        self,
+        bot: DuckBot,
+        *,
+        rate: int = 10,
+        per: float = 12.0,
+        strikes: int = 5,
+        maxsize: int = 10_000,
+        add_check: bool = True,
+    ) -> None:
+        self.bot: DuckBot = bot
+        self.rate: int = rate
+        self.per: float = per
+        self.strikes: int = strikes
+
+        self.allowed: int = 0
+        self.limited: int = 0
+        self.blocked: int = 0
+        self._buckets: LRU = LRU(maxsize)
+
+        if add_check:
+            self.bot.checks.add('cooldown', self.check_context, call_once=True)
+
+    def __repr__(self) -> str:
+        return f'<AbuseDetector rate={self.rate}/{self.per}s tracked={len(self._buckets)}>'
+
+    def hit(self, user_id: int, now: float) -> Tuple[float, bool]:
+        """Counts a command used by a user.
+
+        Parameters
+        ----------
+        user_id: :class:`int`
+            The user.
+        now: :class:`float`
+            The current :func:`time.monotonic` timestamp.
+
+        Returns
+        -------
+        Tuple[:class:`float`, :class:`bool`]
+            How long the user should have waited, ``0.0`` if they were within the limit,
+            and whether they went over it often enough to be blacklisted.
+        """
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            self._buckets[user_id] = bucket = TokenBucket(self.rate, now)
+
+        retry_after = bucket.take(self.rate, self.per, now)
+        if not retry_after:
+            self.allowed += 1
+            bucket.excess = 0
+            return 0.0, False
+
+        self.limited += 1
+        bucket.excess += 1
+        if bucket.excess < self.strikes:
+            return retry_after, False
+
+        bucket.excess = 0
+        return retry_after, True
+
+    def check_context(self, ctx: DuckContext) -> bool:
+        """Counts an invocation, and logs or blacklists the user if they are spamming.
+
+        Returns
+        -------
+        bool
+            Always ``True``, spamming is dealt with in the background.
+        """
+        retry_after, block = self.hit(ctx.author.id, time.monotonic())
+        if block:
+            self.bot.create_task(self._auto_block(ctx, retry_after))
+        elif retry_after:
+            self.bot.create_task(self._log_excess(ctx, retry_after))
+        return True
+
+    async def _auto_block(self, ctx: DuckContext, retry_after: float) -> None:
+        # This runs in the background, so failures don't reach the command error handler on their own.
+        try:
+            await self.add_strike(ctx.author)
+            self.blocked += 1
+            await self._log_excess(ctx, retry_after, auto_block=True)
+        except Exception as e:
+            await self.bot.exceptions.add_error(error=e, ctx=ctx)
+
+    async def add_strike(self, user: Union[discord.User, discord.Member]) -> int:
+        """Records an auto-blacklist of a user and blacklists them.
+
+        The first ``strikes`` times, the user is blacklisted indefinitely. After
+        that, for as many minutes as they were auto-blacklisted before.
+
+        Parameters
+        ----------
+        user: Union[:class:`discord.User`, :class:`discord.Member`]
+            The user to blacklist.
+
+        Returns
+        -------
+        :class:`int`
+            How many times the user was auto-blacklisted, this time included.
+        """
+        query = """
+            INSERT INTO abuse_strikes (user_id, strikes) VALUES ($1, 1)
+            ON CONFLICT (user_id) DO UPDATE
+                SET strikes = abuse_strikes.strikes + 1, last_strike = NOW()
+            RETURNING strikes
+        """
+        strikes: int = await self.bot.pool.fetchval(query, user.id)
+        previous = strikes - 1
+        if previous >= self.strikes:
+            await self.bot.blacklist.add_user(user, end_time=discord.utils.utcnow() + datetime.timedelta(minutes=previous))
+        else:
+            await self.bot.blacklist.add_user(user)
+        return strikes
+
+    async def _log_excess(self, ctx: DuckContext, retry_after: float, *, auto_block: bool = False) -> None:
+        guild_name = getattr(ctx.guild, 'name', 'No Guild (DMs)')
+        guild_id = getattr(ctx.guild, 'id', None)
+        fmt = 'User %s (ID %s) in guild %r (ID %s) spamming, retry_after: %.2fs'
+        log.warning(fmt, ctx.author, ctx.author.id, guild_name, guild_id, retry_after)
+        if not auto_block:
+            return
+
+        await self.bot.wait_until_ready()
+        embed = discord.Embed(title='Auto-blocked Member', colour=0xDDA453)
+        embed.add_field(name='Member', value=f'{ctx.author} (ID: {ctx.author.id})', inline=False)
+        embed.add_field(name='Guild Info', value=f'{guild_name} (ID: {guild_id})', inline=False)
+        embed.add_field(name='Channel Info', value=f'{ctx.channel} (ID: {ctx.channel.id})', inline=False)
+        embed.timestamp = discord.utils.utcnow()
+        channel: discord.TextChannel = self.bot.get_channel(904797860841812050)  # type: ignore
+
+        try:
+            await channel.send(embed=embed)
+        except discord.HTTPException:
+            pass
+        except AttributeError as e:
+            await self.bot.exceptions.add_error(error=e)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Dict[:class:`str`, Any]: A JSON serializable summary of the detector."""
+        return {
+            'allowed': self.allowed,
+            'limited': self.limited,
+            'blocked': self.blocked,
+            'tracked_users': len(self._buckets),
+            'max_tracked_users': self._buckets.get_size(),
+        }
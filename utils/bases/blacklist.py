@@ -1,9 +1,25 @@
 from __future__ import annotations
 
+import sys
 import typing
+from array import array
 from collections import defaultdict
 from datetime import datetime
-from typing import TYPE_CHECKING, Any, DefaultDict, Literal, Optional, Set, Tuple
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Collection,
+    DefaultDict,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 import asyncpg
 import discord
@@ -11,11 +27,17 @@ import discord
 if TYPE_CHECKING:
     from bot import DuckBot
     from utils.bases.context import DuckContext
+    from utils.bases.invalidation import CacheInvalidation
 
 from utils.bases.errors import EntityBlacklisted
+from utils.bases.timer import TimerOwner
 
 __all__: Tuple[str, ...] = ("DuckBlacklistManager",)
 
+# Groups of ids stay plain sets up to this size, lookups in them are fastest and their memory
+# doesn't matter. Bigger groups, like large auto-blacklists, are packed into a SnowflakeSet.
+COMPACT_THRESHOLD: int = 4096
+
 
 class FakeChannel:
     """A fake channel to pass to the remove_channel method.
@@ -42,6 +64,135 @@ class FakeChannel:
         self.guild = discord.Object(id=guild_id)
 
 
+class SnowflakeSet:
+    """A set of ids packed into an open addressing hash table backed by an ``array('q')``.
+
+    Every slot takes 8 bytes and the table is kept at most half full, so an id costs
+    16 to 32 bytes instead of the ~60 bytes of an :class:`int` in a :class:`set`.
+    Collisions are resolved by linear probing, and as the table is never more than half
+    full, a lookup of an id that isn't in the set often stops at the first slot.
+    Snowflakes are never ``0``, so ``0`` marks an empty slot.
+
+    .. container:: operations
+
+        .. describe:: x in s
+
+            Checks whether an id is in the set.
+
+        .. describe:: len(s)
+
+            Returns the amount of ids in the set.
+    """
+
+    __slots__: Tuple[str, ...] = ('table', 'mask', '_size')
+
+    def __init__(self, ids: Iterable[int] = ()) -> None:
+        ids = set(ids)
+        self._allocate(len(ids))
+        for id in ids:
+            self.add(id)
+
+    def _allocate(self, size: int) -> None:
+        slots = 8
+        while slots < 2 * size:
+            slots <<= 1
+        self.table: array[int] = array('q', bytes(8 * slots))
+        self.mask: int = slots - 1
+        self._size: int = 0
+
+    @staticmethod
+    def slot(id: int, mask: int) -> int:
+        """The slot a lookup of ``id`` starts probing from."""
+        # The timestamp bits of a snowflake are well spread, unlike its lowest bits.
+        return (id >> 22) & mask
+
+    def __contains__(self, id: int) -> bool:
+        # The probe is spelled out, calling slot() would cost as much as the lookup itself.
+        table, mask = self.table, self.mask
+        index = (id >> 22) & mask
+        while True:
+            entry = table[index]
+            if not entry:
+                return False
+            if entry == id:
+                return True
+            index = (index + 1) & mask
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[int]:
+        return (id for id in self.table if id)
+
+    def __repr__(self) -> str:
+        return f'<SnowflakeSet size={self._size} slots={self.mask + 1}>'
+
+    def add(self, id: int) -> None:
+        table, mask = self.table, self.mask
+        index = self.slot(id, mask)
+        while True:
+            entry = table[index]
+            if entry == id:
+                return
+            if not entry:
+                break
+            index = (index + 1) & mask
+
+        table[index] = id
+        self._size += 1
+        if 2 * self._size > mask + 1:
+            self._allocate(self._size)
+            for id in table:
+                if id:
+                    self.add(id)
+
+    def discard(self, id: int) -> None:
+        table, mask = self.table, self.mask
+        index = self.slot(id, mask)
+        while True:
+            entry = table[index]
+            if not entry:
+                return
+            if entry == id:
+                break
+            index = (index + 1) & mask
+
+        # Shifts the following entries back instead of leaving a tombstone, so probes stay short.
+        table[index] = 0
+        self._size -= 1
+        hole, index = index, (index + 1) & mask
+        while entry := table[index]:
+            home = self.slot(entry, mask)
+            # Moves the entry into the hole unless its home slot lies between the hole and itself.
+            if (index - home) & mask >= (index - hole) & mask:
+                table[hole] = entry
+                table[index] = 0
+                hole = index
+            index = (index + 1) & mask
+
+    @property
+    def nbytes(self) -> int:
+        """:class:`int`: The memory used by the set, in bytes."""
+        return sys.getsizeof(self) + sys.getsizeof(self.table)
+
+
+Snowflakes = Union[Set[int], SnowflakeSet]
+
+
+def compact(ids: Collection[int]) -> Snowflakes:
+    """Stores ids as a :class:`set` if there are few of them, or as a :class:`SnowflakeSet` otherwise."""
+    if len(ids) > COMPACT_THRESHOLD:
+        return SnowflakeSet(ids)
+    return set(ids)
+
+
+def nbytes(entries: Snowflakes) -> int:
+    """The memory used by a group of ids, in bytes, including the :class:`int` objects of a :class:`set`."""
+    if isinstance(entries, SnowflakeSet):
+        return entries.nbytes
+    return sys.getsizeof(entries) + sum(map(sys.getsizeof, entries))
+
+
 class DuckBlacklistManager:
     """
     A helper class to handle blacklisting for the bot.
@@ -55,14 +206,17 @@ class DuckBlacklistManager:
     ----------
     bot: :class:`DuckBot`
         The bot instance.
-    _global_blacklisted_users: :class:`set`
-        A set of blacklisted user ids.
-    _guild_blacklisted_users: DefaultDict[:class:`int`, Set[:class:`int`]]
-        A dict of guild ids to blacklisted user ids.
-    _blacklisted_channels: DefaultDict[:class:`int`, Set[:class:`int`]]
-        A dict of guild ids to blacklisted channel ids.
-    _blacklisted_guilds: :class:`set`
-        A set of blacklisted guild ids.
+    _global_blacklisted_users: Union[Set[:class:`int`], :class:`SnowflakeSet`]
+        The globally blacklisted user ids.
+    _guild_blacklisted_users: Dict[:class:`int`, Union[Set[:class:`int`], :class:`SnowflakeSet`]]
+        A dict of guild ids to blacklisted user ids. Only guilds with entries have a key.
+    _blacklisted_channels: Union[Set[:class:`int`], :class:`SnowflakeSet`]
+        The blacklisted channel ids. Channel ids are unique across guilds, so they share one set.
+    _blacklisted_guilds: Union[Set[:class:`int`], :class:`SnowflakeSet`]
+        The blacklisted guild ids.
+
+    Each group of ids is a :class:`set` until it grows past ``COMPACT_THRESHOLD`` ids,
+    and is packed into a :class:`SnowflakeSet` from then on.
 
     """
 
@@ -78,39 +232,165 @@ class DuckBlacklistManager:
         self.bot: DuckBot = bot
 
         self.bot.add_listener(self._temp_blacklist_end_event, 'on_blacklist_timer_complete')
+        self.bot.invalidation.subscribe('blacklist', self._on_invalidation)
 
         if add_check:
-            self.bot.add_check(self.check_context, call_once=True)
+            self.bot.checks.add('blacklist', self.check_context, call_once=True)
 
         # Caches
-        self._blacklisted_guilds: Set[int] = set()
-        self._global_blacklisted_users: Set[int] = set()
-        self._guild_blacklisted_users: DefaultDict[int, Set[int]] = defaultdict(set)
-        self._blacklisted_channels: DefaultDict[int, Set[int]] = defaultdict(set)
+        self._blacklisted_guilds: Snowflakes = set()
+        self._global_blacklisted_users: Snowflakes = set()
+        self._guild_blacklisted_users: Dict[int, Snowflakes] = {}
+        self._blacklisted_channels: Snowflakes = set()
 
     def __del__(self):
         self.bot.remove_listener(self._temp_blacklist_end_event, 'on_blacklist_timer_complete')
-        self.bot.remove_check(self.check_context, call_once=True)
+        self.bot.invalidation.unsubscribe('blacklist', self._on_invalidation)
+        self.bot.checks.remove('blacklist')
 
-    async def build_cache(self, conn: asyncpg.Connection) -> None:
+    async def build_cache(self, conn: Union[asyncpg.Connection, asyncpg.Pool]) -> int:
         """Builds the blacklist cache
 
         Parameters
         ----------
-        conn: :class:`asyncpg.Pool`
+        conn: Union[:class:`asyncpg.Connection`, :class:`asyncpg.Pool`]
             A connection to the database.
+
+        Returns
+        -------
+        :class:`int`
+            The amount of blacklist entries loaded.
         """
-        data = await conn.fetch("SELECT * FROM blacklist")
-        for row in data:
-            if row["blacklist_type"] == "guild":
-                self._blacklisted_guilds.add(row["entity_id"])
-            elif row["blacklist_type"] == "user":
-                if not row["guild_id"]:
-                    self._global_blacklisted_users.add(row["entity_id"])
+        data = await conn.fetch("SELECT blacklist_type, entity_id, guild_id FROM blacklist")
+
+        # Collected first so every table is sized once, and swapped in at once so lookups never see a half built cache.
+        guilds: List[int] = []
+        global_users: List[int] = []
+        guild_users: DefaultDict[int, List[int]] = defaultdict(list)
+        channels: List[int] = []
+        for blacklist_type, entity_id, guild_id in data:
+            if blacklist_type == "guild":
+                guilds.append(entity_id)
+            elif blacklist_type == "user":
+                if not guild_id:
+                    global_users.append(entity_id)
                 else:
-                    self._guild_blacklisted_users[row["guild_id"]].add(row["entity_id"])
-            elif row["blacklist_type"] == "channel":
-                self._blacklisted_channels[row["guild_id"]].add(row["entity_id"])
+                    guild_users[guild_id].append(entity_id)
+            elif blacklist_type == "channel":
+                channels.append(entity_id)
+
+        self._blacklisted_guilds = compact(guilds)
+        self._global_blacklisted_users = compact(global_users)
+        # A plain dict, so looking up a guild without entries doesn't create an empty set.
+        self._guild_blacklisted_users = {guild_id: compact(users) for guild_id, users in guild_users.items()}
+        self._blacklisted_channels = compact(channels)
+        return len(data)
+
+    @staticmethod
+    def _add(entries: Snowflakes, entity_id: int) -> Snowflakes:
+        """Adds an id to a group, and returns the group to keep, which is packed once it gets too big."""
+        entries.add(entity_id)
+        if isinstance(entries, set) and len(entries) > COMPACT_THRESHOLD:
+            return SnowflakeSet(entries)
+        return entries
+
+    def _add_guild_user(self, guild_id: int, user_id: int) -> None:
+        users = self._guild_blacklisted_users.get(guild_id, set())
+        self._guild_blacklisted_users[guild_id] = self._add(users, user_id)
+
+    def _discard_guild_user(self, guild_id: int, user_id: int) -> None:
+        users = self._guild_blacklisted_users.get(guild_id)
+        if users is not None:
+            users.discard(user_id)
+            if not users:
+                del self._guild_blacklisted_users[guild_id]
+
+    def is_blocked(
+        self, user_id: int, guild_id: Optional[int] = None, channel_id: Optional[int] = None
+    ) -> Optional[Literal['user', 'channel', 'guild']]:
+        """Checks the user, channel and guild of an invocation against the blacklist at once.
+
+        This only does lookups, it never allocates, so it is cheap enough to run for every command.
+
+        Parameters
+        ----------
+        user_id: :class:`int`
+            The invoking user.
+        guild_id: Optional[:class:`int`]
+            The guild of the invocation, if any.
+        channel_id: Optional[:class:`int`]
+            The channel of the invocation, if any.
+
+        Returns
+        -------
+        Optional[Literal['user', 'channel', 'guild']]
+            What is blacklisted, checked in that order, or ``None`` if nothing is.
+        """
+        if user_id in self._global_blacklisted_users:
+            return 'user'
+
+        if guild_id:
+            users = self._guild_blacklisted_users.get(guild_id)
+            if users is not None and user_id in users:
+                return 'user'
+
+        if channel_id is not None and channel_id in self._blacklisted_channels:
+            return 'channel'
+
+        if guild_id and guild_id in self._blacklisted_guilds:
+            return 'guild'
+        return None
+
+    def memory_usage(self) -> Dict[str, Tuple[int, int]]:
+        """Reports how much memory the blacklist caches use.
+
+        Returns
+        -------
+        Dict[:class:`str`, Tuple[:class:`int`, :class:`int`]]
+            A mapping of cache names to their ``(entries, bytes)``.
+        """
+        per_guild = self._guild_blacklisted_users
+        return {
+            'guilds': (len(self._blacklisted_guilds), nbytes(self._blacklisted_guilds)),
+            'global users': (len(self._global_blacklisted_users), nbytes(self._global_blacklisted_users)),
+            'guild users': (
+                sum(len(users) for users in per_guild.values()),
+                sys.getsizeof(per_guild) + sum(nbytes(users) for users in per_guild.values()),
+            ),
+            'channels': (len(self._blacklisted_channels), nbytes(self._blacklisted_channels)),
+        }
+
+    async def _on_invalidation(self, event: CacheInvalidation) -> None:
+        """Brings the cache up to date with a change another process made to the blacklist table.
+
+        Resyncs are handled by :meth:`DuckBot.populate_cache`, which rebuilds the whole cache.
+        """
+        if event.everything:
+            if event.op != 'RESYNC':
+                await self.build_cache(self.bot.pool)
+            return
+
+        entity_id, guild_id = event.key, event.guild_id or 0
+        rows = await self.bot.pool.fetch(
+            "SELECT blacklist_type FROM blacklist WHERE entity_id = $1 AND guild_id = $2", entity_id, guild_id
+        )
+        types = {row["blacklist_type"] for row in rows}
+
+        if guild_id:
+            if "user" in types:
+                self._add_guild_user(guild_id, entity_id)
+            else:
+                self._discard_guild_user(guild_id, entity_id)
+            self._blacklisted_channels = self._toggle(self._blacklisted_channels, entity_id, "channel" in types)
+        else:
+            self._global_blacklisted_users = self._toggle(self._global_blacklisted_users, entity_id, "user" in types)
+            self._blacklisted_guilds = self._toggle(self._blacklisted_guilds, entity_id, "guild" in types)
+
+    def _toggle(self, entries: Snowflakes, entity_id: int, present: bool) -> Snowflakes:
+        if present:
+            return self._add(entries, entity_id)
+        entries.discard(entity_id)
+        return entries
 
     async def _temp_blacklist_end_event(
         self, *, blacklist_type: Literal['user', 'guild', 'channel'], entity_id: int, guild_id: Optional[int] = None
@@ -138,27 +418,28 @@ class DuckBlacklistManager:
         elif blacklist_type == 'channel':
             await self.remove_channel(FakeChannel(id=entity_id, guild_id=guild_id))  # type: ignore
 
-    async def check_context(self, ctx: DuckContext) -> bool:
+    def check_context(self, ctx: DuckContext) -> bool:
         """Checks if this context is valid and nothing is blacklisted.
 
+        This is the ``blacklist`` stage of :attr:`DuckBot.checks`, owners never reach it.
+
         Returns
         -------
         bool
-            ``True`` if the user is blacklisted.
+            ``True`` if nothing is blacklisted.
 
         Raises
         ------
         :class:`EntityBlacklisted`
             If the action can't be executed in this context.
         """
-        if await self.bot.is_owner(ctx.author):
-            # Just in case someone does the dumb.
-            return True
-
-        # Check each of the blacklists
-        self.check_user(ctx.author, should_raise=True)
-        self.check_channel(ctx.channel, should_raise=True)  # type: ignore
-        self.check_guild(ctx.guild, should_raise=True)
+        blocked = self.is_blocked(ctx.author.id, ctx.guild and ctx.guild.id, ctx.channel.id)
+        if blocked == 'user':
+            raise EntityBlacklisted(ctx.author)
+        elif blocked == 'channel':
+            raise EntityBlacklisted(ctx.channel)  # type: ignore
+        elif blocked == 'guild':
+            raise EntityBlacklisted(ctx.guild)
         return True
 
     async def add_user(
@@ -186,25 +467,30 @@ class DuckBlacklistManager:
         """
         # First we add the user to the cache
         if guild is None:
-            self._global_blacklisted_users.add(user.id)
+            self._global_blacklisted_users = self._add(self._global_blacklisted_users, user.id)
         else:
-            self._guild_blacklisted_users[guild.id].add(user.id)
+            self._add_guild_user(guild.id, user.id)
 
         if end_time is not None:  # Then, if the block is temporary, we create a new timer
             # We first delete all existing timers
             await self.bot.pool.fetch(
                 """DELETE FROM timers
                        WHERE event = 'blacklist'
-                       AND (extra->'kwargs'->'blacklist_type')::TEXT = 'user'
-                       AND (extra->'kwargs'->'entity_id')::BIGINT = $1 
-                       AND (extra->'kwargs'->'guild_id')::BIGINT = $2""",
+                       AND entity_id = $1
+                       AND guild_id = $2
+                       AND extra->'kwargs'->>'blacklist_type' = 'user'""",
                 user.id,
                 guild.id if guild else 0,
             )
 
             # Then, we create a new timer.
             await self.bot.create_timer(
-                end_time, "blacklist", blacklist_type='user', entity_id=user.id, guild_id=guild.id if guild else 0
+                end_time,
+                "blacklist",
+                blacklist_type='user',
+                entity_id=user.id,
+                guild_id=guild.id if guild else 0,
+                owner=TimerOwner(guild_id=guild.id if guild else 0, entity_id=user.id),
             )
 
             # Lastly we add the user to the blacklist.
@@ -242,15 +528,15 @@ class DuckBlacklistManager:
         if not guild:
             self._global_blacklisted_users.discard(user.id)
         else:
-            self._guild_blacklisted_users[guild.id].discard(user.id)
+            self._discard_guild_user(guild.id, user.id)
 
         # Then, we discard all timers that are associated with the user
         await self.bot.pool.fetch(
             """DELETE FROM timers
                    WHERE event = 'blacklist'
-                   AND (extra->'kwargs'->'blacklist_type')::TEXT = 'user'
-                   AND (extra->'kwargs'->'entity_id')::BIGINT = $1
-                   AND (extra->'kwargs'->'guild_id')::BIGINT = $2""",
+                   AND entity_id = $1
+                   AND guild_id = $2
+                   AND extra->'kwargs'->>'blacklist_type' = 'user'""",
             user.id,
             guild.id if guild else 0,
         )
@@ -285,7 +571,7 @@ class DuckBlacklistManager:
             return True
 
         if isinstance(user, discord.Member) and user.guild is not None:
-            if user.id in self._guild_blacklisted_users[user.guild.id]:
+            if user.id in self._guild_blacklisted_users.get(user.guild.id, ()):
                 if should_raise:
                     raise EntityBlacklisted(user)
                 return True
@@ -307,16 +593,16 @@ class DuckBlacklistManager:
             Whether the channel was added successfully or not.
         """
         # First we add the channel to the cache
-        self._blacklisted_channels[channel.guild.id].add(channel.id)
+        self._blacklisted_channels = self._add(self._blacklisted_channels, channel.id)
 
         if end_time is not None:  # Then, if the block is temporary, we create a new timer
             # We first delete all existing timers
             await self.bot.pool.execute(
                 """DELETE FROM timers
                        WHERE event = 'blacklist'
-                       AND (extra->'kwargs'->'blacklist_type')::TEXT = 'channel'
-                       AND (extra->'kwargs'->'entity_id')::BIGINT = $1
-                       AND (extra->'kwargs'->'guild_id')::BIGINT = $2""",
+                       AND entity_id = $1
+                       AND guild_id = $2
+                       AND extra->'kwargs'->>'blacklist_type' = 'channel'""",
                 channel.id,
                 channel.guild.id,
             )
@@ -328,6 +614,7 @@ class DuckBlacklistManager:
                 blacklist_type='channel',
                 entity_id=channel.id,
                 guild_id=channel.guild.id,
+                owner=TimerOwner(guild_id=channel.guild.id, entity_id=channel.id),
             )
 
             # Lastly we add the channel to the blacklist.
@@ -358,15 +645,15 @@ class DuckBlacklistManager:
             Whether the channel was removed successfully or not.
         """
         # First we remove the channel from the cache
-        self._blacklisted_channels[channel.guild.id].discard(channel.id)
+        self._blacklisted_channels.discard(channel.id)
 
         # Then, we discard all existing timers
         await self.bot.pool.fetch(
             """DELETE FROM timers
                    WHERE event = 'blacklist'
-                   AND (extra->'kwargs'->'blacklist_type')::TEXT = 'channel'
-                   AND (extra->'kwargs'->'entity_id')::BIGINT = $1
-                   AND (extra->'kwargs'->'guild_id')::BIGINT = $2""",
+                   AND entity_id = $1
+                   AND guild_id = $2
+                   AND extra->'kwargs'->>'blacklist_type' = 'channel'""",
             channel.id,
             channel.guild.id,
         )
@@ -401,8 +688,8 @@ class DuckBlacklistManager:
             Raised if the channel is blacklisted and should_raise is True.
         """
         if not should_raise:
-            return channel.id in self._blacklisted_channels[channel.guild.id]
-        if channel.id in self._blacklisted_channels[channel.guild.id]:
+            return channel.id in self._blacklisted_channels
+        if channel.id in self._blacklisted_channels:
             raise EntityBlacklisted(channel)
         return False
 
@@ -421,14 +708,14 @@ class DuckBlacklistManager:
             Whether the guild was added successfully or not.
         """
         # First we add the guild to the cache
-        self._blacklisted_guilds.add(guild.id)
+        self._blacklisted_guilds = self._add(self._blacklisted_guilds, guild.id)
 
         if end_time is not None:  # Then, if the block is temporary, we create a new timer
             await self.bot.pool.fetch(
                 """DELETE FROM timers
                        WHERE event = 'blacklist'
-                       AND (extra->'kwargs'->'blacklist_type')::TEXT = 'guild'
-                       AND (extra->'kwargs'->'entity_id')::BIGINT = $1""",
+                       AND entity_id = $1
+                       AND extra->'kwargs'->>'blacklist_type' = 'guild'""",
                 guild.id,
             )
 
@@ -438,6 +725,7 @@ class DuckBlacklistManager:
                 "blacklist",
                 blacklist_type='guild',
                 entity_id=guild.id,
+                owner=TimerOwner(entity_id=guild.id),
             )
 
             # Lastly we add the guild to the blacklist.
@@ -473,8 +761,8 @@ class DuckBlacklistManager:
         await self.bot.pool.fetch(
             """DELETE FROM timers
                    WHERE event = 'blacklist'
-                   AND (extra->'kwargs'->'blacklist_type')::TEXT = 'guild'
-                   AND (extra->'kwargs'->'entity_id')::BIGINT = $1""",
+                   AND entity_id = $1
+                   AND extra->'kwargs'->>'blacklist_type' = 'guild'""",
             guild.id,
         )
 
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from enum import IntEnum
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, ClassVar, Dict, Iterator, Optional, Tuple, Union
+
+from discord.ext import commands
+
+from .metrics import LatencyHistogram
+
+if TYPE_CHECKING:
+    from .context import DuckContext
+
+__all__: Tuple[str, ...] = ('CheckResult', 'CheckStage', 'CheckPipeline')
+
+
+class CheckResult(IntEnum):
+    """What a stage of the :class:`CheckPipeline` decided.
+
+    Stages can also return a :class:`bool`, which compares equal to
+    :attr:`reject` or :attr:`allow`.
+    """
+
+    reject = 0
+    """The invocation is not allowed."""
+    allow = 1
+    """The invocation may go on to the next stage."""
+    bypass = 2
+    """The invocation is allowed without running the remaining stages."""
+
+
+StageCallback = Callable[['DuckContext'], Union[bool, CheckResult, Awaitable[Union[bool, CheckResult]]]]
+
+
+class CheckStage:
+    """A named global check, and how it has been doing.
+
+    Attributes
+    ----------
+    name: :class:`str`
+        The name of the stage.
+    callback: Callable[[:class:`DuckContext`], Union[:class:`bool`, :class:`CheckResult`]]
+        The check itself, either a function or a coroutine function.
+    call_once: Optional[:class:`bool`]
+        Whether the stage runs once per invocation, like :meth:`~discord.ext.commands.Bot.check_once`,
+        or for every command of the invocation. ``None`` runs it in both cases.
+    timings: :class:`LatencyHistogram`
+        How long the stage took to run.
+    rejections: :class:`int`
+        How many invocations the stage rejected, either by returning
+        :attr:`CheckResult.reject` or by raising a :exc:`~discord.ext.commands.CommandError`.
+    bypasses: :class:`int`
+        How many invocations the stage let through without running the remaining stages.
+    """
+
+    __slots__: Tuple[str, ...] = ('name', 'callback', 'call_once', 'timings', 'rejections', 'bypasses', '_is_coroutine')
+
+    def __init__(self, name: str, callback: StageCallback, *, call_once: Optional[bool] = None) -> None:
+        self.name: str = name
+        self.callback: StageCallback = callback
+        self.call_once: Optional[bool] = call_once
+        self.timings: LatencyHistogram = LatencyHistogram()
+        self.rejections: int = 0
+        self.bypasses: int = 0
+        self._is_coroutine: bool = asyncio.iscoroutinefunction(callback)
+
+    def __repr__(self) -> str:
+        return f'<CheckStage name={self.name!r} call_once={self.call_once} rejections={self.rejections}>'
+
+    def reset(self) -> None:
+        """Resets the recorded timings and counters."""
+        self.timings.reset()
+        self.rejections = self.bypasses = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Dict[:class:`str`, Any]: A JSON serializable representation of the stage."""
+        return {
+            'call_once': self.call_once,
+            'rejections': self.rejections,
+            'bypasses': self.bypasses,
+            'timings': self.timings.to_dict(),
+        }
+
+
+class CheckPipeline:
+    """The global checks of the bot, run in a fixed order by :meth:`DuckBot.can_run`.
+
+    Stages run in the order of :attr:`ORDER`, which puts the cheapest checks and those
+    that can let an invocation bypass the others first. Stages that aren't listed there
+    run after, in the order they were added. The first stage that rejects an invocation
+    stops the pipeline, as does the first one that bypasses the rest.
+
+    Attributes
+    ----------
+    ORDER: Tuple[:class:`str`, ...]
+        The names of the known stages, in the order they run.
+    """
+
+    ORDER: ClassVar[Tuple[str, ...]] = ('owner', 'blacklist', 'plonk', 'command_config', 'cooldown')
+
+    __slots__: Tuple[str, ...] = ('_stages', '_once', '_every')
+
+    def __init__(self) -> None:
+        self._stages: Dict[str, CheckStage] = {}
+        self._once: Tuple[CheckStage, ...] = ()
+        self._every: Tuple[CheckStage, ...] = ()
+
+    def __repr__(self) -> str:
+        return f'<CheckPipeline stages={[stage.name for stage in self]}>'
+
+    def __iter__(self) -> Iterator[CheckStage]:
+        order = {name: index for index, name in enumerate(self.ORDER)}
+        # sorted() is stable, so the unknown stages keep the order they were added in.
+        return iter(sorted(self._stages.values(), key=lambda stage: order.get(stage.name, len(order))))
+
+    def __len__(self) -> int:
+        return len(self._stages)
+
+    def get(self, name: str) -> Optional[CheckStage]:
+        """Gets a stage by its name."""
+        return self._stages.get(name)
+
+    def add(self, name: str, callback: StageCallback, *, call_once: Optional[bool] = None) -> CheckStage:
+        """Adds a stage to the pipeline, replacing any stage with the same name.
+
+        Parameters
+        ----------
+        name: :class:`str`
+            The name of the stage, which decides where it runs, see :attr:`ORDER`.
+        callback: Callable[[:class:`DuckContext`], Union[:class:`bool`, :class:`CheckResult`]]
+            The check. It can be a coroutine function, but plain functions avoid
+            creating a coroutine for every invocation.
+        call_once: Optional[:class:`bool`]
+            ``True`` to run the stage once per invocation, ``False`` to run it for every
+            command of the invocation, ``None`` for both.
+
+        Returns
+        -------
+        :class:`CheckStage`
+            The stage that was added.
+        """
+        self._stages[name] = stage = CheckStage(name, callback, call_once=call_once)
+        self._rebuild()
+        return stage
+
+    def remove(self, name: str) -> Optional[CheckStage]:
+        """Removes a stage from the pipeline, if it exists."""
+        stage = self._stages.pop(name, None)
+        self._rebuild()
+        return stage
+
+    def _rebuild(self) -> None:
+        stages = tuple(self)
+        self._once = tuple(stage for stage in stages if stage.call_once is not False)
+        self._every = tuple(stage for stage in stages if stage.call_once is not True)
+
+    async def run(self, ctx: DuckContext, *, call_once: bool = False) -> bool:
+        """Runs the stages of one of the check passes of an invocation.
+
+        Parameters
+        ----------
+        ctx: :class:`DuckContext`
+            The invocation context.
+        call_once: :class:`bool`
+            Whether this is the pass that runs once per invocation.
+
+        Returns
+        -------
+        :class:`bool`
+            Whether the invocation is allowed.
+
+        Raises
+        ------
+        :exc:`~discord.ext.commands.CommandError`
+            A stage rejected the invocation with a specific error.
+        """
+        perf_counter = time.perf_counter
+        for stage in self._once if call_once else self._every:
+            start = perf_counter()
+            try:
+                result = stage.callback(ctx)
+                if stage._is_coroutine:
+                    result = await result  # type: ignore
+            except commands.CommandError:
+                stage.rejections += 1
+                raise
+            finally:
+                stage.timings.record(perf_counter() - start)
+
+            if not result:
+                stage.rejections += 1
+                return False
+            if result == CheckResult.bypass:
+                stage.bypasses += 1
+                return True
+        return True
+
+    def reset(self) -> None:
+        """Resets the recorded timings and counters of every stage."""
+        for stage in self._stages.values():
+            stage.reset()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Dict[:class:`str`, Any]: A JSON serializable representation of every stage, in the order they run."""
+        return {stage.name: stage.to_dict() for stage in self}
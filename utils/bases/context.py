@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 from copy import deepcopy
-from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple, Union, overload, Literal
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union, overload, Literal
 
+import cachetools
 import discord
 from discord.ext import commands
 
@@ -16,6 +17,7 @@ if TYPE_CHECKING:
 __all__: Tuple[str, ...] = (
     'DuckContext',
     'DuckGuildContext',
+    'ResponseRegistry',
     'tick',
 )
 
@@ -54,6 +56,88 @@ def tick(opt: Optional[bool], label: Optional[str] = None) -> str:
     return emoji
 
 
+class ResponseRegistry:
+    """Keeps track of the messages the bot sent in response to a command message,
+    so they can be edited when the command is re-invoked, or deleted along with it.
+
+    Entries are keyed by ``(channel_id, message_id)`` of the invoking message and
+    expire after ``ttl`` seconds.
+
+    .. container:: operations
+
+        .. describe:: len(x)
+
+            Returns the amount of invoking messages being tracked.
+
+    Parameters
+    ----------
+    maxsize: :class:`int`
+        The maximum amount of invoking messages to track.
+    ttl: :class:`float`
+        The time, in seconds, after which an entry is forgotten.
+    """
+
+    __slots__: Tuple[str, ...] = ('_cache',)
+
+    def __init__(self, *, maxsize: int = 1000, ttl: float = 300.0) -> None:
+        self._cache = cachetools.TTLCache[Tuple[int, int], Dict[int, discord.Message]](maxsize=maxsize, ttl=ttl)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def get(self, channel_id: int, message_id: int, index: int) -> Optional[discord.Message]:
+        """Gets the response sent at ``index`` for an invoking message.
+
+        Parameters
+        ----------
+        channel_id: :class:`int`
+            The channel of the invoking message.
+        message_id: :class:`int`
+            The ID of the invoking message.
+        index: :class:`int`
+            The position of the response, starting at 0.
+
+        Returns
+        -------
+        Optional[:class:`discord.Message`]
+            The response, if it's still tracked.
+        """
+        responses = self._cache.get((channel_id, message_id))
+        if responses is None:
+            return None
+        return responses.get(index)
+
+    def set(self, channel_id: int, message_id: int, index: int, message: discord.Message) -> None:
+        """Tracks the response sent at ``index`` for an invoking message.
+        This also refreshes the entry's expiry.
+        """
+        key = (channel_id, message_id)
+        responses = self._cache.get(key) or {}
+        responses[index] = message
+        self._cache[key] = responses
+
+    def discard(self, channel_id: int, message_id: int, index: int) -> None:
+        """Stops tracking the response sent at ``index`` for an invoking message."""
+        responses = self._cache.get((channel_id, message_id))
+        if responses is not None:
+            responses.pop(index, None)
+
+    def pop(self, channel_id: int, message_id: int) -> List[discord.Message]:
+        """Stops tracking an invoking message, and returns all its responses.
+
+        Returns
+        -------
+        List[:class:`discord.Message`]
+            The responses, empty if the message was never responded to.
+        """
+        responses = self._cache.pop((channel_id, message_id), None)
+        return list(responses.values()) if responses else []
+
+    def clear(self) -> None:
+        """Forgets every tracked response."""
+        self._cache.clear()
+
+
 class ConfirmationView(discord.ui.View):
     def __init__(self, ctx: DuckContext, *, timeout: int = 60, labels: tuple[str, str] = ('Confirm', 'Cancel')) -> None:
         super().__init__(timeout=timeout)
@@ -118,6 +202,15 @@ class DuckContext(commands.Context['DuckBot']):
     def tick(opt: Optional[bool], label: Optional[str] = None) -> str:
         return tick(opt, label)
 
+    @discord.utils.cached_property
+    def is_owner(self) -> bool:
+        """:class:`bool`: Whether the author owns the bot.
+
+        Looked up once per context in :attr:`DuckBot.owner_ids`, so every global
+        check of an invocation shares the same answer.
+        """
+        return self.author.id in self.bot.owner_ids
+
     @discord.utils.cached_property
     def color(self) -> discord.Color:
         """:class:`~discord.Color`: Returns DuckBot's color, or the author's color. Falls back to blurple"""
@@ -187,17 +280,14 @@ class DuckContext(commands.Context['DuckBot']):
     @property
     def _previous_message(self) -> Optional[discord.Message]:
         if self.message:
-            try:
-                return self.bot.messages[repr(self)]
-            except KeyError:
-                return None
+            return self.bot.messages.get(self.channel.id, self.message.id, self._message_count)
 
     @_previous_message.setter
     def _previous_message(self, message: Optional[discord.Message]) -> None:
         if isinstance(message, discord.Message):
-            self.bot.messages[repr(self)] = message
+            self.bot.messages.set(self.channel.id, self.message.id, self._message_count, message)
         else:
-            self.bot.messages.pop(repr(self), None)
+            self.bot.messages.discard(self.channel.id, self.message.id, self._message_count)
 
     @overload
     async def confirm(
@@ -0,0 +1,443 @@
+from __future__ import annotations
+
+import contextlib
+import datetime
+import inspect
+import logging
+import os
+import re
+import time
+import traceback
+from collections import deque
+from typing import TYPE_CHECKING, Any, AsyncIterator, Deque, Dict, List, NamedTuple, Optional, Tuple, Union
+
+import asyncpg
+import discord
+
+from .metrics import LatencyHistogram, LatencyStats
+
+if TYPE_CHECKING:
+    from asyncpg import Connection, Pool, Record
+    from asyncpg.prepared_stmt import PreparedStatement
+
+log = logging.getLogger('DuckBot.utils.database')
+
+__all__: Tuple[str, ...] = ('QueryRegistry', 'QueryTracker', 'SlowQuery', 'InstrumentedConnection', 'InstrumentedPool')
+
+_COMMENT_RE = re.compile(r'--[^\n]*')
+_WHITESPACE_RE = re.compile(r'\s+')
+# Numbers that aren't part of an identifier or a $n placeholder, i.e. values formatted into the query.
+_NUMBER_RE = re.compile(r'(?<![\w$])\d+(?:\.\d+)?\b')
+_IGNORED_PATHS: Tuple[str, ...] = (__file__, os.path.dirname(asyncpg.__file__), os.path.dirname(contextlib.__file__))
+
+
+class QueryRegistry:
+    """A registry of hot queries that are prepared once on every pool connection.
+
+    asyncpg's own statement cache is keyed by the query text and evicts
+    statements as it sees fit. Queries in this registry are instead prepared
+    as named server-side statements when a connection is created, and executed
+    by name.
+
+    .. code-block:: python3
+
+        record = await bot.queries.fetchrow('tags.get', bot.pool, name, guild_id)
+
+    Attributes
+    ----------
+    stats: Dict[:class:`str`, :class:`LatencyStats`]
+        The execution times of every statement, by name.
+    """
+
+    __slots__: Tuple[str, ...] = ('_queries', '_statements', 'stats')
+
+    def __init__(self) -> None:
+        self._queries: Dict[str, str] = {}
+        # server pid -> statement name -> prepared statement
+        self._statements: Dict[int, Dict[str, PreparedStatement]] = {}
+        self.stats: Dict[str, LatencyStats] = {}
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._queries
+
+    def register(self, name: str, query: str) -> None:
+        """Declares a query.
+
+        Parameters
+        ----------
+        name: :class:`str`
+            The name to execute the query by.
+        query: :class:`str`
+            The query itself.
+
+        Raises
+        ------
+        ValueError
+            A different query was already registered with this name.
+        """
+        if self._queries.get(name, query) != query:
+            raise ValueError(f'A different query is already registered as {name!r}')
+        self._queries[name] = query
+        self.stats.setdefault(name, LatencyStats())
+
+    async def _prepare(self, connection: Connection, name: str) -> PreparedStatement:
+        pid = connection.get_server_pid()
+        statements = self._statements.get(pid)
+        if statements is None:
+            self._statements[pid] = statements = {}
+            # Connections that get closed by the pool are replaced with new ones, forget their statements.
+            connection.add_termination_listener(lambda _: self._statements.pop(pid, None))
+
+        try:
+            statement = await connection.prepare(self._queries[name], name=f'duckbot_{name}')
+        except asyncpg.DuplicatePreparedStatementError:
+            # Only possible if something else prepared this name on this connection.
+            statement = await connection.prepare(self._queries[name])
+
+        statements[name] = statement
+        return statement
+
+    async def prepare_all(self, connection: Connection) -> None:
+        """Prepares every registered query on a connection.
+
+        This is called from the pool's ``init`` hook.
+
+        Parameters
+        ----------
+        connection: :class:`asyncpg.Connection`
+            The newly created connection.
+        """
+        for name in self._queries:
+            await self._prepare(connection, name)
+        log.debug('Prepared %s statements on connection %s', len(self._queries), connection.get_server_pid())
+
+    async def get_statement(self, name: str, connection: Connection) -> PreparedStatement:
+        """Gets the prepared statement for a query on a connection, preparing it if needed.
+
+        Parameters
+        ----------
+        name: :class:`str`
+            The name of the query.
+        connection: :class:`asyncpg.Connection`
+            The connection that will execute the statement.
+
+        Raises
+        ------
+        KeyError
+            There is no query with this name.
+        """
+        if name not in self._queries:
+            raise KeyError(name)
+
+        statement = self._statements.get(connection.get_server_pid(), {}).get(name)
+        if statement is None:
+            statement = await self._prepare(connection, name)
+        return statement
+
+    @contextlib.asynccontextmanager
+    async def acquire(self, connection: Union[Connection, Pool], *, readonly: bool = False) -> AsyncIterator[Connection]:
+        """Acquires a connection if given a pool, or uses the given connection as is.
+
+        This lets callers that run several statements do so on a single connection.
+        With ``readonly``, a connection acquired from a pool runs them in a read-only
+        ``REPEATABLE READ`` transaction, so they all see the same snapshot.
+        """
+        if isinstance(connection, asyncpg.Pool):
+            async with connection.acquire() as conn:
+                if not readonly:
+                    yield conn  # type: ignore
+                    return
+                async with conn.transaction(isolation='repeatable_read', readonly=True):
+                    yield conn  # type: ignore
+        else:
+            yield connection
+
+    async def _run(self, method: str, name: str, connection: Union[Connection, Pool], args: Tuple[Any, ...]) -> Any:
+        async with self.acquire(connection) as conn:
+            statement = await self.get_statement(name, conn)
+            start = time.perf_counter()
+            try:
+                return await getattr(statement, method)(*args)
+            finally:
+                elapsed = time.perf_counter() - start
+                self.stats[name].record(elapsed)
+                query_stats.record(self._queries[name], elapsed)
+
+    async def fetch(self, name: str, connection: Union[Connection, Pool], *args: Any) -> List[Record]:
+        """Runs a registered query and returns all the rows. See :meth:`asyncpg.Connection.fetch`."""
+        return await self._run('fetch', name, connection, args)
+
+    async def fetchrow(self, name: str, connection: Union[Connection, Pool], *args: Any) -> Optional[Record]:
+        """Runs a registered query and returns the first row. See :meth:`asyncpg.Connection.fetchrow`."""
+        return await self._run('fetchrow', name, connection, args)
+
+    async def fetchval(self, name: str, connection: Union[Connection, Pool], *args: Any) -> Any:
+        """Runs a registered query and returns the first value of the first row. See :meth:`asyncpg.Connection.fetchval`."""
+        return await self._run('fetchval', name, connection, args)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Dict[:class:`str`, Dict[:class:`str`, Any]]: The execution stats of every statement, by name."""
+        return {name: stats.to_dict() for name, stats in self.stats.items()}
+
+
+class SlowQuery(NamedTuple):
+    """A query that took longer than :attr:`QueryTracker.slow_threshold`."""
+
+    query: str
+    duration: float
+    call_site: str
+    when: datetime.datetime
+
+
+class QueryTracker:
+    """Records how long queries take, grouped by their normalized text.
+
+    Normalizing strips comments and whitespace, and replaces numbers that
+    were formatted into the query, so the same statement is always counted
+    under the same key.
+
+    Parameters
+    ----------
+    slow_threshold: :class:`float`
+        The duration, in seconds, after which a query is logged as slow.
+    max_queries: :class:`int`
+        The maximum amount of distinct queries to keep histograms for.
+        Anything past that is counted under ``<other>``.
+
+    Attributes
+    ----------
+    queries: Dict[:class:`str`, :class:`LatencyHistogram`]
+        The latency of every normalized query.
+    acquire: :class:`LatencyHistogram`
+        How long it took to get a connection from the pool.
+    slow_queries: Deque[:class:`SlowQuery`]
+        The most recent slow queries.
+    """
+
+    __slots__: Tuple[str, ...] = ('slow_threshold', 'max_queries', 'queries', 'acquire', 'slow_queries', '_normalized')
+
+    def __init__(self, *, slow_threshold: float = 0.25, max_queries: int = 500) -> None:
+        self.slow_threshold: float = slow_threshold
+        self.max_queries: int = max_queries
+        self.queries: Dict[str, LatencyHistogram] = {}
+        self.acquire: LatencyHistogram = LatencyHistogram()
+        self.slow_queries: Deque[SlowQuery] = deque(maxlen=50)
+        self._normalized: Dict[str, str] = {}
+
+    def normalize(self, query: str) -> str:
+        """Normalizes a query's text.
+
+        Parameters
+        ----------
+        query: :class:`str`
+            The query to normalize.
+        """
+        try:
+            return self._normalized[query]
+        except KeyError:
+            pass
+
+        normalized = _COMMENT_RE.sub(' ', query)
+        normalized = _NUMBER_RE.sub('?', normalized)
+        normalized = _WHITESPACE_RE.sub(' ', normalized).strip()
+
+        if len(self._normalized) >= self.max_queries * 4:
+            # Ad-hoc queries, e.g. from the sql command, shouldn't grow this forever.
+            self._normalized.clear()
+        self._normalized[query] = normalized
+        return normalized
+
+    @staticmethod
+    def _call_site() -> str:
+        for frame in reversed(traceback.extract_stack()):
+            if not frame.filename.startswith(_IGNORED_PATHS):
+                return f'{os.path.relpath(frame.filename)}:{frame.lineno} in {frame.name}'
+        return '<unknown>'
+
+    def record(self, query: str, seconds: float) -> None:
+        """Records the duration of a query, and logs it if it was slow.
+
+        This must be called from the task that ran the query, so the call site can be found.
+
+        Parameters
+        ----------
+        query: :class:`str`
+            The query that was executed.
+        seconds: :class:`float`
+            How long it took, in seconds.
+        """
+        normalized = self.normalize(query)
+        try:
+            histogram = self.queries[normalized]
+        except KeyError:
+            if len(self.queries) >= self.max_queries:
+                normalized = '<other>'
+            histogram = self.queries.setdefault(normalized, LatencyHistogram())
+        histogram.record(seconds)
+
+        if seconds >= self.slow_threshold:
+            call_site = self._call_site()
+            self.slow_queries.append(SlowQuery(normalized, seconds, call_site, discord.utils.utcnow()))
+            log.warning('Slow query (%.2fms) from %s: %s', seconds * 1000, call_site, normalized[:500])
+
+    def reset(self) -> None:
+        """Resets all the recorded statistics."""
+        self.queries.clear()
+        self.acquire.reset()
+        self.slow_queries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Dict[:class:`str`, Any]: A JSON serializable representation of the recorded statistics."""
+        return {
+            'slow_threshold_ms': round(self.slow_threshold * 1000, 3),
+            'acquire': self.acquire.to_dict(),
+            'queries': {query: histogram.to_dict() for query, histogram in self.queries.items()},
+            'slow_queries': [
+                {
+                    'query': slow.query,
+                    'duration_ms': round(slow.duration * 1000, 3),
+                    'call_site': slow.call_site,
+                    'when': slow.when.isoformat(),
+                }
+                for slow in self.slow_queries
+            ],
+        }
+
+
+class InstrumentedConnection(asyncpg.Connection):
+    """A :class:`asyncpg.Connection` that times every query it runs.
+
+    This is used as the pool's ``connection_class``, so it applies
+    to ``pool.fetch`` and friends as well as acquired connections.
+    """
+
+    __slots__: Tuple[str, ...] = ()
+
+    async def execute(self, query: str, *args: Any, **kwargs: Any) -> str:
+        start = time.perf_counter()
+        try:
+            return await super().execute(query, *args, **kwargs)
+        finally:
+            query_stats.record(query, time.perf_counter() - start)
+
+    async def executemany(self, command: str, args: Any, **kwargs: Any) -> None:
+        start = time.perf_counter()
+        try:
+            return await super().executemany(command, args, **kwargs)
+        finally:
+            query_stats.record(command, time.perf_counter() - start)
+
+    async def fetch(self, query: str, *args: Any, **kwargs: Any) -> List[Any]:
+        start = time.perf_counter()
+        try:
+            return await super().fetch(query, *args, **kwargs)
+        finally:
+            query_stats.record(query, time.perf_counter() - start)
+
+    async def fetchrow(self, query: str, *args: Any, **kwargs: Any) -> Optional[Any]:
+        start = time.perf_counter()
+        try:
+            return await super().fetchrow(query, *args, **kwargs)
+        finally:
+            query_stats.record(query, time.perf_counter() - start)
+
+    async def fetchval(self, query: str, *args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return await super().fetchval(query, *args, **kwargs)
+        finally:
+            query_stats.record(query, time.perf_counter() - start)
+
+
+class _TimedAcquire:
+    # Wraps the context returned by Pool.acquire, which is both awaited and used with async with.
+    __slots__: Tuple[str, ...] = ('_context',)
+
+    def __init__(self, context: Any) -> None:
+        self._context: Any = context
+
+    async def _timed(self, awaitable: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            query_stats.acquire.record(time.perf_counter() - start)
+
+    def __await__(self) -> Any:
+        return self._timed(self._context).__await__()
+
+    async def __aenter__(self) -> Any:
+        return await self._timed(self._context.__aenter__())
+
+    async def __aexit__(self, *exc_info: Any) -> Any:
+        return await self._context.__aexit__(*exc_info)
+
+
+class InstrumentedPool(asyncpg.Pool):
+    """A :class:`asyncpg.Pool` that times how long callers wait to get a connection.
+
+    This wraps :meth:`acquire`, so both ``await pool.acquire()`` and
+    ``async with pool.acquire()`` are timed. Create it with :meth:`create`.
+    """
+
+    __slots__: Tuple[str, ...] = ()
+
+    @classmethod
+    def create(cls, dsn: Optional[str] = None, **options: Any) -> InstrumentedPool:
+        """Like :func:`asyncpg.create_pool`, which can't be told to use another pool class.
+
+        Options that aren't given use the defaults of :func:`asyncpg.create_pool`,
+        read from its signature so they follow the installed asyncpg.
+        """
+        defaults = {
+            name: parameter.default
+            for name, parameter in inspect.signature(asyncpg.create_pool).parameters.items()
+            if parameter.kind is inspect.Parameter.KEYWORD_ONLY
+        }
+        return cls(dsn, **{**defaults, **options})
+
+    def acquire(self, *, timeout: Optional[float] = None) -> Any:
+        return _TimedAcquire(super().acquire(timeout=timeout))
+
+
+query_stats = QueryTracker()
+queries = QueryRegistry()
+
+queries.register(
+    'tags.get',
+    """
+    SELECT id, name, content, embed, owner_id, guild_id FROM tags
+    WHERE (LOWER(name) = LOWER($1::TEXT) and (guild_id = $2) and (content is not null))
+    OR (id = (
+        SELECT points_to FROM tags
+            WHERE LOWER(name) = LOWER($1::TEXT)
+            AND guild_id = $2
+            AND points_to IS NOT NULL
+        ))
+    LIMIT 1 -- just in case
+    """,
+)
+queries.register(
+    'tags.get_global',
+    """
+    SELECT id, name, content, embed, owner_id, guild_id FROM tags
+    WHERE (LOWER(name) = LOWER($1::TEXT) and (guild_id IS NULL or guild_id = $2) and (content is not null))
+    OR (id = (
+        SELECT points_to FROM tags
+            WHERE LOWER(name) = LOWER($1::TEXT)
+            AND (guild_id IS NULL OR guild_id = $2)
+            AND points_to IS NOT NULL
+        ))
+    ORDER BY guild_id
+        -- if global, we want local tags to
+        -- take priority.
+    LIMIT 1
+        -- when there are global and local
+    """,
+)
+queries.register(
+    'guilds.settings',
+    'SELECT guild_id, muted_role_id, muted_role_mode, min_join_age, mutes FROM guilds WHERE guild_id = $1',
+)
+queries.register('plonks.guild', 'SELECT entity_id FROM plonks WHERE guild_id = $1')
+queries.register('command_config.guild', 'SELECT name, channel_id, whitelist FROM command_config WHERE guild_id = $1')
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import asyncio
+import copy
+import importlib.abc
+import importlib.machinery
+import importlib.util
+import logging
+import sys
+import time
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, NamedTuple, Optional, Sequence, Set, Tuple
+
+if TYPE_CHECKING:
+    from bot import DuckBot
+
+log = logging.getLogger('DuckBot.utils.extensions')
+
+__all__: Tuple[str, ...] = ('ExtensionLoader', 'ExtensionTiming')
+
+
+class ExtensionTiming(NamedTuple):
+    """The startup timeline entry of a single extension.
+
+    All times are in seconds. ``started`` is relative to the moment
+    the loader started loading its first extension.
+    """
+
+    name: str
+    wave: int
+    started: float
+    import_time: float
+    setup_time: float
+    loaded: bool
+
+
+class _TimedLoader(importlib.abc.Loader):
+    # Wraps the loader of an extension to time how long its module takes to execute.
+    def __init__(self, loader: importlib.abc.Loader) -> None:
+        self.loader: importlib.abc.Loader = loader
+        self.elapsed: float = 0.0
+
+    def create_module(self, spec: importlib.machinery.ModuleSpec) -> Optional[ModuleType]:
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module: ModuleType) -> None:
+        start = time.perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.elapsed = time.perf_counter() - start
+            # Puts the real loader back, so this one doesn't outlive the load.
+            module.__loader__ = self.loader
+            if module.__spec__ is not None:
+                module.__spec__.loader = self.loader
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.loader, name)
+
+
+class ExtensionLoader:
+    """Loads extensions in dependency order, loading the ones
+    that don't depend on each other concurrently.
+
+    Parameters
+    ----------
+    bot: :class:`DuckBot`
+        The bot instance.
+    extensions: Mapping[:class:`str`, Sequence[:class:`str`]]
+        A mapping of extension names to the extensions they need loaded first.
+
+    Attributes
+    ----------
+    timeline: List[:class:`ExtensionTiming`]
+        The timings of the last :meth:`load_all` call.
+    """
+
+    __slots__: Tuple[str, ...] = ('bot', 'extensions', 'timeline', '_origin')
+
+    def __init__(self, bot: DuckBot, extensions: Mapping[str, Sequence[str]]) -> None:
+        self.bot: DuckBot = bot
+        self.extensions: Mapping[str, Sequence[str]] = extensions
+        self.timeline: List[ExtensionTiming] = []
+        self._origin: float = 0.0
+
+    def waves(self) -> List[List[str]]:
+        """Groups the extensions into waves, where every extension
+        only depends on extensions of earlier waves.
+
+        Raises
+        ------
+        ValueError
+            An extension depends on an unknown extension, or there is a dependency cycle.
+        """
+        remaining: Dict[str, Set[str]] = {}
+        for name, dependencies in self.extensions.items():
+            unknown = set(dependencies) - self.extensions.keys()
+            if unknown:
+                raise ValueError(f'Extension {name!r} depends on unknown extension(s): {", ".join(sorted(unknown))}')
+            remaining[name] = set(dependencies)
+
+        waves: List[List[str]] = []
+        done: Set[str] = set()
+        while remaining:
+            # Keep the declaration order within a wave, so the logs read naturally.
+            wave = [name for name, dependencies in remaining.items() if dependencies <= done]
+            if not wave:
+                raise ValueError(f'Dependency cycle between extensions: {", ".join(remaining)}')
+
+            for name in wave:
+                del remaining[name]
+            done.update(wave)
+            waves.append(wave)
+
+        return waves
+
+    def _prepare_timed_import(self, name: str) -> Optional[_TimedLoader]:
+        # load_extension always executes the module, even if it was imported before. When the name
+        # is in sys.modules, it takes the spec from there, so a placeholder module whose spec has
+        # a timed loader makes it time that single execution. Nothing runs in between, as there
+        # is no await before load_extension executes the module.
+        if name in self.bot.extensions:
+            return None
+
+        spec = importlib.util.find_spec(name)
+        if spec is None or spec.loader is None:
+            return None
+
+        timed = _TimedLoader(spec.loader)
+        spec = copy.copy(spec)
+        spec.loader = timed
+        sys.modules[name] = importlib.util.module_from_spec(spec)
+        return timed
+
+    async def _load(self, name: str, wave: int) -> bool:
+        started = ended = time.perf_counter()
+        spec_time = 0.0
+        loaded = False
+        previous = sys.modules.get(name)
+        timed: Optional[_TimedLoader] = None
+        try:
+            timed = self._prepare_timed_import(name)
+            spec_time = time.perf_counter() - started
+            loaded = bool(await self.bot.load_extension(name))
+            ended = time.perf_counter()
+        except Exception as e:
+            ended = time.perf_counter()
+            if timed is not None and getattr(sys.modules.get(name), '__loader__', None) is timed:
+                # The module was never executed, so the placeholder must not stay behind.
+                if previous is None:
+                    del sys.modules[name]
+                else:
+                    sys.modules[name] = previous
+            await self.bot.exceptions.add_error(error=e)
+        finally:
+            import_time = spec_time + (timed.elapsed if timed else 0.0)
+            setup_time = max(ended - started - import_time, 0.0)
+            self.timeline.append(
+                ExtensionTiming(
+                    name=name,
+                    wave=wave,
+                    started=started - self._origin,
+                    import_time=import_time,
+                    setup_time=setup_time,
+                    loaded=loaded,
+                )
+            )
+        return loaded
+
+    async def load_all(self) -> bool:
+        """Loads all the extensions.
+
+        Extensions whose dependencies failed to load are skipped.
+
+        Returns
+        -------
+        :class:`bool`
+            Whether every extension was loaded successfully.
+        """
+        self.timeline.clear()
+        self._origin = time.perf_counter()
+        failed: Set[str] = set()
+
+        for index, wave in enumerate(self.waves()):
+            to_load: List[str] = []
+            for name in wave:
+                broken = failed.intersection(self.extensions[name])
+                if broken:
+                    log.warning('Not loading %s, it depends on %s which failed to load.', name, ', '.join(broken))
+                    failed.add(name)
+                else:
+                    to_load.append(name)
+
+            results = await asyncio.gather(*(self._load(name, index) for name in to_load))
+            failed.update(name for name, loaded in zip(to_load, results) if not loaded)
+
+        log.info('Startup timeline:\n%s', self.format_timeline())
+        return not failed
+
+    def format_timeline(self) -> str:
+        """:class:`str`: A human-readable table of the last startup timeline."""
+        lines = [f'{"extension":<34} {"wave":>4} {"start":>9} {"import":>9} {"setup":>9}']
+        for entry in sorted(self.timeline, key=lambda t: t.started):
+            status = '' if entry.loaded else '  FAILED'
+            lines.append(
+                f'{entry.name:<34} {entry.wave:>4} {entry.started * 1000:>7.1f}ms '
+                f'{entry.import_time * 1000:>7.1f}ms {entry.setup_time * 1000:>7.1f}ms{status}'
+            )
+
+        if self.timeline:
+            end = max(t.started + t.import_time + t.setup_time for t in self.timeline)
+            serial = sum(t.import_time + t.setup_time for t in self.timeline)
+            lines.append(f'total {end * 1000:.1f}ms (would be {serial * 1000:.1f}ms serially)')
+        return '\n'.join(lines)
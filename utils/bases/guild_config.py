@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from .database import queries
+
+from asyncpg import Pool
+
+if TYPE_CHECKING:
+    from asyncpg import Connection, Record
+
+__all__: Tuple[str, ...] = ('GuildConfig', 'GuildConfigStore')
+
+CommandConfigEntry = Tuple[str, Optional[int], bool]
+
+
+class GuildConfig:
+    """The per-guild settings that are read on hot paths.
+
+    Prefixes are not stored here, they live in the bot's prefix matchers.
+
+    Attributes
+    ----------
+    guild_id: :class:`int`
+        The guild these settings belong to.
+    muted_role_id: Optional[:class:`int`]
+        The muted role of the guild, if set up.
+    muted_role_mode: :class:`int`
+        The raw value of the muted role's :class:`RoleMode`.
+    min_join_age: Optional[:class:`int`]
+        The minimum account age, in seconds, for new members.
+    mutes: Set[:class:`int`]
+        The members muted through the bot.
+    plonks: Set[:class:`int`]
+        The ignored channel and member ids.
+    command_config: List[Tuple[:class:`str`, Optional[:class:`int`], :class:`bool`]]
+        The ``(name, channel_id, whitelist)`` command permission overrides.
+    """
+
+    __slots__: Tuple[str, ...] = (
+        'guild_id',
+        'muted_role_id',
+        'muted_role_mode',
+        'min_join_age',
+        'mutes',
+        'plonks',
+        'command_config',
+    )
+
+    def __init__(self, guild_id: int) -> None:
+        self.guild_id: int = guild_id
+        self.muted_role_id: Optional[int] = None
+        self.muted_role_mode: int = 0
+        self.min_join_age: Optional[int] = None
+        self.mutes: Set[int] = set()
+        self.plonks: Set[int] = set()
+        self.command_config: List[CommandConfigEntry] = []
+
+    def __repr__(self) -> str:
+        return (
+            f'<GuildConfig guild_id={self.guild_id} muted_role_id={self.muted_role_id} '
+            f'min_join_age={self.min_join_age} mutes={len(self.mutes)} plonks={len(self.plonks)}>'
+        )
+
+    def _load_guild_row(self, row: Record) -> None:
+        self.muted_role_id = row['muted_role_id']
+        self.muted_role_mode = row['muted_role_mode'] or 0
+        self.min_join_age = row['min_join_age']
+        self.mutes = set(row['mutes'] or ())
+
+
+class GuildConfigStore:
+    """An in-memory copy of the per-guild settings.
+
+    The store is bulk loaded once at startup. After that, any guild
+    that isn't in it is known to have no settings, so lookups never
+    have to touch the database unless a guild was invalidated.
+
+    .. container:: operations
+
+        .. describe:: len(x)
+
+            Returns the amount of guilds with settings in memory.
+
+    Attributes
+    ----------
+    ready: :class:`bool`
+        Whether the bulk load has completed.
+    avoided_queries: :class:`int`
+        How many :meth:`fetch` calls were answered from memory.
+    queries: :class:`int`
+        How many :meth:`fetch` calls had to query the database.
+    """
+
+    __slots__: Tuple[str, ...] = ('ready', 'avoided_queries', 'queries', '_configs', '_stale')
+
+    PLONKS_QUERY: str = 'SELECT guild_id, entity_id FROM plonks'
+    COMMAND_CONFIG_QUERY: str = 'SELECT guild_id, name, channel_id, whitelist FROM command_config'
+
+    def __init__(self) -> None:
+        self.ready: bool = False
+        self.avoided_queries: int = 0
+        self.queries: int = 0
+        self._configs: Dict[int, GuildConfig] = {}
+        # guild_id -> times invalidated, so a fetch that raced an invalidation isn't kept.
+        self._stale: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._configs)
+
+    def _get_or_create(self, guild_id: int) -> GuildConfig:
+        try:
+            return self._configs[guild_id]
+        except KeyError:
+            self._configs[guild_id] = config = GuildConfig(guild_id)
+            return config
+
+    def load_guilds(self, records: Iterable[Record]) -> None:
+        """Loads rows of the ``guilds`` table into the store."""
+        for row in records:
+            self._get_or_create(row['guild_id'])._load_guild_row(row)
+
+    def load_plonks(self, records: Iterable[Record]) -> None:
+        """Loads rows of the ``plonks`` table into the store."""
+        for guild_id, entity_id in records:
+            self._get_or_create(guild_id).plonks.add(entity_id)
+
+    def load_command_config(self, records: Iterable[Record]) -> None:
+        """Loads rows of the ``command_config`` table into the store."""
+        for guild_id, name, channel_id, whitelist in records:
+            self._get_or_create(guild_id).command_config.append((name, channel_id, whitelist))
+
+    def get(self, guild_id: int) -> Optional[GuildConfig]:
+        """Gets the settings of a guild without touching the database.
+
+        Parameters
+        ----------
+        guild_id: :class:`int`
+            The guild to get the settings for.
+
+        Returns
+        -------
+        Optional[:class:`GuildConfig`]
+            The settings, or ``None`` if they have to be fetched with :meth:`fetch`.
+        """
+        config = self._configs.get(guild_id)
+        if config is not None or not self.ready or guild_id in self._stale:
+            return config
+
+        # Bulk load is done, so this guild simply has no settings.
+        self._configs[guild_id] = config = GuildConfig(guild_id)
+        return config
+
+    async def fetch(self, guild_id: int, *, connection: Union[Connection, Pool]) -> GuildConfig:
+        """Gets the settings of a guild, loading them from the database if needed.
+
+        Parameters
+        ----------
+        guild_id: :class:`int`
+            The guild to get the settings for.
+        connection: Union[:class:`asyncpg.Connection`, :class:`asyncpg.Pool`]
+            The connection to use if the settings are not in memory.
+
+        Returns
+        -------
+        :class:`GuildConfig`
+            The settings of the guild.
+        """
+        config = self.get(guild_id)
+        if config is not None:
+            self.avoided_queries += 1
+            return config
+
+        self.queries += 1
+        version = self._stale.get(guild_id, 0)
+        config = GuildConfig(guild_id)
+        # One snapshot, so the settings, plonks and command config agree with each other.
+        async with queries.acquire(connection, readonly=True) as conn:
+            row = await queries.fetchrow('guilds.settings', conn, guild_id)
+            plonks = await queries.fetch('plonks.guild', conn, guild_id)
+            command_config = await queries.fetch('command_config.guild', conn, guild_id)
+
+        if row is not None:
+            config._load_guild_row(row)
+        config.plonks = {entity_id for entity_id, in plonks}
+        config.command_config = [(name, channel_id, whitelist) for name, channel_id, whitelist in command_config]
+
+        if self._stale.get(guild_id, 0) != version:
+            # Invalidated while we were fetching, what we have may already be outdated.
+            return config
+
+        if not isinstance(connection, Pool) and connection.is_in_transaction():
+            # May include writes that are rolled back later, so don't keep it.
+            return config
+
+        self._stale.pop(guild_id, None)
+        return self._configs.setdefault(guild_id, config)
+
+    async def refresh(self, guild_id: int, *, connection: Union[Connection, Pool]) -> None:
+        """Reloads the ``guilds`` row of a guild in place.
+
+        Unlike :meth:`invalidate`, the current settings keep being served while
+        this runs, so readers never have to wait for the database.
+
+        Parameters
+        ----------
+        guild_id: :class:`int`
+            The guild to reload.
+        connection: Union[:class:`asyncpg.Connection`, :class:`asyncpg.Pool`]
+            The connection to use.
+        """
+        if guild_id not in self._configs:
+            # Not loaded, the next fetch reads it fresh anyway.
+            return
+
+        version = self._stale.get(guild_id, 0)
+        row = await queries.fetchrow('guilds.settings', connection, guild_id)
+
+        config = self._configs.get(guild_id)
+        if config is None or self._stale.get(guild_id, 0) != version:
+            return
+
+        if row is None:
+            config.muted_role_id = None
+            config.muted_role_mode = 0
+            config.min_join_age = None
+            config.mutes = set()
+        else:
+            config._load_guild_row(row)
+
+    def _writable(self, guild_id: int) -> Optional[GuildConfig]:
+        config = self.get(guild_id)
+        if config is None:
+            # A fetch may be in flight, make sure it doesn't keep what it read.
+            self.invalidate(guild_id)
+        return config
+
+    def add_mute(self, guild_id: int, member_id: int) -> None:
+        """Records that a member was added to ``guilds.mutes``, without reloading the guild."""
+        config = self._writable(guild_id)
+        if config is not None:
+            config.mutes.add(member_id)
+
+    def remove_mute(self, guild_id: int, member_id: int) -> None:
+        """Records that a member was removed from ``guilds.mutes``, without reloading the guild."""
+        config = self._writable(guild_id)
+        if config is not None:
+            config.mutes.discard(member_id)
+
+    def unbind_muted_role(self, guild_id: int) -> None:
+        """Records that the muted role and mutes of a guild were cleared, without reloading the guild."""
+        config = self._writable(guild_id)
+        if config is not None:
+            config.muted_role_id = None
+            config.mutes = set()
+
+    def invalidate(self, guild_id: int) -> None:
+        """Drops the settings of a guild, so the next :meth:`fetch` reloads them.
+
+        This must be called after writing any of the stored settings to the database.
+
+        Parameters
+        ----------
+        guild_id: :class:`int`
+            The guild to invalidate.
+        """
+        self._configs.pop(guild_id, None)
+        self._stale[guild_id] = self._stale.get(guild_id, 0) + 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Dict[:class:`str`, Any]: A JSON serializable summary of the store."""
+        return {
+            'guilds': len(self._configs),
+            'ready': self.ready,
+            'avoided_queries': self.avoided_queries,
+            'queries': self.queries,
+        }
+
+    def clear(self) -> None:
+        """Drops everything and marks the store as not ready."""
+        self.ready = False
+        self._configs.clear()
+        self._stale.clear()
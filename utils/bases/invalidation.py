@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+import logging
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, DefaultDict, Dict, List, NamedTuple, Optional, Set, Tuple, Union
+
+if TYPE_CHECKING:
+    from asyncpg import Connection
+    from asyncpg.pool import PoolConnectionProxy
+
+    from bot import DuckBot
+
+log = logging.getLogger('DuckBot.utils.invalidation')
+
+__all__: Tuple[str, ...] = ('CacheInvalidation', 'InvalidationBus')
+
+
+class CacheInvalidation(NamedTuple):
+    """A change to a table that caches derived from it must account for.
+
+    A ``guild_id`` of ``None`` means the change can affect any guild, e.g. after
+    a ``TRUNCATE`` or a resync, so subscribers should drop everything they hold.
+
+    Attributes
+    ----------
+    table: :class:`str`
+        The table that changed.
+    op: :class:`str`
+        ``INSERT``, ``UPDATE``, ``DELETE``, ``TRUNCATE`` or ``RESYNC``.
+    guild_id: Optional[:class:`int`]
+        The guild of the changed row.
+    key: Any
+        The value of the table's key column of the changed row, if it has one.
+    """
+
+    table: str
+    op: str
+    guild_id: Optional[int]
+    key: Any
+
+    @property
+    def everything(self) -> bool:
+        """:class:`bool`: Whether subscribers should drop everything they cached from the table."""
+        return self.guild_id is None and self.key is None
+
+
+Subscriber = Callable[[CacheInvalidation], Union[None, Awaitable[None]]]
+
+
+class InvalidationBus:
+    """Routes the ``cache_invalidation`` notifications sent by the
+    ``notify_cache_invalidation`` trigger to the caches built from each table.
+
+    Every process listens on the same channel, so a write made by any of them
+    reaches the caches of all of them, including its own.
+
+    Parameters
+    ----------
+    bot: :class:`DuckBot`
+        The bot instance.
+
+    Attributes
+    ----------
+    received: Dict[:class:`str`, :class:`int`]
+        How many notifications were received per table.
+    """
+
+    CHANNEL: str = 'cache_invalidation'
+
+    __slots__: Tuple[str, ...] = ('bot', 'received', '_subscribers', '_tasks')
+
+    def __init__(self, bot: DuckBot) -> None:
+        self.bot: DuckBot = bot
+        self.received: DefaultDict[str, int] = defaultdict(int)
+        self._subscribers: Dict[str, List[Subscriber]] = {}
+        self._tasks: Set[asyncio.Task[None]] = set()
+
+    def subscribe(self, table: str, callback: Subscriber) -> None:
+        """Calls ``callback`` with a :class:`CacheInvalidation` whenever ``table`` changes.
+
+        The callback can be a coroutine function, in which case it is run as a task.
+        """
+        self._subscribers.setdefault(table, []).append(callback)
+
+    def unsubscribe(self, table: str, callback: Subscriber) -> None:
+        """Stops calling a callback registered with :meth:`subscribe`."""
+        try:
+            self._subscribers[table].remove(callback)
+        except (KeyError, ValueError):
+            pass
+
+    async def attach(self, connection: Union[Connection, PoolConnectionProxy]) -> None:
+        """Starts listening for notifications on the given connection."""
+        await connection.add_listener(self.CHANNEL, self._on_notification)
+
+    def _on_notification(self, connection: Connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            data = json.loads(payload)
+            event = CacheInvalidation(data['table'], data['op'], data.get('guild_id'), data.get('key'))
+        except (ValueError, KeyError, TypeError):
+            log.warning('Ignoring malformed cache invalidation payload: %r', payload)
+            return
+
+        self.received[event.table] += 1
+        self.dispatch(event)
+
+    def dispatch(self, event: CacheInvalidation) -> None:
+        """Passes an invalidation to the subscribers of its table."""
+        for callback in tuple(self._subscribers.get(event.table, ())):
+            try:
+                result = callback(event)
+            except Exception as e:
+                log.error('Cache invalidation subscriber %r failed for %r', callback, event, exc_info=e)
+                continue
+
+            if inspect.isawaitable(result):
+                task = asyncio.ensure_future(self._run(callback, event, result))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    async def _run(callback: Subscriber, event: CacheInvalidation, result: Awaitable[None]) -> None:
+        try:
+            await result
+        except Exception as e:
+            log.error('Cache invalidation subscriber %r failed for %r', callback, event, exc_info=e)
+
+    def resync(self) -> None:
+        """Tells every subscriber to drop everything, e.g. after notifications may have been missed."""
+        for table in tuple(self._subscribers):
+            self.dispatch(CacheInvalidation(table, 'RESYNC', None, None))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Dict[:class:`str`, Any]: A JSON serializable summary of the bus."""
+        return {
+            'received': dict(self.received),
+            'subscribers': {table: len(callbacks) for table, callbacks in self._subscribers.items() if callbacks},
+        }
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import bisect
+import time
+from typing import Any, Dict, List, Tuple
+
+__all__: Tuple[str, ...] = ('LatencyStats', 'LatencyHistogram', 'PoolStats', 'TimerStats')
+
+
+class LatencyStats:
+    """A tiny aggregate of timing samples, used to keep an eye on hot paths
+    without pulling in a full blown metrics library.
+
+    Attributes
+    ----------
+    count: :class:`int`
+        The amount of samples recorded.
+    total: :class:`float`
+        The sum of all the samples, in seconds.
+    max: :class:`float`
+        The largest sample recorded, in seconds.
+    last: :class:`float`
+        The last sample recorded, in seconds.
+    """
+
+    __slots__: Tuple[str, ...] = ('count', 'total', 'max', 'last')
+
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.total: float = 0.0
+        self.max: float = 0.0
+        self.last: float = 0.0
+
+    def __repr__(self) -> str:
+        return f'<LatencyStats count={self.count} mean={self.mean * 1000:.2f}ms max={self.max * 1000:.2f}ms>'
+
+    def record(self, seconds: float) -> None:
+        """Records a new sample.
+
+        Parameters
+        ----------
+        seconds: :class:`float`
+            The duration of the sample, in seconds.
+        """
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    @property
+    def mean(self) -> float:
+        """:class:`float`: The mean of all the samples, in seconds."""
+        return self.total / self.count if self.count else 0.0
+
+    def reset(self) -> None:
+        """Resets all the recorded samples."""
+        self.count = 0
+        self.total = self.max = self.last = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Dict[:class:`str`, Any]: A JSON serializable representation of these stats, in milliseconds."""
+        return {
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 3),
+            'mean_ms': round(self.mean * 1000, 3),
+            'max_ms': round(self.max * 1000, 3),
+            'last_ms': round(self.last * 1000, 3),
+        }
+
+
+class LatencyHistogram(LatencyStats):
+    """A :class:`LatencyStats` that also counts samples into fixed buckets,
+    so percentiles can be estimated without keeping every sample around.
+
+    Attributes
+    ----------
+    buckets: List[:class:`int`]
+        The amount of samples in each bucket. The last bucket counts
+        the samples above the largest bound.
+    """
+
+    #: The upper bounds of the buckets, in seconds.
+    BOUNDS: Tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    __slots__: Tuple[str, ...] = ('buckets',)
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.buckets: List[int] = [0] * (len(self.BOUNDS) + 1)
+
+    def record(self, seconds: float) -> None:
+        super().record(seconds)
+        self.buckets[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+
+    def percentile(self, percent: float) -> float:
+        """Estimates a percentile of the samples.
+
+        Parameters
+        ----------
+        percent: :class:`float`
+            The percentile to estimate, between 0 and 100.
+
+        Returns
+        -------
+        :class:`float`
+            The upper bound of the bucket the percentile falls in, in seconds.
+            Never larger than the largest sample.
+        """
+        if not self.count:
+            return 0.0
+
+        target = self.count * percent / 100
+        seen = 0
+        for bound, amount in zip(self.BOUNDS, self.buckets):
+            seen += amount
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def reset(self) -> None:
+        super().reset()
+        self.buckets = [0] * (len(self.BOUNDS) + 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = super().to_dict()
+        data['p50_ms'] = round(self.percentile(50) * 1000, 3)
+        data['p95_ms'] = round(self.percentile(95) * 1000, 3)
+        data['p99_ms'] = round(self.percentile(99) * 1000, 3)
+        data['buckets'] = {
+            **{f'le_{bound * 1000:g}ms': amount for bound, amount in zip(self.BOUNDS, self.buckets)},
+            'inf': self.buckets[-1],
+        }
+        return data
+
+
+class PoolStats:
+    """Connection usage statistics for :meth:`DuckBot.safe_connection`.
+
+    Attributes
+    ----------
+    acquire: :class:`LatencyStats`
+        How long it took to get a connection from the pool.
+    held: :class:`LatencyStats`
+        How long connections were held before being released.
+    transactions: :class:`int`
+        The amount of transactions that were started.
+    readonly: :class:`int`
+        The amount of those transactions that were read-only.
+    rollbacks: :class:`int`
+        The amount of transactions that were rolled back.
+    autocommit: :class:`int`
+        The amount of connections used without a transaction.
+    """
+
+    __slots__: Tuple[str, ...] = ('acquire', 'held', 'transactions', 'readonly', 'rollbacks', 'autocommit', '_since')
+
+    def __init__(self) -> None:
+        self.acquire: LatencyStats = LatencyStats()
+        self.held: LatencyStats = LatencyStats()
+        self.transactions: int = 0
+        self.readonly: int = 0
+        self.rollbacks: int = 0
+        self.autocommit: int = 0
+        self._since: float = time.monotonic()
+
+    def __repr__(self) -> str:
+        return (
+            f'<PoolStats transactions={self.transactions} tps={self.transactions_per_second:.2f} acquire={self.acquire!r}>'
+        )
+
+    @property
+    def transactions_per_second(self) -> float:
+        """:class:`float`: The average amount of transactions started per second since the last reset."""
+        elapsed = time.monotonic() - self._since
+        return self.transactions / elapsed if elapsed > 0 else 0.0
+
+    def reset(self) -> None:
+        """Resets all the recorded statistics."""
+        self.acquire.reset()
+        self.held.reset()
+        self.transactions = self.readonly = self.rollbacks = self.autocommit = 0
+        self._since = time.monotonic()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Dict[:class:`str`, Any]: A JSON serializable representation of these stats."""
+        return {
+            'acquire': self.acquire.to_dict(),
+            'held': self.held.to_dict(),
+            'transactions': self.transactions,
+            'readonly': self.readonly,
+            'rollbacks': self.rollbacks,
+            'autocommit': self.autocommit,
+            'transactions_per_second': round(self.transactions_per_second, 3),
+        }
+
+
+class TimerStats:
+    """Dispatch statistics for the timers of :class:`TimerManager`.
+
+    Attributes
+    ----------
+    claim: :class:`LatencyStats`
+        How long each statement that claimed due timers took.
+    dispatch: :class:`LatencyHistogram`
+        How long the listeners of each timer took to run.
+    lag: :class:`LatencyHistogram`
+        How late each timer was claimed, compared to when it expired.
+    claims: :class:`int`
+        The amount of claim statements that were run.
+    claimed: :class:`int`
+        The amount of timers that were claimed.
+    dispatched: :class:`int`
+        The amount of timers whose listeners finished running.
+    expired_leases: :class:`int`
+        The amount of timers whose lease ran out before their listeners finished,
+        so another process may have run them again.
+    notified: :class:`int`
+        The amount of timers created by other processes that were queued from a notification.
+    """
+
+    __slots__: Tuple[str, ...] = (
+        'claim',
+        'dispatch',
+        'lag',
+        'claims',
+        'claimed',
+        'dispatched',
+        'expired_leases',
+        'notified',
+        '_since',
+    )
+
+    def __init__(self) -> None:
+        self.claim: LatencyStats = LatencyStats()
+        self.dispatch: LatencyHistogram = LatencyHistogram()
+        self.lag: LatencyHistogram = LatencyHistogram()
+        self.claims: int = 0
+        self.claimed: int = 0
+        self.dispatched: int = 0
+        self.expired_leases: int = 0
+        self.notified: int = 0
+        self._since: float = time.monotonic()
+
+    def __repr__(self) -> str:
+        return f'<TimerStats claimed={self.claimed} dispatched={self.dispatched} claim={self.claim!r}>'
+
+    @property
+    def claimed_per_second(self) -> float:
+        """:class:`float`: The average amount of timers claimed per second since the last reset."""
+        elapsed = time.monotonic() - self._since
+        return self.claimed / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def dispatched_per_second(self) -> float:
+        """:class:`float`: The average amount of timers dispatched per second since the last reset."""
+        elapsed = time.monotonic() - self._since
+        return self.dispatched / elapsed if elapsed > 0 else 0.0
+
+    def reset(self) -> None:
+        """Resets all the recorded statistics."""
+        self.claim.reset()
+        self.dispatch.reset()
+        self.lag.reset()
+        self.claims = self.claimed = self.dispatched = self.expired_leases = self.notified = 0
+        self._since = time.monotonic()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Dict[:class:`str`, Any]: A JSON serializable representation of these stats."""
+        return {
+            'claim': self.claim.to_dict(),
+            'dispatch': self.dispatch.to_dict(),
+            'lag': self.lag.to_dict(),
+            'claims': self.claims,
+            'claimed': self.claimed,
+            'dispatched': self.dispatched,
+            'expired_leases': self.expired_leases,
+            'notified': self.notified,
+            'claimed_per_second': round(self.claimed_per_second, 3),
+            'dispatched_per_second': round(self.dispatched_per_second, 3),
+        }
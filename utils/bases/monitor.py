@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import asyncio
+import datetime
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import TYPE_CHECKING, Any, Deque, Dict, NamedTuple, Optional, Tuple
+
+import discord
+
+from .metrics import LatencyHistogram
+
+if TYPE_CHECKING:
+    from bot import DuckBot
+
+log = logging.getLogger('DuckBot.utils.monitor')
+
+__all__: Tuple[str, ...] = ('LoopMonitor', 'LoopStall')
+
+
+class LoopStall(NamedTuple):
+    """A moment where the event loop did not run for longer than
+    :attr:`LoopMonitor.stall_threshold`.
+
+    ``duration`` is how long the loop had been blocked when ``stack`` was sampled,
+    so the real stall may have lasted longer.
+    """
+
+    when: datetime.datetime
+    duration: float
+    stack: str
+
+
+class LoopMonitor:
+    """Keeps an eye on the health of the event loop.
+
+    It measures the loop's lag continuously with a task that sleeps for a fixed
+    interval and records how late it woke up. A watchdog thread checks that this
+    task keeps running. If it doesn't for longer than ``stall_threshold``, the
+    loop is blocked, and the watchdog samples the loop thread's stack to see
+    what is blocking it.
+
+    It also times every event handler that :meth:`DuckBot.dispatch` runs, by event name.
+
+    Parameters
+    ----------
+    bot: :class:`DuckBot`
+        The bot instance.
+    interval: :class:`float`
+        How often, in seconds, to measure the lag.
+    stall_threshold: :class:`float`
+        How long, in seconds, the loop must be blocked before its stack is sampled.
+
+    Attributes
+    ----------
+    lag: :class:`LatencyHistogram`
+        How late the monitor task woke up.
+    events: Dict[:class:`str`, :class:`LatencyHistogram`]
+        How long the handlers of each event took to run.
+    stalls: Deque[:class:`LoopStall`]
+        The most recent stalls, added once the loop is running again.
+    """
+
+    __slots__: Tuple[str, ...] = (
+        'bot',
+        'interval',
+        'stall_threshold',
+        'lag',
+        'events',
+        'stalls',
+        '_task',
+        '_thread',
+        '_stopped',
+        '_heartbeat',
+        '_loop_thread_id',
+    )
+
+    def __init__(self, bot: DuckBot, *, interval: float = 0.5, stall_threshold: float = 1.0) -> None:
+        self.bot: DuckBot = bot
+        self.interval: float = interval
+        self.stall_threshold: float = stall_threshold
+
+        self.lag: LatencyHistogram = LatencyHistogram()
+        self.events: Dict[str, LatencyHistogram] = {}
+        self.stalls: Deque[LoopStall] = deque(maxlen=20)
+
+        self._task: Optional[asyncio.Task[None]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped: threading.Event = threading.Event()
+        self._heartbeat: float = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+
+    def start(self) -> None:
+        """Starts the lag task and the watchdog thread. Must be called from the event loop."""
+        if self._task is not None and not self._task.done():
+            return
+
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        # A fresh event, so a watchdog from a previous start() can't be revived by this one.
+        self._stopped = stopped = threading.Event()
+
+        self._task = self.bot.loop.create_task(self._measure_lag(), name='loop-monitor')
+        self._thread = threading.Thread(target=self._watchdog, args=(stopped,), name='loop-monitor-watchdog', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops the lag task and the watchdog thread."""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._thread = None
+
+    def reset(self) -> None:
+        """Resets the recorded lag, event timings and stalls."""
+        self.lag.reset()
+        self.events.clear()
+        self.stalls.clear()
+
+    def record_event(self, event_name: str, seconds: float) -> None:
+        """Records how long a handler of an event took to run.
+
+        Parameters
+        ----------
+        event_name: :class:`str`
+            The name of the event, e.g. ``on_message``.
+        seconds: :class:`float`
+            How long the handler took, in seconds.
+        """
+        try:
+            histogram = self.events[event_name]
+        except KeyError:
+            self.events[event_name] = histogram = LatencyHistogram()
+        histogram.record(seconds)
+
+    async def _measure_lag(self) -> None:
+        interval = self.interval
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            self.lag.record(max(now - start - interval, 0.0))
+
+    def _watchdog(self, stopped: threading.Event) -> None:
+        # Runs in its own thread: everything here must be safe to do while the loop is blocked.
+        stalled_since: Optional[float] = None
+        while not stopped.wait(self.interval):
+            heartbeat = self._heartbeat
+            blocked_for = time.monotonic() - heartbeat - self.interval
+
+            if blocked_for < self.stall_threshold:
+                stalled_since = None
+                continue
+
+            if stalled_since == heartbeat:
+                # Already sampled this stall.
+                continue
+            stalled_since = heartbeat
+
+            frame = sys._current_frames().get(self._loop_thread_id)  # type: ignore
+            stack = ''.join(traceback.format_stack(frame)) if frame is not None else '<no frame>'
+            stall = LoopStall(discord.utils.utcnow(), blocked_for, stack)
+            try:
+                # The deque is read on the loop, so it is only ever changed there too.
+                # This runs as soon as the loop is unblocked.
+                self.bot.loop.call_soon_threadsafe(self.stalls.append, stall)
+            except RuntimeError:
+                # The loop was closed.
+                return
+            log.warning('Event loop blocked for %.2fs, currently running:\n%s', blocked_for, stack)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Dict[:class:`str`, Any]: A JSON serializable representation of the loop's health."""
+        return {
+            'lag': self.lag.to_dict(),
+            'events': {name: histogram.to_dict() for name, histogram in self.events.items()},
+            'stalls': [
+                {'when': stall.when.isoformat(), 'duration_ms': round(stall.duration * 1000, 3), 'stack': stall.stack}
+                for stall in self.stalls
+            ],
+            'shards': {
+                str(shard_id): round(latency * 1000, 3) if latency == latency else None  # NaN until the first heartbeat
+                for shard_id, latency in self.bot.latencies
+            },
+        }
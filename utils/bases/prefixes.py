@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from typing import Iterable, Optional, Tuple
+
+__all__: Tuple[str, ...] = ('PrefixMatcher',)
+
+
+class PrefixMatcher:
+    """A precompiled set of prefixes for a single guild.
+
+    This is built once whenever the prefixes of a guild change, so that
+    matching a message against them does not allocate anything.
+
+    .. container:: operations
+
+        .. describe:: x in y
+
+            Checks if a prefix is one of the display prefixes.
+
+        .. describe:: len(x)
+
+            Returns the amount of display prefixes.
+
+    Parameters
+    ----------
+    prefixes: Iterable[:class:`str`]
+        The prefixes for the guild, in the order they should be displayed.
+    mentions: Tuple[:class:`str`, ...]
+        The bot's mention forms, which are always matched but never displayed.
+
+    Attributes
+    ----------
+    prefixes: Tuple[:class:`str`, ...]
+        The prefixes, in display order and without the bot's mention.
+    candidates: Tuple[:class:`str`, ...]
+        Every prefix including the mentions, longest first.
+    """
+
+    __slots__: Tuple[str, ...] = ('prefixes', 'candidates')
+
+    def __init__(self, prefixes: Iterable[str], *, mentions: Tuple[str, ...] = ()) -> None:
+        self.prefixes: Tuple[str, ...] = tuple(dict.fromkeys(p for p in prefixes if p))
+        # Longest first so "db." wins over "d" for "db.help"
+        self.candidates: Tuple[str, ...] = tuple(sorted({*self.prefixes, *mentions}, key=len, reverse=True))
+
+    def __repr__(self) -> str:
+        return f'<PrefixMatcher prefixes={self.prefixes!r}>'
+
+    def __contains__(self, prefix: object) -> bool:
+        return prefix in self.prefixes
+
+    def __len__(self) -> int:
+        return len(self.prefixes)
+
+    def match(self, content: str) -> Optional[str]:
+        """Returns the longest prefix the content starts with.
+
+        Parameters
+        ----------
+        content: :class:`str`
+            The content of the message.
+
+        Returns
+        -------
+        Optional[:class:`str`]
+            The matching prefix, or ``None`` if there was no match.
+        """
+        candidates = self.candidates
+        # str.startswith with a tuple runs entirely in C, so
+        # the common case of "not a command" is as cheap as it gets.
+        if not content.startswith(candidates):
+            return None
+
+        for prefix in candidates:
+            if content.startswith(prefix):
+                return prefix
+        return None
@@ -3,9 +3,20 @@ from __future__ import annotations
 import datetime
 import asyncio
 import asyncpg
+import functools
+import heapq
+import json
 import logging
+import os
+import socket
+import uuid
+from time import perf_counter
 from typing import (
+    ClassVar,
+    Iterable,
     List,
+    NamedTuple,
+    Set,
     Optional,
     TYPE_CHECKING,
     Tuple,
@@ -20,10 +31,12 @@ from discord.ext import commands
 from utils import time
 from .context import DuckContext
 from .errors import TimerNotFound
+from .metrics import TimerStats
 
 if TYPE_CHECKING:
     from bot import DuckBot
     from asyncpg import Record, Connection
+    from asyncpg.pool import PoolConnectionProxy
 
 log = logging.getLogger('DuckBot.utils.timer')
 
@@ -33,7 +46,33 @@ if TYPE_CHECKING:
     JSONType = Union[JSONValue, Dict[str, JSONValue], List[JSONValue]]
 
 
-__all__: Tuple[str, ...] = ('Timer', 'TimerManager')
+__all__: Tuple[str, ...] = ('Timer', 'TimerManager', 'TimerOwner')
+
+
+def _utcnow() -> datetime.datetime:
+    # The database stores naive UTC datetimes.
+    return discord.utils.utcnow().replace(tzinfo=None)
+
+
+class TimerOwner(NamedTuple):
+    """Who or what a timer is about.
+
+    These are stored in typed, indexed columns of the ``timers`` table, so that
+    the timers of a user, guild or entity can be found without filtering on ``extra``.
+
+    Attributes
+    ----------
+    user_id: Optional[:class:`int`]
+        The user the timer is about, e.g. the muted member or the one to remind.
+    guild_id: Optional[:class:`int`]
+        The guild the timer is about.
+    entity_id: Optional[:class:`int`]
+        Any other object the timer is about, e.g. a channel or a blacklisted entity.
+    """
+
+    user_id: Optional[int] = None
+    guild_id: Optional[int] = None
+    entity_id: Optional[int] = None
 
 
 class Timer:
@@ -72,9 +111,24 @@ class Timer:
         The time the timer was created.
     expires: :class:`datetime.datetime`
         The time the timer expires.
+    owner: :class:`TimerOwner`
+        Who or what the timer is about.
+    lease_until: Optional[:class:`datetime.datetime`]
+        Until when the process that claimed the timer has to run it, if it was claimed.
     """
 
-    __slots__: Tuple[str, ...] = ('args', 'kwargs', 'precise', 'event', 'id', 'created_at', 'expires', '_cs_event_name')
+    __slots__: Tuple[str, ...] = (
+        'args',
+        'kwargs',
+        'precise',
+        'event',
+        'id',
+        'created_at',
+        'expires',
+        'owner',
+        'lease_until',
+        '_cs_event_name',
+    )
 
     def __init__(self, *, record: Record):
         self.id = record['id']
@@ -87,6 +141,8 @@ class Timer:
         self.event = record['event']
         self.created_at = record['created']
         self.expires = record['expires']
+        self.owner = TimerOwner(record.get('user_id'), record.get('guild_id'), record.get('entity_id'))
+        self.lease_until: Optional[datetime.datetime] = record.get('lease_until')
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Timer):
@@ -129,19 +185,80 @@ class TimerManager:
     Please note this can be inherited in a cog to allow for easy
     timer management.
 
+    The timers that expire within the next :attr:`TIMER_WINDOW` are loaded into an
+    in-memory heap, up to :attr:`TIMER_BATCH` of them, and dispatched from there.
+    The database is only queried again when the window runs out, so it isn't hit
+    once per timer. The database stays the source of truth: the heap only decides
+    when to wake up, and every due timer is then claimed from the database in a
+    single statement, so timers deleted from it meanwhile are skipped.
+
+    Several processes can dispatch timers from the same database. Claiming a timer
+    leases it to this process for :attr:`TIMER_LEASE`, and rows another process is
+    claiming are skipped, so each timer is run by one process. The timer is deleted
+    once its listeners finished. If the process dies before that, the lease runs out
+    and another process runs the timer again. Timers created by other processes are
+    queued from the ``timer_created`` notification, see :meth:`attach_timer_notifications`.
+
+    Claimed timers are run concurrently, at most :attr:`TIMER_CONCURRENCY` at a time.
+    Their events are delivered to the listeners added with :meth:`~discord.ext.commands.Bot.add_listener`
+    or :meth:`~discord.ext.commands.Cog.listener`.
+
     Attributes
     ----------
     bot: :class:`~.DuckBot`
         The bot instance.
+    timer_stats: :class:`TimerStats`
+        The claim and dispatch statistics.
+    timer_worker_id: :class:`str`
+        Identifies this process in the ``claimed_by`` column of the timers it claimed.
+    TIMER_WINDOW: :class:`datetime.timedelta`
+        How far ahead timers are loaded into memory.
+    TIMER_BATCH: :class:`int`
+        The most timers loaded into memory at once.
+    TIMER_CONCURRENCY: :class:`int`
+        The most timers whose listeners run at the same time.
+    TIMER_LEASE: :class:`datetime.timedelta`
+        How long a process has to run the listeners of a timer it claimed,
+        before other processes may claim it again.
+    TIMER_CHANNEL: :class:`str`
+        The channel the ``notify_timer_created`` trigger notifies on.
     """
 
-    __slots__: Tuple[str, ...] = ('name', 'bot', '_have_data', '_current_timer', '_task', '_cs_display_emoji')
+    TIMER_WINDOW: ClassVar[datetime.timedelta] = datetime.timedelta(hours=6)
+    TIMER_BATCH: ClassVar[int] = 500
+    TIMER_CONCURRENCY: ClassVar[int] = 25
+    TIMER_LEASE: ClassVar[datetime.timedelta] = datetime.timedelta(minutes=5)
+    TIMER_CHANNEL: ClassVar[str] = 'timer_created'
+
+    __slots__: Tuple[str, ...] = (
+        'name',
+        'bot',
+        '_timer_heap',
+        '_queued_timers',
+        '_timer_window_end',
+        '_timer_wakeup',
+        '_timer_slots',
+        '_timer_tasks',
+        'timer_stats',
+        'timer_worker_id',
+        '_task',
+        '_cs_display_emoji',
+    )
 
     def __init__(self, bot: DuckBot):
         self.bot: DuckBot = bot
 
-        self._have_data = asyncio.Event()
-        self._current_timer = None
+        # (expires, id), the id breaks ties. Only the ids are needed, timers are claimed from the database.
+        self._timer_heap: List[Tuple[datetime.datetime, int]] = []
+        self._queued_timers: Set[int] = set()
+        # Every timer that expires before this is in the heap. None until the first load.
+        self._timer_window_end: Optional[datetime.datetime] = None
+        self._timer_wakeup = asyncio.Event()
+        self._timer_slots = asyncio.Semaphore(self.TIMER_CONCURRENCY)
+        # The timers this process claimed and is running, by ID.
+        self._timer_tasks: Dict[int, asyncio.Task[None]] = {}
+        self.timer_stats: TimerStats = TimerStats()
+        self.timer_worker_id: str = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
         self._task = bot.loop.create_task(self.dispatch_timers())
 
     @discord.utils.cached_slot_property('_cs_display_emoji')
@@ -184,97 +301,224 @@ class TimerManager:
         embed.add_field(name='No worries!', value='I\'ve contacted our developers and they\'ll be looking into it.')
         return await ctx.send(embed=embed)
 
-    async def get_active_timer(self, *, connection: Optional[Connection] = None, days: int = 7) -> Optional[Timer]:
-        """Called to get the most current active timer in the database. This timer is expired and should be dispatched.
-
-        Parameters
-        ----------
-        connection: Optional[:class:`asyncpg.Connection`]
-            The connection to use.
-        days: :class:`int`
-            The number of days to look back.
-
-        Returns
-        -------
-        Optional[:class:`Timer`]
-            The timer that is expired and should be dispatched.
+    def _queue_timer(self, expires: datetime.datetime, timer_id: int) -> None:
+        if timer_id in self._queued_timers:
+            return
+        self._queued_timers.add(timer_id)
+        heapq.heappush(self._timer_heap, (expires, timer_id))
+        if self._timer_heap[0][1] == timer_id:
+            # It is due sooner than whatever the dispatch loop is waiting for.
+            self._timer_wakeup.set()
+
+    async def _refill_timers(self, now: datetime.datetime) -> None:
+        """Loads the timers that expire within the next :attr:`TIMER_WINDOW` into the heap.
+
+        Timers leased to a process, this one included, are left out. The window instead ends
+        when the first of those leases runs out, so the timer is loaded again if its process
+        didn't get to delete it.
         """
-        query = f"SELECT * FROM timers WHERE (expires IS NOT NULL AND expires < (CURRENT_DATE + $1::interval)) ORDER BY expires LIMIT 1;"
-        con = connection or self.bot.pool
-
-        record = await con.fetchrow(query, datetime.timedelta(days=days))
-        return Timer(record=record) if record else None
-
-    async def wait_for_active_timers(self, *, days: int = 7) -> Optional[Timer]:
-        """Waity for a timer that has expired. This will wait until a timer is expired and should be dispatched.
+        until = now + self.TIMER_WINDOW
+        query = """
+            SELECT * FROM timers
+            WHERE expires < $1 AND (lease_until IS NULL OR lease_until <= (NOW() AT TIME ZONE 'UTC'))
+            ORDER BY expires
+            LIMIT $2;
+        """
+        lease_query = """
+            SELECT MIN(lease_until) FROM timers
+            WHERE lease_until > (NOW() AT TIME ZONE 'UTC') AND expires < $1;
+        """
+        # One snapshot, so a timer whose lease runs out between the queries isn't missed by both.
+        async with self.bot.safe_connection(readonly=True) as conn:
+            records = await conn.fetch(query, until, self.TIMER_BATCH)
+            first_lease_end: Optional[datetime.datetime] = await conn.fetchval(lease_query, until)
+
+        for record in records:
+            if record['id'] not in self._timer_tasks:
+                # Still running here even though its lease ran out, it is deleted once done.
+                self._queue_timer(record['expires'], record['id'])
+
+        if len(records) >= self.TIMER_BATCH:
+            # Only the timers before the last one loaded are known to all be in the heap.
+            # They are all claimable, so the window moves on as they are claimed.
+            until = records[-1]['expires']
+        if first_lease_end is not None and first_lease_end < until:
+            # Never in the past, even if the clock of the database is behind ours.
+            until = max(first_lease_end, now + datetime.timedelta(seconds=1))
+        self._timer_window_end = until
+        log.debug('Loaded %s timers expiring before %s', len(records), until)
+
+    async def attach_timer_notifications(self, connection: Union[Connection, PoolConnectionProxy]) -> None:
+        """Starts listening for the timers created by any process on the given connection.
+
+        The timers that were loaded are loaded again, since some may have
+        been created while nothing was listening.
+        """
+        await connection.add_listener(self.TIMER_CHANNEL, self._on_timer_notification)
+        self._timer_window_end = None
+        self._timer_wakeup.set()
 
-        Parameters
-        ----------
-        days: :class:`int`
-            The number of days to look back.
+    def _on_timer_notification(self, connection: Connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            data = json.loads(payload)
+            timer_id = int(data['id'])
+            expires = datetime.datetime.fromtimestamp(float(data['expires']), datetime.timezone.utc).replace(tzinfo=None)
+        except (ValueError, KeyError, TypeError):
+            log.warning('Ignoring malformed timer notification payload: %r', payload)
+            return
 
-        Returns
-        -------
-        :class:`Timer`
-            The timer that is expired and should be dispatched.
-        """
-        # Please note the return value in the doc is different than the one in the function.
-        # This function actually only returns a Timer but pyright doesn't like typehinting that.
-        timer = await self.get_active_timer(days=days)
-        if timer is not None:
-            self._have_data.set()
-            return timer
+        # Timers past the loaded window are picked up when it is refilled.
+        window_end = self._timer_window_end
+        if window_end is None or expires >= window_end or timer_id in self._queued_timers:
+            return
 
-        self._have_data.clear()
-        self._current_timer = None
-        await self._have_data.wait()
-        return await self.get_active_timer(days=days)
+        self.timer_stats.notified += 1
+        self._queue_timer(expires, timer_id)
 
-    async def call_timer(self, timer: Timer) -> None:
-        """Call an expired timer to dispatch it.
+    async def _claim_due_timers(self, now: datetime.datetime, limit: int) -> List[Timer]:
+        """Leases up to ``limit`` expired timers to this process and returns them.
 
-        Parameters
-        ----------
-        timer: :class:`Timer`
-            The timer to dispatch.
+        Rows locked by another process claiming timers are skipped instead of waited on,
+        as are the timers leased to another process and those this process is still running.
+        Leases are taken and checked against the clock of the database, so they hold even if
+        the clocks of the processes drift apart.
         """
-        try:
-            await self.delete_timer(timer.id)
-        except TimerNotFound:
-            # We don't want to call a
-            # timer that was deleted.
-            return
-
+        query = """
+            UPDATE timers SET claimed_by = $3, lease_until = (NOW() AT TIME ZONE 'UTC') + $4::INTERVAL
+            WHERE id IN (
+                SELECT id FROM timers
+                WHERE expires <= $1
+                  AND (lease_until IS NULL OR lease_until <= (NOW() AT TIME ZONE 'UTC'))
+                  AND NOT id = ANY($5::BIGINT[])
+                ORDER BY expires
+                LIMIT $2
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING *;
+        """
+        start = perf_counter()
+        records = await self.bot.pool.fetch(
+            query, now, limit, self.timer_worker_id, self.TIMER_LEASE, list(self._timer_tasks)
+        )
+
+        stats = self.timer_stats
+        stats.claim.record(perf_counter() - start)
+        stats.claims += 1
+        stats.claimed += len(records)
+
+        timers = sorted((Timer(record=record) for record in records), key=lambda timer: timer.expires)
+        for timer in timers:
+            stats.lag.record(max((now - timer.expires).total_seconds(), 0.0))
+        return timers
+
+    async def _dispatch_due_timers(self, now: datetime.datetime, due: Set[int]) -> None:
+        """Claims and starts the expired timers, ``due`` being the ones taken off the heap."""
+        while True:
+            # Only as many timers are claimed as can start right away, so their
+            # leases don't run out while they wait for a slot.
+            await self._timer_slots.acquire()
+            limit = self.TIMER_CONCURRENCY - len(self._timer_tasks)
+            try:
+                timers = await self._claim_due_timers(now, limit)
+            except BaseException:
+                self._timer_slots.release()
+                raise
+
+            if not timers:
+                self._timer_slots.release()
+                break
+
+            claimed_at = perf_counter()
+            for index, timer in enumerate(timers):
+                if index:
+                    # Never waits, ``limit`` slots were free.
+                    await self._timer_slots.acquire()
+                due.discard(timer.id)
+                task = asyncio.create_task(self._run_timer(timer, claimed_at))
+                self._timer_tasks[timer.id] = task
+                task.add_done_callback(functools.partial(self._on_timer_done, timer.id))
+
+            if len(timers) < limit:
+                break
+
+        if due:
+            # Skipped, most likely because another process is claiming them. Load the
+            # window again, which picks up when their leases run out, instead of
+            # forgetting them until the window ends.
+            self._timer_window_end = None
+
+    def _on_timer_done(self, timer_id: int, task: asyncio.Task[None]) -> None:
+        self._timer_tasks.pop(timer_id, None)
+        self._timer_slots.release()
+
+    async def _run_timer(self, timer: Timer, claimed_at: float) -> None:
         log.debug('Dispatching timer %s with event %s', timer.id, timer.event)
+        event = f'on_{timer.event_name}'
         if timer.precise:
-            self.bot.dispatch(timer.event_name, *timer.args, **timer.kwargs)
+            args, kwargs = timer.args, timer.kwargs
         else:
-            self.bot.dispatch(timer.event_name, timer)
+            args, kwargs = (timer,), {}
+
+        start = perf_counter()
+        listeners = self.bot.extra_events.get(event, ())
+        # _run_event handles the errors of each listener, like dispatch() would.
+        await asyncio.gather(*(self.bot._run_event(listener, event, *args, **kwargs) for listener in listeners))
+        end = perf_counter()
+        self.timer_stats.dispatch.record(end - start)
+        self.timer_stats.dispatched += 1
+
+        if end - claimed_at >= self.TIMER_LEASE.total_seconds():
+            self.timer_stats.expired_leases += 1
+            log.warning('Timer %s with event %s outlived its lease, it may have run twice', timer.id, timer.event)
+
+        # Only delete it if it wasn't claimed again since, the process that did will.
+        query = 'DELETE FROM timers WHERE id = $1 AND claimed_by = $2;'
+        try:
+            await self.bot.pool.execute(query, timer.id, self.timer_worker_id)
+        except (OSError, asyncpg.PostgresError) as e:
+            # The lease runs out, and the timer is run again.
+            log.error('Failed to delete timer %s after dispatching it', timer.id, exc_info=e)
 
     async def dispatch_timers(self):
         """The main dispatch loop. This will wait for a timer to expire and dispatch it.
         Please note if you use this class, you need to cancel the task when you're done
         with it.
         """
+        heap = self._timer_heap
         try:
             while not self.bot.is_closed():
-                # can only asyncio.sleep for up to ~48 days reliably
-                # so we're gonna cap it off at 40 days
-                # see: http://bugs.python.org/issue20493
-                timer = self._current_timer = await self.wait_for_active_timers(days=40)
-                if not timer:
-                    log.warning('Timer was supposted to be here, but isn\'t.. oh no.')
-                    return
-
-                now = datetime.datetime.utcnow()
-                if timer.expires >= now:
-                    to_sleep = (timer.expires - now).total_seconds()
-                    await asyncio.sleep(to_sleep)
-
-                await self.call_timer(timer)
+                now = _utcnow()
+                if self._timer_window_end is None or now >= self._timer_window_end:
+                    await self._refill_timers(now)
+
+                if heap and heap[0][0] <= now:
+                    due: Set[int] = set()
+                    while heap and heap[0][0] <= now:
+                        _, timer_id = heapq.heappop(heap)
+                        self._queued_timers.discard(timer_id)
+                        due.add(timer_id)
+                    await self._dispatch_due_timers(now, due)
+
+                window_end = self._timer_window_end
+                if window_end is None:
+                    # Asked for a reload meanwhile.
+                    continue
+                next_at = min(heap[0][0], window_end) if heap else window_end
+                delay = (next_at - _utcnow()).total_seconds()
+                if delay <= 0:
+                    continue
+
+                # _queue_timer sets this when it queues a timer that is due sooner.
+                self._timer_wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._timer_wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
         except asyncio.CancelledError:
             raise
         except (OSError, discord.ConnectionClosed, asyncpg.PostgresConnectionError):
+            # Timers may have been created or deleted meanwhile, load them again.
+            self._timer_window_end = None
             self._task.cancel()
             self._task = self.bot.loop.create_task(self.dispatch_timers())
 
@@ -285,6 +529,7 @@ class TimerManager:
         *args: JSONType,
         now: Optional[datetime.datetime] = None,
         precise: bool = True,
+        owner: Optional[TimerOwner] = None,
         **kwargs: JSONType,
     ) -> Timer:
         """Used to create a timer in the database and dispatch it.
@@ -301,6 +546,8 @@ class TimerManager:
         precise: :class:`bool`
             Whether or not to dispatch the timer listener with the timer's args and kwargs. If ``False``, only
             the timer will be passed to the listener. Defaults to ``True``.
+        owner: Optional[:class:`TimerOwner`]
+            Who or what the timer is about. Set this for any timer that has to be looked up later.
         **kwargs: Dict[:class:`str`, Any]
             A dictionary of keyword arguments to be passed to :class:`Timer.kwargs`. Please note each element
             in this dictionary must be JSON serializable.
@@ -311,38 +558,35 @@ class TimerManager:
         when = when.astimezone(datetime.timezone.utc).replace(tzinfo=None)
         now = (now or discord.utils.utcnow()).astimezone(datetime.timezone.utc).replace(tzinfo=None)
 
-        delta = (when - now).total_seconds()
-
-        query = f"""INSERT INTO timers (event, extra, expires, created, precise)
-                   VALUES ($1, $2::jsonb, $3, $4, $5)
+        owner = owner or TimerOwner()
+        query = f"""INSERT INTO timers (event, extra, expires, created, precise, user_id, guild_id, entity_id)
+                   VALUES ($1, $2::jsonb, $3, $4, $5, $6, $7, $8)
                    RETURNING *;
                 """
-        sanitized_args = (event, {'args': args, 'kwargs': kwargs}, when, now, precise)
+        sanitized_args = (event, {'args': args, 'kwargs': kwargs}, when, now, precise, *owner)
 
-        async with self.bot.safe_connection() as conn:
+        async with self.bot.safe_connection(transaction=False) as conn:
             row = await conn.fetchrow(query, *sanitized_args)
 
-        # only set the data check if it can be waited on
-        if delta <= (86400 * 40):  # 40 days
-            self._have_data.set()
-
-        # check if this timer is earlier than our currently run timer
-        if self._current_timer and when < self._current_timer.expires:
-            # cancel the task and re-run it
-            self._task.cancel()
-            self._task = self.bot.loop.create_task(self.dispatch_timers())
         if not row:
             raise RuntimeError('Record not found')
         timer = Timer(record=row)
+
+        # Timers past the loaded window are picked up when it is refilled.
+        window_end = self._timer_window_end
+        if window_end is not None and timer.expires < window_end:
+            self._queue_timer(timer.expires, timer.id)
         return timer
 
-    async def get_timer(self, id: int) -> Timer:
+    async def get_timer(self, id: int, *, connection: Optional[Connection] = None) -> Timer:
         """Used to get a timer from it's ID.
 
         Parameters
         ----------
         id: :class:`int`
             The ID of the timer to get.
+        connection: Optional[:class:`asyncpg.Connection`]
+            The connection to use.
 
         Returns
         -------
@@ -354,21 +598,23 @@ class TimerManager:
         TimerNotFound
             A timer with that ID does not exist.
         """
-        async with self.bot.safe_connection() as conn:
-            data = await conn.fetchrow(f'SELECT * FROM timers WHERE id = $1', id)
+        con = connection or self.bot.pool
+        data = await con.fetchrow('SELECT * FROM timers WHERE id = $1', id)
 
         if not data:
             raise TimerNotFound(id)
 
         return Timer(record=data)
 
-    async def delete_timer(self, id: int) -> None:
+    async def delete_timer(self, id: int, *, connection: Optional[Connection] = None) -> None:
         """Delete a timer using it's ID.
 
         Parameters
         ----------
         id: :class:`int`
             The ID of the timer to delete.
+        connection: Optional[:class:`asyncpg.Connection`]
+            The connection to use.
 
         Raises
         ------
@@ -376,13 +622,36 @@ class TimerManager:
             A timer with that ID does not exist, so there is nothing
             to delete.
         """
-        async with self.bot.safe_connection() as conn:
-            data = await conn.fetchrow(f'SELECT * FROM timers WHERE id = $1', id)
+        con = connection or self.bot.pool
+        deleted = await con.fetchval('DELETE FROM timers WHERE id = $1 RETURNING id', id)
 
-            if not data:
-                raise TimerNotFound(id)
+        if deleted is None:
+            raise TimerNotFound(id)
 
-            await conn.execute(f'DELETE FROM timers WHERE id = $1', id)
+    async def delete_timers(self, ids: Iterable[int], *, connection: Optional[Connection] = None) -> List[int]:
+        """Deletes many timers at once using their IDs.
+
+        Unlike :meth:`delete_timer`, IDs that don't exist are ignored.
+
+        Parameters
+        ----------
+        ids: Iterable[:class:`int`]
+            The IDs of the timers to delete.
+        connection: Optional[:class:`asyncpg.Connection`]
+            The connection to use.
+
+        Returns
+        -------
+        List[:class:`int`]
+            The IDs of the timers that were deleted.
+        """
+        ids = list(ids)
+        if not ids:
+            return []
+
+        con = connection or self.bot.pool
+        records = await con.fetch('DELETE FROM timers WHERE id = ANY($1::BIGINT[]) RETURNING id', ids)
+        return [record['id'] for record in records]
 
     async def fetch_timers(self) -> List[Timer]:
         """Used to fetch all timers from the database.
@@ -392,7 +661,7 @@ class TimerManager:
         :class:`list`
             A list of :class:`Timer` objects.
         """
-        async with self.bot.safe_connection() as conn:
+        async with self.bot.safe_connection(transaction=False) as conn:
             data = await conn.fetch(f'SELECT * FROM timers')
 
         return [Timer(record=row) for row in data]
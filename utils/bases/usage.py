@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import datetime
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from .metrics import LatencyStats
+
+if TYPE_CHECKING:
+    from bot import DuckBot
+
+log = logging.getLogger('DuckBot.utils.usage')
+
+__all__: Tuple[str, ...] = ('CommandUsageRecorder',)
+
+UsageRow = Tuple[Optional[int], int, str, datetime.datetime]
+
+
+class CommandUsageRecorder:
+    """A write-behind buffer for the ``commands`` table.
+
+    Rows are kept in memory and written in a single ``COPY`` either
+    every ``interval`` seconds, or as soon as ``max_size`` rows are buffered,
+    so invoking a command never has to wait on the database.
+
+    Parameters
+    ----------
+    bot: :class:`DuckBot`
+        The bot instance.
+    max_size: :class:`int`
+        The amount of buffered rows that triggers an early flush.
+    interval: :class:`float`
+        The time, in seconds, between periodic flushes.
+
+    Attributes
+    ----------
+    flush_latency: :class:`LatencyStats`
+        How long each flush took to write to the database.
+    max_depth: :class:`int`
+        The deepest the buffer has been since startup.
+    rows_written: :class:`int`
+        The amount of rows that were written to the database.
+    rows_dropped: :class:`int`
+        The amount of rows that were discarded after the database failed to accept them.
+    """
+
+    __slots__: Tuple[str, ...] = (
+        'bot',
+        'max_size',
+        'interval',
+        'flush_latency',
+        'max_depth',
+        'rows_written',
+        'rows_dropped',
+        '_buffer',
+        '_lock',
+        '_wakeup',
+        '_task',
+    )
+
+    def __init__(self, bot: DuckBot, *, max_size: int = 250, interval: float = 15.0) -> None:
+        self.bot: DuckBot = bot
+        self.max_size: int = max_size
+        self.interval: float = interval
+
+        self.flush_latency: LatencyStats = LatencyStats()
+        self.max_depth: int = 0
+        self.rows_written: int = 0
+        self.rows_dropped: int = 0
+
+        self._buffer: List[UsageRow] = []
+        self._lock: asyncio.Lock = asyncio.Lock()
+        self._wakeup: asyncio.Event = asyncio.Event()
+        self._task: Optional[asyncio.Task[None]] = None
+
+    @property
+    def depth(self) -> int:
+        """:class:`int`: The amount of rows currently waiting to be written."""
+        return len(self._buffer)
+
+    def record(self, guild_id: Optional[int], user_id: int, command: str, timestamp: datetime.datetime) -> None:
+        """Buffers a command usage row. This never touches the database.
+
+        Parameters
+        ----------
+        guild_id: Optional[:class:`int`]
+            The guild the command was used in, if any.
+        user_id: :class:`int`
+            The user that invoked the command.
+        command: :class:`str`
+            The qualified name of the command.
+        timestamp: :class:`datetime.datetime`
+            When the command was invoked.
+        """
+        self._buffer.append((guild_id, user_id, command, timestamp))
+
+        depth = len(self._buffer)
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+        if depth >= self.max_size:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        """Starts the periodic flush task."""
+        if self._task is None or self._task.done():
+            self._task = self.bot.loop.create_task(self._flush_loop(), name='command-usage-flush')
+
+    async def close(self) -> None:
+        """Stops the periodic flush task and writes whatever is left in the buffer."""
+        task, self._task = self._task, None
+        if task is not None:
+            # Holding the lock waits for an in-flight flush to finish, so the task
+            # is never cancelled in the middle of writing the rows it took.
+            async with self._lock:
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+        await self.flush()
+
+    async def flush(self) -> int:
+        """Writes all buffered rows to the database.
+
+        Returns
+        -------
+        :class:`int`
+            The amount of rows that were written.
+        """
+        async with self._lock:
+            if not self._buffer:
+                return 0
+
+            rows, self._buffer = self._buffer, []
+            start = time.perf_counter()
+            try:
+                async with self.bot.pool.acquire() as conn:
+                    await conn.copy_records_to_table(
+                        'commands', records=rows, columns=('guild_id', 'user_id', 'command', 'timestamp')
+                    )
+            except asyncio.CancelledError:
+                self._buffer[:0] = rows
+                raise
+            except Exception as e:
+                # Put the rows back so they're retried on the next flush, but
+                # never let a database outage make the buffer grow unbounded.
+                room = max(self.max_size * 4 - len(self._buffer), 0)
+                self._buffer[:0] = rows[-room:] if room else []
+                self.rows_dropped += len(rows) - min(room, len(rows))
+                log.error('Failed to flush %s command usage rows', len(rows), exc_info=e)
+                return 0
+
+            elapsed = time.perf_counter() - start
+            self.flush_latency.record(elapsed)
+            self.rows_written += len(rows)
+            log.debug('Flushed %s command usage rows in %.2fms', len(rows), elapsed * 1000)
+            return len(rows)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+            self._wakeup.clear()
+            await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Dict[:class:`str`, Any]: The current buffer statistics."""
+        return {
+            'depth': self.depth,
+            'max_depth': self.max_depth,
+            'rows_written': self.rows_written,
+            'rows_dropped': self.rows_dropped,
+            'flush': self.flush_latency.to_dict(),
+        }
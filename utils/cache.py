@@ -7,8 +7,12 @@
 import inspect
 import asyncio
 import enum
+import heapq
+import itertools
 import time
 
+from collections import OrderedDict
+from collections.abc import MutableMapping
 from functools import wraps
 from typing import Tuple
 
@@ -19,14 +23,19 @@ __all__: Tuple[str, ...] = (
     'cache',
     'Strategy',
     'ExpiringCache',
+    'CacheKeys',
+    'CacheStats',
 )
 
 
-# noinspection PyShadowingNames
-def _wrap_and_store_coroutine(cache, key, coro):
+def _wrap_and_store_coroutine(store, key, coro, stats):
     async def func():
-        value = await coro
-        cache[key] = value
+        try:
+            value = await coro
+        except BaseException:
+            stats.failures += 1
+            raise
+        store(key, value)
         return value
 
     return func()
@@ -39,122 +48,368 @@ def _wrap_new_coroutine(value):
     return new_coroutine()
 
 
-class ExpiringCache(dict):
-    def __init__(self, seconds):
-        self.__ttl = seconds
-        super().__init__()
-
-    def __verify_cache_integrity(self):
-        # Have to do this in two steps...
-        current_time = time.monotonic()
-        to_remove = [k for (k, (_, t)) in self.items() if current_time > (t + self.__ttl)]
-        for k in to_remove:
-            del self[k]
+class ExpiringCache(MutableMapping):
+    """A mapping whose entries expire ``seconds`` after they were last set.
+
+    Expiry times are kept in a min-heap, so expired entries are dropped from the
+    head of the heap as they are found instead of scanning every entry on each
+    read. Overwritten and deleted entries leave stale heap nodes behind that are
+    skipped when popped, and the heap is rebuilt once they outnumber live entries.
+
+    Parameters
+    ----------
+    seconds: :class:`float`
+        How long an entry lives after being set.
+    maxsize: Optional[:class:`int`]
+        The maximum amount of entries. When full, the least recently
+        set entry is evicted, or the least recently used one if ``lru`` is set.
+    lru: :class:`bool`
+        Whether reading an entry counts as using it for eviction purposes.
+    """
+
+    __slots__ = ('ttl', 'maxsize', 'lru', '_data', '_heap', '_counter', '_callback')
+
+    def __init__(self, seconds, *, maxsize=None, lru=False):
+        self.ttl = seconds
+        self.maxsize = maxsize
+        self.lru = lru
+        # key -> (value, expires, sequence), ordered from least to most recently set (or used).
+        self._data = OrderedDict()
+        # (expires, sequence, key), the sequence tells live nodes apart and keeps keys from being compared.
+        self._heap = []
+        self._counter = itertools.count()
+        self._callback = None
+
+    def set_callback(self, callback):
+        """Sets a ``callback(key, value)`` called when an entry expires or is evicted to make room."""
+        self._callback = callback
+
+    def _expire(self, now):
+        heap = self._heap
+        data = self._data
+        while heap and heap[0][0] <= now:
+            _, sequence, key = heapq.heappop(heap)
+            entry = data.get(key)
+            if entry is not None and entry[2] == sequence:
+                del data[key]
+                if self._callback is not None:
+                    self._callback(key, entry[0])
 
     def __contains__(self, key):
-        self.__verify_cache_integrity()
-        return super().__contains__(key)
+        self._expire(time.monotonic())
+        return key in self._data
 
     def __getitem__(self, key):
-        self.__verify_cache_integrity()
-        return super().__getitem__(key)
+        self._expire(time.monotonic())
+        value = self._data[key][0]
+        if self.lru:
+            self._data.move_to_end(key)
+        return value
 
     def __setitem__(self, key, value):
-        super().__setitem__(key, (value, time.monotonic()))
+        self.set(key, value)
+
+    def __delitem__(self, key):
+        # The heap node goes stale and is skipped once it is popped.
+        del self._data[key]
+
+    def __iter__(self):
+        self._expire(time.monotonic())
+        return iter(list(self._data))
+
+    def __len__(self):
+        self._expire(time.monotonic())
+        return len(self._data)
+
+    def __repr__(self):
+        return f'<ExpiringCache ttl={self.ttl} maxsize={self.maxsize} lru={self.lru} size={len(self._data)}>'
+
+    def set(self, key, value, *, ttl=None):
+        """Sets an entry, optionally with its own time to live instead of :attr:`ttl`."""
+        now = time.monotonic()
+        self._expire(now)
+
+        sequence = next(self._counter)
+        expires = now + (self.ttl if ttl is None else ttl)
+        data = self._data
+        data[key] = (value, expires, sequence)
+        data.move_to_end(key)
+        heapq.heappush(self._heap, (expires, sequence, key))
+
+        if self.maxsize is not None and len(data) > self.maxsize:
+            evicted, entry = data.popitem(last=False)
+            if self._callback is not None:
+                self._callback(evicted, entry[0])
+
+        if len(self._heap) > 2 * len(data) + 64:
+            self._heap = [(expires, sequence, key) for key, (_, expires, sequence) in data.items()]
+            heapq.heapify(self._heap)
+
+    def clear(self):
+        self._data.clear()
+        self._heap.clear()
+
+
+class CacheKeys:
+    """Builds the keys of a cached function and keeps the secondary indexes of its cache.
+
+    Keys are tuples. When ``key_args`` is given, they hold the values of those arguments,
+    looked up by position or keyword, so ``f(1)`` and ``f(guild_id=1)`` share an entry.
+    Otherwise they hold every positional argument followed by the keyword arguments,
+    minus the ones in ``skip_kwargs`` or all of them if ``ignore_kwargs`` is set.
+    Arguments that make up a key must be hashable.
+
+    Every argument in ``index`` gets a mapping of its values to the keys that contain them,
+    so all the entries for, say, a guild can be found without looking at any other entry.
+
+    Parameters
+    ----------
+    func: Callable
+        The cached function.
+    key_args: Optional[Sequence[:class:`str`]]
+        The names of the arguments that make up a key.
+    index: Sequence[:class:`str`]
+        The names of the arguments to index. These must be part of ``key_args``.
+    ignore_kwargs: :class:`bool`
+        Whether to leave keyword arguments out of the key when ``key_args`` is not given.
+    skip_kwargs: Sequence[:class:`str`]
+        Keyword arguments to always leave out of the key when ``key_args`` is not given.
+    """
+
+    __slots__ = ('ignore_kwargs', 'skip_kwargs', '_positions', '_indexes')
+
+    def __init__(self, func, key_args=None, index=(), ignore_kwargs=False, skip_kwargs=('connection', 'pool')):
+        self.ignore_kwargs = ignore_kwargs
+        self.skip_kwargs = frozenset(skip_kwargs)
+        self._positions = None
+        # argument name -> (position in the key, {argument value: {keys}})
+        self._indexes = {}
+
+        if key_args is None:
+            if index:
+                raise ValueError('Indexing cache keys requires key_args')
+            return
+
+        parameters = list(inspect.signature(func).parameters.values())
+        positions = []
+        for name in key_args:
+            for position, parameter in enumerate(parameters):
+                if parameter.name == name:
+                    break
+            else:
+                raise ValueError(f'{func.__qualname__} has no argument named {name!r}')
+
+            if parameter.kind not in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD):
+                position = None
+            default = None if parameter.default is parameter.empty else parameter.default
+            positions.append((name, position, default))
+        self._positions = tuple(positions)
+
+        for name in index:
+            if name not in key_args:
+                raise ValueError(f'Indexed argument {name!r} must be one of the key_args')
+            self._indexes[name] = (key_args.index(name), {})
+
+    def make(self, args, kwargs):
+        """Builds the key of a call."""
+        positions = self._positions
+        if positions is None:
+            if self.ignore_kwargs or not kwargs:
+                return args
+            skip = self.skip_kwargs
+            return args + tuple(item for item in kwargs.items() if item[0] not in skip)
+
+        return tuple(
+            args[position] if position is not None and position < len(args) else kwargs.get(name, default)
+            for name, position, default in positions
+        )
+
+    def add(self, key):
+        """Indexes a key that was added to the cache."""
+        for position, index in self._indexes.values():
+            try:
+                index[key[position]].add(key)
+            except KeyError:
+                index[key[position]] = {key}
+
+    def discard(self, key):
+        """Removes a key that left the cache from the indexes."""
+        for position, index in self._indexes.values():
+            keys = index.get(key[position])
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[key[position]]
+
+    def find(self, **values):
+        """Returns the keys whose indexed arguments have all the given values."""
+        found = None
+        for name, value in values.items():
+            try:
+                _, index = self._indexes[name]
+            except KeyError:
+                raise TypeError(f'Argument {name!r} is not indexed') from None
+
+            keys = index.get(value, set())
+            found = set(keys) if found is None else found & keys
+            if not found:
+                break
+        return found or set()
+
+    def clear(self):
+        """Drops every indexed key."""
+        for _, index in self._indexes.values():
+            index.clear()
+
+
+class CacheStats:
+    """The counters of a cached function, returned by its ``get_stats``.
+
+    Attributes
+    ----------
+    hits: :class:`int`
+        Calls answered from the cache.
+    misses: :class:`int`
+        Calls that had to run the function.
+    coalesced: :class:`int`
+        Calls that joined a call of the function that was still running.
+    failures: :class:`int`
+        Calls of the function that raised or were cancelled.
+    """
+
+    __slots__ = ('hits', 'misses', 'coalesced', 'failures')
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    def __repr__(self):
+        return (
+            f'<CacheStats hits={self.hits} misses={self.misses} '
+            f'coalesced={self.coalesced} failures={self.failures} hit_rate={self.hit_rate:.2%}>'
+        )
+
+    @property
+    def hit_rate(self):
+        """:class:`float`: The share of calls that did not have to run the function."""
+        total = self.hits + self.misses + self.coalesced
+        return (self.hits + self.coalesced) / total if total else 0.0
+
+    def reset(self):
+        self.hits = self.misses = self.coalesced = self.failures = 0
+
+    def to_dict(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'failures': self.failures,
+            'hit_rate': round(self.hit_rate, 4),
+        }
 
 
 class Strategy(enum.Enum):
     lru = 1
     raw = 2
     timed = 3
+    timed_lru = 4
+
+
+def cache(maxsize=128, strategy=Strategy.lru, ignore_kwargs=False, *, ttl=None, key_args=None, index=()):
+    """Caches the results of a function.
 
+    ``Strategy.timed`` expires entries ``ttl`` seconds after they were set. For backwards
+    compatibility, ``maxsize`` is used as the time to live when ``ttl`` is not given,
+    and the cache is unbounded. ``Strategy.timed_lru`` requires ``ttl`` and additionally
+    evicts the least recently used entry once ``maxsize`` entries are cached.
+
+    See :class:`CacheKeys` for how ``key_args``, ``index`` and ``ignore_kwargs`` build the keys.
+    Indexed arguments can be invalidated at once with ``invalidate_where``, e.g.
+    ``func.invalidate_where(guild_id=guild.id)``.
+    """
 
-def cache(maxsize=128, strategy=Strategy.lru, ignore_kwargs=False):
     def decorator(func):
+        keys = CacheKeys(func, key_args, index, ignore_kwargs)
+        stats = CacheStats()
+
         if strategy is Strategy.lru:
             _internal_cache = LRU(maxsize)
-            _stats = _internal_cache.get_stats
         elif strategy is Strategy.raw:
             _internal_cache = {}
-
-            def _stats() -> Tuple[int, int]:
-                return 0, 0
-
-        elif strategy is Strategy.timed:
-            _internal_cache = ExpiringCache(maxsize)
-
-            def _stats() -> Tuple[int, int]:
-                return 0, 0
-
+        elif strategy is Strategy.timed or strategy is Strategy.timed_lru:
+            if ttl is not None:
+                _internal_cache = ExpiringCache(ttl, maxsize=maxsize, lru=strategy is Strategy.timed_lru)
+            elif strategy is Strategy.timed:
+                _internal_cache = ExpiringCache(maxsize)
+            else:
+                raise ValueError("Strategy.timed_lru requires a ttl")
         else:
             raise ValueError("Unknown strategy")
 
-        def _make_key(args, kwargs):
-            # this is a bit of a clusterfuck
-            # we do care what 'self' parameter is when we __repr__ it
-            def _true_repr(o):
-                if o.__class__.__repr__ is object.__repr__:
-                    return f'<{o.__class__.__module__}.{o.__class__.__name__}>'
-                return repr(o)
-
-            key = [f'{func.__module__}.{func.__name__}']
-            key.extend(_true_repr(o) for o in args)
-            if not ignore_kwargs:
-                for k, v in kwargs.items():
-                    # note: this only really works for this use case in particular
-                    # I want to pass asyncpg.Connection objects to the parameters
-                    # however, they use default __repr__ and I do not care what
-                    # connection is passed in, so I needed a bypass.
-                    if k == 'connection':
-                        continue
-
-                    key.append(_true_repr(k))
-                    key.append(_true_repr(v))
-
-            return ':'.join(key)
+        if index and isinstance(_internal_cache, (ExpiringCache, LRU)):
+            _internal_cache.set_callback(lambda key, _: keys.discard(key))
+
+        def _store(key, value):
+            _internal_cache[key] = value
+            keys.add(key)
 
         @wraps(func)
         def wrapper(*args, **kwargs):
-            key = _make_key(args, kwargs)
+            key = keys.make(args, kwargs)
             try:
                 value = _internal_cache[key]
             except KeyError:
-                value = func(*args, **kwargs)
+                stats.misses += 1
+                try:
+                    value = func(*args, **kwargs)
+                except Exception:
+                    stats.failures += 1
+                    raise
 
                 if inspect.isawaitable(value):
-                    return _wrap_and_store_coroutine(_internal_cache, key, value)
+                    return _wrap_and_store_coroutine(_store, key, value, stats)
 
-                _internal_cache[key] = value
+                _store(key, value)
                 return value
             else:
+                stats.hits += 1
                 if asyncio.iscoroutinefunction(func):
                     return _wrap_new_coroutine(value)
                 return value
 
-        def _invalidate(*args, **kwargs):
+        def _remove(key):
             try:
-                del _internal_cache[_make_key(args, kwargs)]
+                del _internal_cache[key]
             except KeyError:
                 return False
             else:
+                keys.discard(key)
                 return True
 
-        def _invalidate_containing(key):
-            to_remove = []
-            for k in _internal_cache.keys():
-                if key in k:
-                    to_remove.append(k)
-            for k in to_remove:
-                try:
-                    del _internal_cache[k]
-                except KeyError:
-                    continue
+        def _invalidate(*args, **kwargs):
+            return _remove(keys.make(args, kwargs))
+
+        def _invalidate_where(**values):
+            return sum(_remove(key) for key in keys.find(**values))
+
+        def _invalidate_containing(value):
+            # Kept for older callers, this looks at every key. Prefer invalidate_where.
+            for key in [k for k in _internal_cache.keys() if value in k]:
+                _remove(key)
+
+        def _clear():
+            _internal_cache.clear()
+            keys.clear()
 
         wrapper.cache = _internal_cache  # type: ignore
-        wrapper.get_key = lambda *args, **kwargs: _make_key(args, kwargs)  # type: ignore
+        wrapper.get_key = lambda *args, **kwargs: keys.make(args, kwargs)  # type: ignore
         wrapper.invalidate = _invalidate  # type: ignore
-        wrapper.get_stats = _stats  # type: ignore
+        wrapper.invalidate_where = _invalidate_where  # type: ignore
+        wrapper.get_stats = lambda: stats  # type: ignore
         wrapper.invalidate_containing = _invalidate_containing  # type: ignore
+        wrapper.clear = _clear  # type: ignore
         return wrapper
 
     return decorator
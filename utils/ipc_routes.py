@@ -44,6 +44,32 @@ class DuckBotIPC(IPCBase):
             ]
         )
 
+    @route("/metrics/queries", method="get")
+    async def query_metrics(self, request: web.Request):
+        return web.json_response(self.bot.query_stats.get_stats())
+
+    @route("/metrics/pool", method="get")
+    async def pool_metrics(self, request: web.Request):
+        return web.json_response(
+            {
+                "size": self.bot.pool.get_size(),
+                "idle": self.bot.pool.get_idle_size(),
+                "acquire": self.bot.query_stats.acquire.to_dict(),
+                "safe_connection": self.bot.pool_stats.to_dict(),
+                "prepared_statements": self.bot.queries.get_stats(),
+                "command_usage": self.bot.command_usage.get_stats(),
+                "cache_invalidation": self.bot.invalidation.get_stats(),
+                "guild_configs": self.bot.guild_configs.get_stats(),
+                "checks": self.bot.checks.get_stats(),
+                "abuse": self.bot.abuse.get_stats(),
+                "timers": self.bot.timer_stats.to_dict(),
+            }
+        )
+
+    @route("/metrics/loop", method="get")
+    async def loop_metrics(self, request: web.Request):
+        return web.json_response(self.bot.loop_monitor.get_stats())
+
     @route("/users/{id}", method="get")
     async def get_user(self, request: web.Request):
         id = int(request.match_info["id"])